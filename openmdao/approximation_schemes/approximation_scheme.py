@@ -1,12 +1,26 @@
 """Base class used to define the interface for derivative approximation schemes."""
 from __future__ import print_function, division
 
+import numpy as np
+from scipy.sparse import coo_matrix
+
 
 class ApproximationScheme(object):
     """
     Base class used to define the interface for derivative approximation schemes.
+
+    Attributes
+    ----------
+    _approx_colorings : dict
+        Cached column colorings of sparse approximated partials, keyed by approximation group.
     """
 
+    def __init__(self):
+        """
+        Initialize the ApproximationScheme.
+        """
+        self._approx_colorings = {}
+
     def add_approximation(self, abs_key, kwargs):
         """
         Use this approximation scheme to approximate the derivative d(of)/d(wrt).
@@ -41,7 +55,85 @@ class ApproximationScheme(object):
         """
         Perform any necessary setup for the approximation scheme.
         """
-        pass
+        self._approx_colorings = {}
+
+    def _get_approx_coloring(self, system, key, wrt, approximations, deriv_type):
+        """
+        Return the column coloring used to approximate sparse partials with respect to wrt.
+
+        Columns of the same color don't have nonzeros in the same row of any 'of' variable,
+        so they can all be perturbed in a single run of the system.
+
+        Parameters
+        ----------
+        system : System
+            The system having its derivs approximated.
+        key : tuple
+            Key of the approximation group, used for caching.
+        wrt : str
+            Absolute name of the variable being perturbed.
+        approximations : list of tuple
+            The (of, wrt, options) entries of the approximation group.
+        deriv_type : str
+            One of 'total' or 'partial', indicating if total or partial derivatives are being
+            approximated.
+
+        Returns
+        -------
+        list or None
+            For each color, a tuple of the form (cols, scatters), where cols are the indices of
+            wrt to perturb and scatters is a list of (of, nz_idxs, rows) telling which of the
+            declared nonzeros of d(of)/d(wrt) are found at which rows of of.  None if coloring
+            doesn't apply because a subjac is dense or indices are being overridden.
+        """
+        try:
+            return self._approx_colorings[key]
+        except KeyError:
+            pass
+
+        # avoid circular import
+        from openmdao.utils.coloring import _get_full_disjoint_cols
+
+        coloring = None
+
+        if (deriv_type == 'partial' and wrt not in system._owns_approx_wrt_idx and
+                all(options.get('rows') is not None and of not in system._owns_approx_of_idx
+                    for of, _, options in approximations)):
+
+            rows = []
+            cols = []
+            offset = 0
+            for of, _, options in approximations:
+                rows.append(options['rows'] + offset)
+                cols.append(options['cols'])
+                nrows, ncols = options['shape']
+                offset += nrows
+
+            rows = np.concatenate(rows)
+            cols = np.concatenate(cols)
+            J = coo_matrix((np.ones(rows.size, dtype=bool), (rows, cols)), shape=(offset, ncols))
+
+            # only columns with nonzeros need to be perturbed
+            col_nonzeros = np.diff(J.tocsc().indptr)
+            colors = np.full(ncols, -1, dtype=int)
+            col_groups = []
+            for group in _get_full_disjoint_cols(J):
+                group = np.array(sorted(group), dtype=int)
+                group = group[col_nonzeros[group] > 0]
+                if group.size > 0:
+                    colors[group] = len(col_groups)
+                    col_groups.append(group)
+
+            coloring = [(group, []) for group in col_groups]
+            for of, _, options in approximations:
+                nz_colors = colors[options['cols']]
+                for color, (group, scatters) in enumerate(coloring):
+                    nz_idxs = np.nonzero(nz_colors == color)[0]
+                    if nz_idxs.size > 0:
+                        scatters.append((of, nz_idxs, options['rows'][nz_idxs]))
+
+        self._approx_colorings[key] = coloring
+        return coloring
 
     def _run_point(self, system, input_deltas, out_tmp, in_tmp, result_array, deriv_type='partial'):
         """
@@ -2,11 +2,13 @@
 from __future__ import division, print_function
 
 from itertools import groupby
-from six.moves import range
+from six import iteritems
+from six.moves import range, zip
 
 import numpy as np
 
 from openmdao.approximation_schemes.approximation_scheme import ApproximationScheme
+from openmdao.vectors.default_vector import DefaultVector
 from openmdao.utils.name_maps import abs_key2rel_key
 
 
@@ -33,6 +35,9 @@ class ComplexStep(ApproximationScheme):
         A list of which derivatives (in execution order) to compute.
         The entries are of the form (of, wrt, options), where of and wrt are absolute names
         and options is a dictionary.
+    _batch_vectors : dict
+        Multi-column complex (input, output, residual) vectors keyed by number of columns,
+        used to evaluate batches of perturbations of multi_column_safe components.
     """
 
     def __init__(self):
@@ -41,6 +46,7 @@ class ComplexStep(ApproximationScheme):
         """
         super(ComplexStep, self).__init__()
         self._exec_list = []
+        self._batch_vectors = {}
 
     def add_approximation(self, abs_key, kwargs):
         """
@@ -84,8 +90,9 @@ class ComplexStep(ApproximationScheme):
         # itertools.groupby works like `uniq` rather than the SQL query, meaning that it will only
         # group adjacent items with identical keys.
         self._exec_list.sort(key=self._key_fun)
+        self._batch_vectors = {}
 
-        # TODO: Automatic sparse FD by constructing a graph of variable dependence?
+        super(ComplexStep, self)._init_approximations()
 
     def compute_approximations(self, system, jac=None, deriv_type='partial'):
         """
@@ -143,37 +150,52 @@ class ComplexStep(ApproximationScheme):
 
                 in_idx = range(in_size)
 
-            outputs = []
+            # groupby returns an iterator that only works once, so keep a list of the group.
+            approximations = list(approximations)
+            coloring = self._get_approx_coloring(system, key, wrt, approximations, deriv_type)
 
-            # Note: If access to `approximations` is required again in the future, we will need to
-            # throw it in a list first. The groupby iterator only works once.
-            for approx_tuple in approximations:
-                of = approx_tuple[0]
-                # TODO: Sparse derivatives
-                if of in system._owns_approx_of_idx:
-                    out_idx = system._owns_approx_of_idx[of]
-                    out_size = len(out_idx)
-                else:
-                    out_size = system._var_abs2meta[of]['size']
-
-                outputs.append((of, np.zeros((out_size, in_size))))
-
-            for i_count, idx in enumerate(in_idx):
-                # Run the Finite Difference
-                input_delta = [(wrt, idx, delta)]
-                result = self._run_point_complex(system, input_delta, results_clone, deriv_type)
+            outputs = []
 
-                for of, subjac in outputs:
+            if coloring is None:
+                for of, _, options in approximations:
                     if of in system._owns_approx_of_idx:
                         out_idx = system._owns_approx_of_idx[of]
-                        subjac[:, i_count] = (result._views_flat[of][out_idx] * fact).imag
+                        out_size = len(out_idx)
                     else:
-                        subjac[:, i_count] = (result._views_flat[of] * fact).imag
+                        out_size = system._var_abs2meta[of]['size']
+
+                    outputs.append((of, options, np.zeros((out_size, in_size))))
+
+                results = self._run_points_complex(system, wrt, in_idx, delta, results_clone,
+                                                   deriv_type)
+
+                for i_count, result in enumerate(results):
+                    for of, _, subjac in outputs:
+                        if of in system._owns_approx_of_idx:
+                            out_idx = system._owns_approx_of_idx[of]
+                            subjac[:, i_count] = (result[of][out_idx] * fact).imag
+                        else:
+                            subjac[:, i_count] = (result[of] * fact).imag
+            else:
+                # Sparse partials: perturb all columns of a color at once and scatter the
+                # results into the declared nonzeros.
+                for of, _, options in approximations:
+                    outputs.append((of, None, np.zeros(options['rows'].size)))
+                nz_vals = {of: vals for of, _, vals in outputs}
 
-            for of, subjac in outputs:
+                results = self._run_points_complex(system, wrt, [c for c, _ in coloring], delta,
+                                                   results_clone, deriv_type)
+
+                for (cols, scatters), result in zip(coloring, results):
+                    for of, nz_idxs, rows in scatters:
+                        nz_vals[of][nz_idxs] = (result[of][rows] * fact).imag
+
+            for of, options, subjac in outputs:
                 rel_key = abs_key2rel_key(system, (of, wrt))
                 if uses_src_indices:
                     jac._override_checks = True
+                elif options is not None and options.get('rows') is not None:
+                    subjac = subjac[options['rows'], options['cols']]
                 jac[rel_key] = subjac
                 if uses_src_indices:
                     jac._override_checks = False
@@ -181,6 +203,139 @@ class ComplexStep(ApproximationScheme):
         # Turn off complex step.
         system._set_complex_step_mode(False)
 
+    def _run_points_complex(self, system, wrt, points, delta, result_clone, deriv_type):
+        """
+        Run the system for each complex step perturbation of wrt, yielding the results.
+
+        If the system is flagged as multi_column_safe, the perturbations are evaluated in
+        batches, each in a single call, using vectors with one column per perturbation.
+
+        Parameters
+        ----------
+        system : System
+            The system having its derivs approximated.
+        wrt : str
+            Absolute name of the variable being perturbed.
+        points : iterable
+            For each perturbation, the indices of wrt to perturb together.
+        delta : complex
+            Complex step.
+        result_clone : Vector
+            A vector cloned from the outputs vector. Used to store the results.
+        deriv_type : str
+            One of 'total' or 'partial', indicating if total or partial derivatives are being
+            approximated.
+
+        Yields
+        ------
+        dict
+            Flat result arrays for each perturbation, keyed by absolute variable name.
+        """
+        if deriv_type != 'partial' or not system.options['multi_column_safe']:
+            for idx in points:
+                input_delta = [(wrt, idx, delta)]
+                yield self._run_point_complex(system, input_delta, result_clone,
+                                              deriv_type)._views_flat
+            return
+
+        points = list(points)
+        batch_size = system.options['cs_batch_size'] or len(points)
+
+        for start in range(0, len(points), batch_size):
+            batch = points[start:start + batch_size]
+            if len(batch) == 1:
+                # a single column vector has no column dimension, so just run the point
+                input_delta = [(wrt, batch[0], delta)]
+                yield self._run_point_complex(system, input_delta, result_clone,
+                                              deriv_type)._views_flat
+            else:
+                views = self._run_batch_complex(system, wrt, batch, delta)
+                for icol in range(len(batch)):
+                    yield {name: view[:, icol] for name, view in iteritems(views)}
+
+    def _get_batch_vectors(self, system, ncol):
+        """
+        Return complex input, output and residual vectors with ncol columns for the system.
+
+        Parameters
+        ----------
+        system : Component
+            The component having its derivs approximated.
+        ncol : int
+            Number of columns.
+
+        Returns
+        -------
+        tuple of <Vector>
+            The input, output and residual vectors, in complex step mode.
+        """
+        try:
+            return self._batch_vectors[ncol]
+        except KeyError:
+            pass
+
+        vecs = []
+        for kind in ('input', 'output', 'residual'):
+            vec = DefaultVector('nonlinear', kind, system, alloc_complex=True, ncol=ncol)
+            vec.set_complex_step_mode(True)
+            vecs.append(vec)
+
+        self._batch_vectors[ncol] = vecs = tuple(vecs)
+        return vecs
+
+    def _run_batch_complex(self, system, wrt, points, delta):
+        """
+        Evaluate a batch of complex step perturbations in a single call of the component.
+
+        Parameters
+        ----------
+        system : Component
+            The component having its derivs approximated.
+        wrt : str
+            Absolute name of the variable being perturbed.
+        points : list
+            For each perturbation, the indices of wrt to perturb together.
+        delta : complex
+            Complex step.
+
+        Returns
+        -------
+        dict
+            Views of the results keyed by absolute variable name, with one column per
+            perturbation.
+        """
+        # avoid circular import
+        from openmdao.core.explicitcomponent import ExplicitComponent
+
+        inputs, outputs, residuals = self._get_batch_vectors(system, len(points))
+
+        inputs._data[:] = system._inputs._data[:, np.newaxis]
+        outputs._data[:] = system._outputs._data[:, np.newaxis]
+
+        if wrt in outputs._views_flat:
+            wrt_view = outputs._views_flat[wrt]
+        else:
+            wrt_view = inputs._views_flat[wrt]
+
+        for icol, idx in enumerate(points):
+            wrt_view[idx, icol] += delta
+
+        inputs.read_only = True
+        try:
+            if isinstance(system, ExplicitComponent):
+                system.compute(inputs, outputs)
+                return outputs._views_flat
+            else:
+                residuals._data[:] = 0.
+                outputs.read_only = True
+                try:
+                    system.apply_nonlinear(inputs, outputs, residuals)
+                finally:
+                    outputs.read_only = False
+                return residuals._views_flat
+        finally:
+            inputs.read_only = False
+
     def _run_point_complex(self, system, input_deltas, result_clone, deriv_type='partial'):
         """
         Perturb the system inputs with a complex step, runs, and returns the results.
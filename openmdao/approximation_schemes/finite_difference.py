@@ -1,13 +1,17 @@
 """Finite difference derivative approximations."""
 from __future__ import division, print_function
 
-from collections import namedtuple
+import weakref
+from collections import namedtuple, OrderedDict
 from itertools import groupby
+from six import iteritems
 from six.moves import range, zip
 
 import numpy as np
 
 from openmdao.approximation_schemes.approximation_scheme import ApproximationScheme
+from openmdao.utils.concurrent import fork_context
+from openmdao.utils.mpi import MPI
 from openmdao.utils.name_maps import abs_key2rel_key
 
 
@@ -18,8 +22,16 @@ DEFAULT_FD_OPTIONS = {
     'form': 'forward',
     'order': None,
     'step_calc': 'abs',
+    'parallel': None,
+    'num_procs': None,
 }
 
+PARALLEL_FD_MODES = (None, 'processes')
+
+# Systems (and the schemes approximating them) that forked worker processes evaluate, keyed
+# by the id of the scheme.  Workers get a copy of this when they are forked.
+_fork_state = {}
+
 DEFAULT_ORDER = {
     'forward': 1,
     'backward': 1,
@@ -64,6 +76,37 @@ def _generate_fd_coeff(form, order):
     return fd_form
 
 
+def _run_point_worker(args):
+    """
+    Run a single perturbed point in a forked worker process.
+
+    Parameters
+    ----------
+    args : tuple
+        Scheme id, wrt name, perturbed indices, delta, deriv_type, and the input and output
+        arrays of the system at the current point.
+
+    Returns
+    -------
+    ndarray
+        The results from running the perturbed system.
+    """
+    scheme_id, wrt, idx, delta, deriv_type, in_data, out_data = args
+    scheme, system = [ref() for ref in _fork_state[scheme_id]]
+
+    system._inputs._data[:] = in_data
+    system._outputs._data[:] = out_data
+
+    if deriv_type == 'total':
+        current_vec = system._outputs
+    else:
+        current_vec = system._residuals
+
+    result_array = np.empty(system._outputs._data.size)
+    return scheme._run_point(system, [(wrt, idx, delta)], current_vec._data.copy(), in_data,
+                             result_array, deriv_type)
+
+
 class FiniteDifference(ApproximationScheme):
     r"""
     Approximation scheme using finite differences to estimate derivatives.
@@ -81,6 +124,8 @@ class FiniteDifference(ApproximationScheme):
         A list of which derivatives (in execution order) to compute.
         The entries are of the form (of, wrt, fd_options), where of and wrt are absolute names
         and fd_options is a dictionary.
+    _pool : multiprocessing.Pool or None
+        Pool of forked worker processes used when parallel='processes'.
     """
 
     def __init__(self):
@@ -89,6 +134,7 @@ class FiniteDifference(ApproximationScheme):
         """
         super(FiniteDifference, self).__init__()
         self._exec_list = []
+        self._pool = None
 
     def add_approximation(self, abs_key, kwargs):
         """
@@ -105,6 +151,10 @@ class FiniteDifference(ApproximationScheme):
         fd_options = DEFAULT_FD_OPTIONS.copy()
         fd_options.update(kwargs)
 
+        if fd_options['parallel'] not in PARALLEL_FD_MODES:
+            msg = "'{}' is not a valid parallel mode for finite difference; must be one of {}"
+            raise ValueError(msg.format(fd_options['parallel'], list(PARALLEL_FD_MODES)))
+
         if fd_options['order'] is None:
             form = fd_options['form']
             if form in DEFAULT_ORDER:
@@ -127,13 +177,13 @@ class FiniteDifference(ApproximationScheme):
 
         Returns
         -------
-        tuple(str, str, float, int, str)
-            Sorting key (wrt, form, step_size, order, step_calc)
+        tuple(str, str, float, int, str, str)
+            Sorting key (wrt, form, step_size, order, step_calc, parallel)
 
         """
         fd_options = approx_tuple[2]
         return (approx_tuple[1], fd_options['form'], fd_options['order'],
-                fd_options['step'], fd_options['step_calc'])
+                fd_options['step'], fd_options['step_calc'], str(fd_options['parallel']))
 
     def _init_approximations(self):
         """
@@ -143,7 +193,59 @@ class FiniteDifference(ApproximationScheme):
         # group adjacent items with identical keys.
         self._exec_list.sort(key=self._key_fun)
 
-        # TODO: Automatic sparse FD by constructing a graph of variable dependence?
+        # workers hold a copy of the system from before this setup, so they can't be reused.
+        self._close_pool()
+
+        super(FiniteDifference, self)._init_approximations()
+
+    def _get_pool(self, system):
+        """
+        Return the pool of worker processes, forking it on first use.
+
+        Each worker holds a copy of the system as it was when the pool was forked.
+
+        Parameters
+        ----------
+        system : System
+            System on which the execution is run.
+
+        Returns
+        -------
+        multiprocessing.Pool
+            Pool of forked worker processes.
+        """
+        if self._pool is None:
+            if fork_context is None:
+                raise RuntimeError("{}: parallel='processes' finite difference requires a "
+                                   "platform that supports os.fork.".format(system.pathname))
+            if MPI:
+                raise RuntimeError("{}: parallel='processes' finite difference is not "
+                                   "supported under MPI.".format(system.pathname))
+
+            num_procs = [opts['num_procs'] for _, _, opts in self._exec_list
+                         if opts['parallel'] == 'processes']
+            num_procs = max(num_procs) if None not in num_procs else None
+
+            _fork_state[id(self)] = (weakref.ref(self), weakref.ref(system))
+            self._pool = fork_context.Pool(num_procs)
+
+        return self._pool
+
+    def _close_pool(self):
+        """
+        Shut down the worker processes, if any.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            _fork_state.pop(id(self), None)
+
+    def __del__(self):
+        """
+        Shut down the worker processes, if any, when the scheme is garbage collected.
+        """
+        self._close_pool()
 
     def compute_approximations(self, system, jac=None, deriv_type='partial'):
         """
@@ -163,6 +265,10 @@ class FiniteDifference(ApproximationScheme):
         if len(self._exec_list) == 0:
             return
 
+        # workers hold a copy of the system from when they were forked, and anything besides the
+        # vectors (attributes, options, trained surrogates, ...) may have changed since then.
+        self._close_pool()
+
         if jac is None:
             jac = system._jacobian
 
@@ -181,10 +287,15 @@ class FiniteDifference(ApproximationScheme):
         uses_src_indices = (system._owns_approx_of_idx or system._owns_approx_wrt_idx) and \
             not isinstance(jac, dict)
 
+        if deriv_type == 'total' and self._can_color_totals(system):
+            self._compute_colored_totals(system, jac, current_vec, result, result_array,
+                                         out_tmp, in_tmp, uses_src_indices)
+            return
+
         for key, approximations in groupby(self._exec_list, self._key_fun):
             # groupby (along with this key function) will group all 'of's that have the same wrt and
             # step size.
-            wrt, form, order, step, step_calc = key
+            wrt, form, order, step, step_calc, parallel = key
 
             # FD forms are written as a collection of changes to inputs (deltas) and the associated
             # coefficients (coeffs). Since we do not need to (re)evaluate the current step, its
@@ -216,46 +327,188 @@ class FiniteDifference(ApproximationScheme):
 
             result._data[:] = system._outputs._data
 
-            outputs = []
+            if parallel == 'processes':
+                pool = self._get_pool(system)
+            else:
+                pool = None
+
+            def _run_fd(idxs):
+                # For each entry of idxs, the indices of wrt to perturb together, put the
+                # finite difference of the results in result and yield.
+                if pool is not None:
+                    # run all of the perturbed points at once in the worker processes
+                    tasks = [(id(self), wrt, idx, delta, deriv_type, in_tmp,
+                              system._outputs._data) for idx in idxs for delta in deltas]
+                    points = iter(pool.map(_run_point_worker, tasks))
+
+                for idx in idxs:
+                    if current_coeff:
+                        result._data[:] = current_vec._data
+                        result._data *= current_coeff
+                    else:
+                        result._data[:] = 0.
 
-            # Note: If access to `approximations` is required again in the future, we will need to
-            # throw it in a list first. The groupby iterator only works once.
-            for approx_tuple in approximations:
-                of = approx_tuple[0]
-                # TODO: Sparse derivatives
-                if of in system._owns_approx_of_idx:
-                    out_idx = system._owns_approx_of_idx[of]
-                    out_size = len(out_idx)
-                else:
-                    out_size = system._var_allprocs_abs2meta[of]['size']
-                outputs.append((of, np.zeros((out_size, in_size))))
+                    for delta, coeff in zip(deltas, coeffs):
+                        if pool is None:
+                            input_delta = [(wrt, idx, delta)]
+                            self._run_point(system, input_delta, out_tmp, in_tmp, result_array,
+                                            deriv_type)
+                            result._data += coeff * result_array
+                        else:
+                            result._data += coeff * next(points)
 
-            for i_count, idx in enumerate(in_idx):
-                if current_coeff:
-                    result._data[:] = current_vec._data
-                    result._data *= current_coeff
-                else:
-                    result._data[:] = 0.
+                    yield
 
-                # Run the Finite Difference
-                for delta, coeff in zip(deltas, coeffs):
-                    input_delta = [(wrt, idx, delta)]
-                    self._run_point(system, input_delta, out_tmp, in_tmp, result_array, deriv_type)
-                    result_array *= coeff
-                    result._data += result_array
+            # groupby returns an iterator that only works once, so keep a list of the group.
+            approximations = list(approximations)
+            coloring = self._get_approx_coloring(system, key, wrt, approximations, deriv_type)
 
-                for of, subjac in outputs:
+            outputs = []
+
+            if coloring is None:
+                for of, _, options in approximations:
                     if of in system._owns_approx_of_idx:
                         out_idx = system._owns_approx_of_idx[of]
-                        subjac[:, i_count] = result._views_flat[of][out_idx]
+                        out_size = len(out_idx)
                     else:
-                        subjac[:, i_count] = result._views_flat[of]
+                        out_size = system._var_allprocs_abs2meta[of]['size']
+                    outputs.append((of, options, np.zeros((out_size, in_size))))
+
+                for i_count, _ in enumerate(_run_fd(in_idx)):
+                    for of, _, subjac in outputs:
+                        if of in system._owns_approx_of_idx:
+                            out_idx = system._owns_approx_of_idx[of]
+                            subjac[:, i_count] = result._views_flat[of][out_idx]
+                        else:
+                            subjac[:, i_count] = result._views_flat[of]
+            else:
+                # Sparse partials: perturb all columns of a color at once and scatter the
+                # results into the declared nonzeros.
+                for of, _, options in approximations:
+                    outputs.append((of, None, np.zeros(options['rows'].size)))
+                nz_vals = {of: vals for of, _, vals in outputs}
+
+                for _, (cols, scatters) in zip(_run_fd([c for c, _ in coloring]), coloring):
+                    for of, nz_idxs, rows in scatters:
+                        nz_vals[of][nz_idxs] = result._views_flat[of][rows]
 
-            for of, subjac in outputs:
+            for of, options, subjac in outputs:
                 rel_key = abs_key2rel_key(system, (of, wrt))
                 if uses_src_indices:
                     jac._override_checks = True
                     jac[rel_key] = subjac
                     jac._override_checks = False
                 else:
+                    if options is not None and options.get('rows') is not None:
+                        subjac = subjac[options['rows'], options['cols']]
                     jac[rel_key] = subjac
+
+    def _can_color_totals(self, system):
+        """
+        Return True if the totals can be approximated using the total jacobian coloring.
+
+        Parameters
+        ----------
+        system : System
+            System on which the execution is run.
+
+        Returns
+        -------
+        bool
+            True if the system has a total jacobian coloring that covers all of the
+            approximations and they all share the same finite difference options.
+        """
+        coloring = system._owns_approx_coloring
+        if coloring is None:
+            return False
+
+        wrts = set(wrt for perturbs, _ in coloring for wrt, _ in perturbs)
+
+        opts = set()
+        for of, wrt, options in self._exec_list:
+            if wrt not in wrts or options['parallel'] is not None:
+                return False
+            opts.add(self._key_fun((of, None, options))[1:])
+
+        return len(opts) == 1
+
+    def _compute_colored_totals(self, system, jac, current_vec, result, result_array, out_tmp,
+                                in_tmp, uses_src_indices):
+        """
+        Approximate the totals, perturbing all design var entries of the same color at once.
+
+        Parameters
+        ----------
+        system : System
+            System on which the execution is run.
+        jac : dict-like
+            Storage for the approximated sub-Jacobians.
+        current_vec : Vector
+            The outputs of the system at the current point.
+        result : Vector
+            Vector used to accumulate the differences.
+        result_array : ndarray
+            Array used to store the results of each run.
+        out_tmp : ndarray
+            A copy of the starting outputs array.
+        in_tmp : ndarray
+            A copy of the starting inputs array.
+        uses_src_indices : bool
+            If True, override the Jacobian checks when setting sub-Jacobians.
+        """
+        _, form, order, step, step_calc, _ = self._key_fun(self._exec_list[0])
+        fd_form = _generate_fd_coeff(form, order)
+
+        subjacs = OrderedDict()
+        steps = {}
+        in_idxs = {}
+        for of, wrt, _ in self._exec_list:
+            if wrt not in steps:
+                steps[wrt] = step
+                if step_calc == 'rel':
+                    if wrt in system._outputs._views_flat:
+                        steps[wrt] *= np.linalg.norm(system._outputs._views_flat[wrt])
+                    else:
+                        steps[wrt] *= np.linalg.norm(system._inputs._views_flat[wrt])
+
+                if wrt in system._owns_approx_wrt_idx:
+                    in_idxs[wrt] = np.asarray(system._owns_approx_wrt_idx[wrt])
+                else:
+                    in_idxs[wrt] = np.arange(system._var_allprocs_abs2meta[wrt]['size'])
+
+            if of in system._owns_approx_of_idx:
+                out_size = len(system._owns_approx_of_idx[of])
+            else:
+                out_size = system._var_allprocs_abs2meta[of]['size']
+            subjacs[of, wrt] = np.zeros((out_size, in_idxs[wrt].size))
+
+        # The differences are computed with unit steps and each column is divided by its own
+        # step afterwards, since steps can differ between design vars.
+        for perturbs, scatters in system._owns_approx_coloring:
+            if fd_form.current_coeff:
+                result._data[:] = current_vec._data
+                result._data *= fd_form.current_coeff
+            else:
+                result._data[:] = 0.
+
+            for delta, coeff in zip(fd_form.deltas, fd_form.coeffs):
+                input_delta = [(wrt, in_idxs[wrt][idxs], delta * steps[wrt])
+                               for wrt, idxs in perturbs]
+                self._run_point(system, input_delta, out_tmp, in_tmp, result_array, 'total')
+                result._data += coeff * result_array
+
+            for of, wrt, rows, cols in scatters:
+                if (of, wrt) in subjacs:
+                    vals = result._views_flat[of]
+                    if of in system._owns_approx_of_idx:
+                        vals = vals[system._owns_approx_of_idx[of]]
+                    subjacs[of, wrt][rows, cols] = vals[rows] / steps[wrt]
+
+        for key, subjac in iteritems(subjacs):
+            rel_key = abs_key2rel_key(system, key)
+            if uses_src_indices:
+                jac._override_checks = True
+                jac[rel_key] = subjac
+                jac._override_checks = False
+            else:
+                jac[rel_key] = subjac
@@ -1,14 +1,18 @@
 """Define the ExecComp class, a component that evaluates an expression."""
+import ast
 import re
+from collections import OrderedDict
 from itertools import product
 
 import numpy as np
 from numpy import ndarray, imag, complex as npcomplex
 
-from six import string_types
+from six import iteritems, string_types
 from six.moves import range
 
 from openmdao.core.explicitcomponent import ExplicitComponent
+from openmdao.utils.name_maps import rel_name2abs_name
+from openmdao.vectors.vector import Vector
 
 # regex to check for variable names.
 VAR_RGX = re.compile('([.]*[_a-zA-Z]\w*[ ]*\(?)')
@@ -19,6 +23,54 @@ _allowed_meta = {'value', 'shape', 'units', 'res_units', 'desc',
                  'flat_src_indices'}
 
 
+# Functions that operate elementwise on their arguments, so an expression using only these and
+# arithmetic operators has a diagonal jacobian.
+_elementwise_funcs = {'abs', 'acos', 'acosh', 'arccos', 'arccosh', 'arcsin', 'arcsinh', 'arctan',
+                      'asin', 'asinh', 'atan', 'cos', 'cosh', 'erf', 'erfc', 'exp', 'expm1',
+                      'fmax', 'fmin', 'log', 'log10', 'log1p', 'maximum', 'minimum', 'power',
+                      'sin', 'sinh', 'tan', 'tanh'}
+
+# AST node types allowed in elementwise expressions.
+_elementwise_nodes = {'Module', 'Assign', 'AugAssign', 'Name', 'Load', 'Store', 'Num',
+                      'Constant', 'BinOp', 'UnaryOp', 'Call', 'Add', 'Sub', 'Mult', 'Div',
+                      'Pow', 'USub', 'UAdd'}
+
+
+def _is_elementwise(exprs, varnames):
+    """
+    Return True if the given expressions only use elementwise operations.
+
+    Parameters
+    ----------
+    exprs : list of str
+        The expressions.
+    varnames : set of str
+        Names of the variables in the expressions.
+
+    Returns
+    -------
+    bool
+        True if each output depends only on the same entries of the inputs.
+    """
+    names = set(varnames).union(_elementwise_funcs, ('e', 'pi'))
+    for expr in exprs:
+        try:
+            tree = ast.parse(expr.strip())
+        except SyntaxError:
+            return False
+        for node in ast.walk(tree):
+            typ = type(node).__name__
+            if typ not in _elementwise_nodes:
+                return False
+            if typ == 'Name' and node.id not in names:
+                return False
+            if typ == 'Call' and not (isinstance(node.func, ast.Name) and
+                                      node.func.id in _elementwise_funcs and
+                                      not node.keywords):
+                return False
+    return True
+
+
 def array_idx_iter(shape):
     """
     Return an iterator over the indices into a n-dimensional array.
@@ -42,8 +94,20 @@ class ExecComp(ExplicitComponent):
         Initial values of variables.
     _exprs : list
         List of expressions.
+    _partials_func : function or None
+        Generated function computing the partials from their symbolic derivatives, if the
+        'symbolic_derivs' option is True.
+    _diag_size : int or None
+        Size of the array variables if the partials are diagonal and each input is complex
+        stepped with a single perturbation of the whole array, else None.
     _codes : list
         List of code objects.
+    _compute_func : function or None
+        Generated function evaluating all of the expressions given dict-likes of the inputs
+        and outputs, or None if the expressions must be evaluated using exec.
+    _compute_views_func : function or None
+        Generated function evaluating all of the expressions given the views of the input
+        and output vectors, keyed by absolute name.
     complex_stepsize : double
         Step size used for complex step which is used for derivatives.
     """
@@ -125,7 +189,8 @@ class ExecComp(ExplicitComponent):
             arg with the var name.  If the value is a dict it is assumed
             to contain metadata.  To set the initial value in addition to
             other metadata, assign the initial value to the 'value' entry
-            of the dict.
+            of the dict.  The 'has_diag_partials' and 'symbolic_derivs'
+            options may also be set here.
 
         Notes
         -----
@@ -155,7 +220,12 @@ class ExecComp(ExplicitComponent):
                               x={'value': numpy.ones(10,dtype=float),
                                  'units': 'ft'})
         """
-        super(ExecComp, self).__init__()
+        options = {}
+        for name in ('has_diag_partials', 'symbolic_derivs'):
+            if name in kwargs:
+                options[name] = kwargs.pop(name)
+
+        super(ExecComp, self).__init__(**options)
 
         # if complex step is used for derivatives, this is the stepsize
         self.complex_stepsize = 1.e-6
@@ -165,8 +235,24 @@ class ExecComp(ExplicitComponent):
 
         self._exprs = exprs[:]
         self._codes = None
+        self._compute_func = self._compute_views_func = None
+        self._diag_size = None
+        self._partials_func = None
         self._kwargs = kwargs
 
+    def initialize(self):
+        """
+        Declare options.
+        """
+        self.options.declare('has_diag_partials', types=bool, default=False,
+                             desc='If True, treat all array/array partials as diagonal even if '
+                                  'the expressions use functions that are not known to be '
+                                  'elementwise.')
+        self.options.declare('symbolic_derivs', types=bool, default=False,
+                             desc='If True, compute the partials from derivatives of the '
+                                  'expressions found symbolically at setup instead of using '
+                                  'complex step. Only elementwise expressions are supported.')
+
     def setup(self):
         """
         Set up variable name and metadata lists.
@@ -206,20 +292,51 @@ class ExecComp(ExplicitComponent):
             else:
                 init_vals[arg] = val
 
+        sizes = {}
+        shapes = {}
         for var in sorted(allvars):
             # if user supplied an initial value, use it, otherwise set to 0.0
             val = init_vals.get(var, 0.0)
             meta = kwargs2.get(var, {})
 
             if var in outs:
-                self.add_output(var, val, **meta)
+                meta = self.add_output(var, val, **meta)
             else:
-                self.add_input(var, val, **meta)
+                meta = self.add_input(var, val, **meta)
+            sizes[var] = meta['size']
+            shapes[var] = meta['shape']
 
         self._codes = self._compile_exprs(self._exprs)
-
-        # All derivatives are defined.
-        self.declare_partials(of='*', wrt='*')
+        self._compute_func, self._compute_views_func = self._compile_compute_funcs()
+
+        self._diag_size = None
+        has_diag_partials = self.options['has_diag_partials']
+        if has_diag_partials or _is_elementwise(exprs, allvars):
+            arr_sizes = set(size for size in sizes.values() if size > 1)
+            if len(arr_sizes) == 1 and all(sizes[out] > 1 for out in outs):
+                self._diag_size = arr_sizes.pop()
+            elif has_diag_partials and arr_sizes:
+                raise RuntimeError("%s: has_diag_partials is True, but the array variables "
+                                   "don't all have the same size: %s." %
+                                   (self.pathname, sorted((n, sizes[n]) for n in sizes
+                                                          if sizes[n] > 1)))
+
+        self._partials_func = None
+        if self.options['symbolic_derivs']:
+            self._partials_func = self._compile_partials_func(sorted(allvars - outs),
+                                                              sizes, shapes)
+        elif self._diag_size is None:
+            # All derivatives are defined.
+            self.declare_partials(of='*', wrt='*')
+        else:
+            # Array inputs only affect the same entries of the outputs.
+            arange = np.arange(self._diag_size)
+            for out in sorted(outs):
+                for var in sorted(allvars - outs):
+                    if sizes[var] > 1:
+                        self.declare_partials(of=out, wrt=var, rows=arange, cols=arange)
+                    else:
+                        self.declare_partials(of=out, wrt=var)
 
     def _compile_exprs(self, exprs):
         compiled = []
@@ -231,6 +348,110 @@ class ExecComp(ExplicitComponent):
                                    (self.pathname, exprs[i]))
         return compiled
 
+    def _compile_compute_funcs(self):
+        """
+        Generate functions that evaluate all of the expressions in a single call.
+
+        The variables are bound to locals at the start of the function and the outputs are
+        written back at the end, which avoids the name lookups of running each expression
+        through exec.
+
+        Returns
+        -------
+        tuple of (function, function) or (None, None)
+            Function taking dict-likes of the inputs and outputs and function taking the
+            views of the input and output vectors.  (None, None) if an expression isn't a
+            simple assignment, in which case exec is used.
+        """
+        ins = set()
+        outs = set()
+        for expr in self._exprs:
+            try:
+                body = ast.parse(expr.strip()).body
+            except SyntaxError:
+                return None, None
+            if len(body) != 1 or not isinstance(body[0], (ast.Assign, ast.AugAssign)):
+                return None, None
+            lhs, _ = expr.split('=', 1)
+            outs.update(self._parse_for_out_vars(lhs))
+            ins.update(self._parse_for_vars(expr))
+        ins = sorted(ins - outs)
+        outs = sorted(outs)
+
+        funcs = []
+        for keys in (lambda n: n, lambda n: rel_name2abs_name(self, n)):
+            lines = ['def _exec_comp_compute(_ec_inputs, _ec_outputs):']
+            lines.extend('    %s = _ec_inputs[%r]' % (name, keys(name)) for name in ins)
+            lines.extend('    %s = _ec_outputs[%r]' % (name, keys(name)) for name in outs)
+            lines.extend('    ' + expr.strip() for expr in self._exprs)
+            if funcs:
+                # writing into the views directly, so broadcast scalars like Vector does
+                lines.extend('    _ec_outputs[%r][:] = %s' % (keys(name), name) for name in outs)
+            else:
+                lines.extend('    _ec_outputs[%r] = %s' % (keys(name), name) for name in outs)
+
+            scope = {}
+            try:
+                exec(compile('\n'.join(lines), self.pathname or '<ExecComp>', 'exec'),
+                     _expr_dict, scope)
+            except SyntaxError:
+                return None, None
+            funcs.append(scope['_exec_comp_compute'])
+
+        return tuple(funcs)
+
+    def _compile_partials_func(self, ins, sizes, shapes, declare=True):
+        """
+        Differentiate the expressions, declare the nonzero partials and compile them.
+
+        Parameters
+        ----------
+        ins : list of str
+            Names of the inputs.
+        sizes : dict
+            Size of each variable.
+        shapes : dict
+            Shape of each variable.
+        declare : bool
+            If True, declare the nonzero partials.
+
+        Returns
+        -------
+        function
+            Function taking the inputs and the partials that sets all of the partials.
+        """
+        derivs = _ExprDiff(self.pathname, self._exprs).partials(ins)
+
+        if self._diag_size is None and any(size > 1 for size in sizes.values()):
+            raise RuntimeError("%s: symbolic derivatives require all array variables to "
+                               "have the same size." % self.pathname)
+
+        lines = ['def _exec_comp_partials(_ec_inputs, _ec_partials):']
+        lines.extend('    %s = _ec_inputs[%r]' % (name, name) for name in ins)
+        for (out, inp), deriv in iteritems(derivs):
+            if deriv is None:
+                continue  # doesn't depend on this input, so don't declare it
+
+            if sizes[inp] > 1:
+                arange = np.arange(sizes[inp])
+                if declare:
+                    self.declare_partials(of=out, wrt=inp, rows=arange, cols=arange)
+                shape = (sizes[out],)
+            else:
+                if declare:
+                    self.declare_partials(of=out, wrt=inp)
+                shape = (sizes[out], 1)
+
+            lines.append('    _ec_partials[%r, %r] = _ec_broadcast_to(%s, %r).reshape(%r)' %
+                         (out, inp, deriv, shapes[out], shape))
+
+        # a function with no partials to set still needs a body
+        lines.append('    pass')
+
+        scope = {}
+        exec(compile('\n'.join(lines), self.pathname or '<ExecComp>', 'exec'), _deriv_dict, scope)
+        return scope['_exec_comp_partials']
+
     def _parse_for_out_vars(self, s):
         vnames = set([x.strip() for x in re.findall(VAR_RGX, s)
                       if not x.endswith('(') and not x.startswith('.')])
@@ -267,6 +488,9 @@ class ExecComp(ExplicitComponent):
         """
         state = self.__dict__.copy()
         del state['_codes']
+        del state['_compute_func']
+        del state['_compute_views_func']
+        del state['_partials_func']
         return state
 
     def __setstate__(self, state):
@@ -280,6 +504,14 @@ class ExecComp(ExplicitComponent):
         """
         self.__dict__.update(state)
         self._codes = self._compile_exprs(self._exprs)
+        self._compute_func, self._compute_views_func = self._compile_compute_funcs()
+        self._partials_func = None
+        if self.options['symbolic_derivs']:
+            meta = dict((n, d['metadata']) for n, d in iteritems(self._var_rel2data_io))
+            self._partials_func = self._compile_partials_func(
+                sorted(self._var_rel_names['input']),
+                dict((n, m['size']) for n, m in iteritems(meta)),
+                dict((n, m['shape']) for n, m in iteritems(meta)), declare=False)
 
     def compute(self, inputs, outputs):
         """
@@ -293,8 +525,14 @@ class ExecComp(ExplicitComponent):
         outputs : `Vector`
             `Vector` containing outputs.
         """
-        for expr in self._codes:
-            exec(expr, _expr_dict, _IODict(outputs, inputs))
+        if self._compute_func is None:
+            for expr in self._codes:
+                exec(expr, _expr_dict, _IODict(outputs, inputs))
+        elif (isinstance(inputs, Vector) and isinstance(outputs, Vector) and
+              inputs._icol is None and outputs._icol is None):
+            self._compute_views_func(inputs._views, outputs._views)
+        else:
+            self._compute_func(inputs, outputs)
 
     def compute_partials(self, inputs, partials):
         """
@@ -312,6 +550,14 @@ class ExecComp(ExplicitComponent):
         step = self.complex_stepsize * 1j
         out_names = self._var_allprocs_prom2abs_list['output']
 
+        if self._partials_func is not None:
+            self._partials_func(inputs, partials)
+            return
+
+        if self._diag_size is not None:
+            self._compute_diag_partials(inputs, partials, step, out_names)
+            return
+
         for param in inputs:
 
             pwrap = _TmpDict(inputs)
@@ -354,6 +600,341 @@ class ExecComp(ExplicitComponent):
                 else:
                     pwrap[param][idx] -= step
 
+    def _compute_diag_partials(self, inputs, partials, step, out_names):
+        """
+        Complex step each input with a single perturbation of the whole array.
+
+        Since each output entry only depends on the same entry of each array input, all of
+        the diagonal entries of a partial come from the same evaluation.
+
+        Parameters
+        ----------
+        inputs : `VecWrapper`
+            `VecWrapper` containing parameters. (p)
+        partials : `Jacobian`
+            Contains sub-jacobians.
+        step : complex
+            The complex step.
+        out_names : iter of str
+            Names of the outputs.
+        """
+        for param in inputs:
+            pwrap = _TmpDict(inputs)
+            pwrap[param] = np.asarray(inputs[param], npcomplex) + step
+
+            uwrap = _TmpDict(self._outputs, return_complex=True)
+
+            # solve with complex param value
+            self._residuals.set_const(0.0)
+            self.compute(pwrap, uwrap)
+
+            diag = pwrap[param].size > 1
+            for u in out_names:
+                jval = imag(uwrap[u] / self.complex_stepsize)
+                if diag:
+                    partials[(u, param)] = jval.ravel()
+                else:
+                    partials[(u, param)] = jval.reshape((jval.size, 1))
+
+
+# Derivatives of single argument functions, given the source of the argument.
+_deriv_funcs = {
+    'sin': 'cos({0})',
+    'cos': '(-sin({0}))',
+    'tan': '(1. / cos({0}) ** 2)',
+    'exp': 'exp({0})',
+    'expm1': 'exp({0})',
+    'log': '(1. / {0})',
+    'log10': '(1. / ({0} * log(10.)))',
+    'log1p': '(1. / (1. + {0}))',
+    'sinh': 'cosh({0})',
+    'cosh': 'sinh({0})',
+    'tanh': '(1. / cosh({0}) ** 2)',
+    'arcsin': '((1. - {0} ** 2) ** -0.5)',
+    'asin': '((1. - {0} ** 2) ** -0.5)',
+    'arccos': '(-(1. - {0} ** 2) ** -0.5)',
+    'acos': '(-(1. - {0} ** 2) ** -0.5)',
+    'arctan': '(1. / (1. + {0} ** 2))',
+    'atan': '(1. / (1. + {0} ** 2))',
+    'arcsinh': '(({0} ** 2 + 1.) ** -0.5)',
+    'asinh': '(({0} ** 2 + 1.) ** -0.5)',
+    'arccosh': '(({0} ** 2 - 1.) ** -0.5)',
+    'acosh': '(({0} ** 2 - 1.) ** -0.5)',
+    'abs': '_ec_where({0} >= 0, 1., -1.)',
+    'erf': '(2. / pi ** 0.5 * exp(-{0} ** 2))',
+    'erfc': '(-2. / pi ** 0.5 * exp(-{0} ** 2))',
+}
+
+# Two argument functions that pick one of their arguments.
+_select_funcs = {'maximum': '>=', 'fmax': '>=', 'minimum': '<=', 'fmin': '<='}
+
+_binops = {'Add': '+', 'Sub': '-', 'Mult': '*', 'Div': '/', 'Pow': '**'}
+
+
+class _ExprDiff(object):
+    """
+    Symbolic differentiation of elementwise ExecComp expressions.
+
+    Expressions are differentiated by walking their AST and building the source of the
+    derivative.  Outputs used on the right hand side of later expressions are replaced by
+    the expressions that define them, so the derivatives only depend on the inputs.
+
+    Attributes
+    ----------
+    _pathname : str
+        Pathname of the ExecComp, used in error messages.
+    _rhs : dict
+        AST of the right hand side of each output's expression, keyed by output name.
+    """
+
+    def __init__(self, pathname, exprs):
+        """
+        Parse the expressions.
+
+        Parameters
+        ----------
+        pathname : str
+            Pathname of the ExecComp, used in error messages.
+        exprs : list of str
+            The expressions.
+        """
+        self._pathname = pathname
+        self._rhs = OrderedDict()
+
+        assigns = []
+        for expr in exprs:
+            body = ast.parse(expr.strip()).body
+            if (len(body) != 1 or not isinstance(body[0], ast.Assign) or
+                    len(body[0].targets) != 1 or not isinstance(body[0].targets[0], ast.Name)):
+                self._unsupported(expr)
+            assigns.append((expr, body[0].targets[0].id, body[0].value))
+        outputs = set(name for _, name, _ in assigns)
+
+        for expr, name, rhs in assigns:
+            if name in self._rhs:
+                self._unsupported(expr)
+
+            # make sure outputs are only used after they're defined, since compute would
+            # otherwise read their values from the previous evaluation.
+            for node in ast.walk(rhs):
+                if (isinstance(node, ast.Name) and node.id in outputs and
+                        node.id not in self._rhs):
+                    self._unsupported(expr)
+
+            self._rhs[name] = rhs
+
+    def _unsupported(self, what):
+        """
+        Raise an error for an expression that can't be differentiated.
+
+        Parameters
+        ----------
+        what : str
+            The expression or the unsupported part of it.
+        """
+        raise RuntimeError("%s: symbolic derivatives are not supported for '%s'." %
+                           (self._pathname, what))
+
+    def src(self, node):
+        """
+        Return the source of the given node, with outputs replaced by their expressions.
+
+        Parameters
+        ----------
+        node : ast.AST
+            A node of an expression's AST.
+
+        Returns
+        -------
+        str
+            Fully parenthesized source of the node.
+        """
+        typ = type(node).__name__
+        if typ == 'Name':
+            if node.id in self._rhs:
+                return self.src(self._rhs[node.id])
+            return node.id
+        if typ == 'Num':
+            return repr(node.n)
+        if typ == 'Constant' and isinstance(node.value, (int, float)):
+            return repr(node.value)
+        if typ == 'BinOp' and type(node.op).__name__ in _binops:
+            return '(%s %s %s)' % (self.src(node.left), _binops[type(node.op).__name__],
+                                   self.src(node.right))
+        if typ == 'UnaryOp' and isinstance(node.op, (ast.USub, ast.UAdd)):
+            return '(%s%s)' % ('-' if isinstance(node.op, ast.USub) else '+',
+                               self.src(node.operand))
+        if typ == 'Call' and isinstance(node.func, ast.Name) and not node.keywords:
+            return '%s(%s)' % (node.func.id, ', '.join(self.src(a) for a in node.args))
+        self._unsupported(ast.dump(node))
+
+    def diff(self, node, wrt):
+        """
+        Return the source of the derivative of the given node with respect to an input.
+
+        Parameters
+        ----------
+        node : ast.AST
+            A node of an expression's AST.
+        wrt : str
+            Name of the input.
+
+        Returns
+        -------
+        str or None
+            Source of the derivative, or None if it is zero.
+        """
+        typ = type(node).__name__
+        if typ == 'Name':
+            if node.id in self._rhs:
+                return self.diff(self._rhs[node.id], wrt)
+            return '1.' if node.id == wrt else None
+        if typ in ('Num', 'Constant'):
+            self.src(node)  # make sure it's a number
+            return None
+        if typ == 'UnaryOp':
+            d = self.diff(node.operand, wrt)
+            if d is None or isinstance(node.op, ast.UAdd):
+                return d
+            return '(-%s)' % d
+        if typ == 'BinOp':
+            op = type(node.op).__name__
+            if op not in _binops:
+                self._unsupported(ast.dump(node))
+            return self._diff_binop(op, node.left, node.right, wrt)
+        if typ == 'Call':
+            self.src(node)  # make sure it's a simple call
+            name = node.func.id
+            args = node.args
+            if name in _deriv_funcs and len(args) == 1:
+                d = self.diff(args[0], wrt)
+                if d is None:
+                    return None
+                return _mul(_deriv_funcs[name].format(self.src(args[0])), d)
+            if name == 'power' and len(args) == 2:
+                return self._diff_binop('Pow', args[0], args[1], wrt)
+            if name in _select_funcs and len(args) == 2:
+                da = self.diff(args[0], wrt)
+                db = self.diff(args[1], wrt)
+                if da is None and db is None:
+                    return None
+                return '_ec_where(%s %s %s, %s, %s)' % (self.src(args[0]), _select_funcs[name],
+                                                        self.src(args[1]), da or '0.',
+                                                        db or '0.')
+        self._unsupported(ast.dump(node))
+
+    def _diff_binop(self, op, left, right, wrt):
+        """
+        Return the source of the derivative of a binary operation.
+
+        Parameters
+        ----------
+        op : str
+            Name of the operator.
+        left : ast.AST
+            Left operand.
+        right : ast.AST
+            Right operand.
+        wrt : str
+            Name of the input.
+
+        Returns
+        -------
+        str or None
+            Source of the derivative, or None if it is zero.
+        """
+        a, b = self.src(left), self.src(right)
+        da, db = self.diff(left, wrt), self.diff(right, wrt)
+        if da is None and db is None:
+            return None
+
+        if op in ('Add', 'Sub'):
+            if db is None:
+                return da
+            sign = '+' if op == 'Add' else '-'
+            if da is None:
+                return '(%s%s)' % (sign, db)
+            return '(%s %s %s)' % (da, sign, db)
+        if op == 'Mult':
+            return _add(_mul(da, b), _mul(a, db))
+        if op == 'Div':
+            if db is None:
+                return '(%s / %s)' % (da, b)
+            term = '(%s / %s ** 2)' % (_mul(a, db), b)
+            return '(-%s)' % term if da is None else '(%s / %s - %s)' % (da, b, term)
+
+        # Pow
+        if db is None:
+            return _mul('(%s * %s ** (%s - 1.))' % (b, a, b), da)
+        if da is None:
+            return _mul('(%s ** %s * log(%s))' % (a, b, a), db)
+        return '(%s ** %s * (%s * log(%s) + %s * %s / %s))' % (a, b, db, a, b, da, a)
+
+    def partials(self, inputs):
+        """
+        Return the source of the partial of each output with respect to each input.
+
+        Parameters
+        ----------
+        inputs : iter of str
+            Names of the inputs.
+
+        Returns
+        -------
+        dict
+            Source of each partial derivative, or None if it is zero, keyed by (of, wrt).
+        """
+        return OrderedDict(((out, inp), self.diff(rhs, inp))
+                           for out, rhs in iteritems(self._rhs) for inp in inputs)
+
+
+def _mul(a, b):
+    """
+    Return the source of the product of two derivative terms.
+
+    Parameters
+    ----------
+    a : str or None
+        Source of the first term, or None if it is zero.
+    b : str or None
+        Source of the second term, or None if it is zero.
+
+    Returns
+    -------
+    str or None
+        Source of the product, or None if it is zero.
+    """
+    if a is None or b is None:
+        return None
+    if a == '1.':
+        return b
+    if b == '1.':
+        return a
+    return '(%s * %s)' % (a, b)
+
+
+def _add(a, b):
+    """
+    Return the source of the sum of two derivative terms.
+
+    Parameters
+    ----------
+    a : str or None
+        Source of the first term, or None if it is zero.
+    b : str or None
+        Source of the second term, or None if it is zero.
+
+    Returns
+    -------
+    str or None
+        Source of the sum, or None if it is zero.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return '(%s + %s)' % (a, b)
+
 
 class _TmpDict(object):
     """
@@ -528,3 +1109,9 @@ def _cs_abs(x):
 
 
 _expr_dict['abs'] = _cs_abs
+
+
+# this dict will act as the global scope of the generated functions that compute partials
+_deriv_dict = _expr_dict.copy()
+_deriv_dict['_ec_where'] = np.where
+_deriv_dict['_ec_broadcast_to'] = np.broadcast_to
@@ -3,6 +3,7 @@ from __future__ import print_function
 
 import os
 import sys
+import threading
 
 import numpy.distutils
 from numpy.distutils.exec_command import find_executable
@@ -10,9 +11,16 @@ from numpy.distutils.exec_command import find_executable
 from openmdao.core.analysis_error import AnalysisError
 from openmdao.core.explicitcomponent import ExplicitComponent
 from openmdao.core.implicitcomponent import ImplicitComponent
-from openmdao.utils.shell_proc import STDOUT, DEV_NULL, ShellProc
+from openmdao.utils.shell_proc import STDOUT, DEV_NULL, PIPE, ShellProc, \
+    read_message, write_message
 from openmdao.utils.general_utils import warn_deprecation
 
+# Time allowed for a persistent process to exit on its own after its stdin is closed.
+_STOP_TIMEOUT = 5.
+
+# Time allowed for a persistent process to exit after it is terminated, before it is killed.
+_TERMINATE_TIMEOUT = 1.
+
 
 class ExternalCodeDelegate(object):
     """
@@ -22,6 +30,8 @@ class ExternalCodeDelegate(object):
     ----------
     _comp : ExternalCodeComp or ExternalCodeImplicitComp object
         The external code object this delegate is associated with.
+    _workers : dict
+        Running persistent processes, keyed by command.
     """
 
     def __init__(self, comp):
@@ -34,6 +44,7 @@ class ExternalCodeDelegate(object):
             The external code object this delegate is associated with.
         """
         self._comp = comp
+        self._workers = {}
 
     def declare_options(self):
         """
@@ -44,7 +55,8 @@ class ExternalCodeDelegate(object):
         comp.options.declare('command', [], desc='Command to be executed.')
         comp.options.declare('env_vars', {}, desc='Environment variables required by the command.')
         comp.options.declare('poll_delay', 0.0, lower=0.0,
-                             desc='Delay between polling for command completion. '
+                             desc='Delay between polling for command completion, only used '
+                                  'where the process cannot be waited on with a timeout. '
                                   'A value of zero will use an internally computed default.')
         comp.options.declare('timeout', 0.0, lower=0.0,
                              desc='Maximum time to wait for command completion. '
@@ -61,6 +73,13 @@ class ExternalCodeDelegate(object):
                                   "(AnalysisError).")
         comp.options.declare('allowed_return_codes', [0],
                              desc="List of return codes that are considered successful.")
+        comp.options.declare('persistent', False, types=bool,
+                             desc="If True, the command is started once and kept running "
+                                  "across evaluations. Each evaluation writes a framed "
+                                  "message (see openmdao.utils.shell_proc.write_message) "
+                                  "holding the component's 'request' to the process stdin "
+                                  "and reads the reply, stored in 'reply', from its stdout. "
+                                  "The process is restarted after a failure or timeout.")
 
     def check_config(self, logger):
         """
@@ -123,6 +142,11 @@ class ExternalCodeDelegate(object):
         ----------
         command : List
             Optional command. Otherwise use the command in self.options['command'].
+
+        Returns
+        -------
+        bytes or None
+            Reply payload from a persistent process, otherwise None.
         """
         comp = self._comp
 
@@ -146,7 +170,11 @@ class ExternalCodeDelegate(object):
             if missing:
                 raise err_class("The following input files are missing: %s"
                                 % sorted(missing))
-            return_code, error_msg = self._execute_local(command)
+            if comp.options['persistent']:
+                return_code, error_msg, comp.reply = \
+                    self._execute_persistent(command, err_class)
+            else:
+                return_code, error_msg = self._execute_local(command)
 
             if return_code is None:
                 raise AnalysisError('Timed out after %s sec.' %
@@ -174,9 +202,12 @@ class ExternalCodeDelegate(object):
         finally:
             comp.return_code = -999999 if return_code is None else return_code
 
-    def _execute_local(self, command):
+        if comp.options['persistent']:
+            return comp.reply
+
+    def _shell_command(self, command):
         """
-        Run the command.
+        Check that the command exists and return the arguments to pass to ShellProc.
 
         Parameters
         ----------
@@ -185,14 +216,9 @@ class ExternalCodeDelegate(object):
 
         Returns
         -------
-        int
-            Return Code
-        str
-            Error Message
+        list
+            Command for ShellProc.
         """
-        # Check to make sure command exists
-        comp = self._comp
-
         if isinstance(command, str):
             program_to_execute = command
         else:
@@ -214,8 +240,28 @@ class ExternalCodeDelegate(object):
                                  "cannot be found" % program_to_execute)
             command_for_shell_proc = command
 
+        return command_for_shell_proc
+
+    def _execute_local(self, command):
+        """
+        Run the command.
+
+        Parameters
+        ----------
+        command : List
+            List containing OS command string.
+
+        Returns
+        -------
+        int
+            Return Code
+        str
+            Error Message
+        """
+        comp = self._comp
+
         comp._process = \
-            ShellProc(command_for_shell_proc, comp.stdin,
+            ShellProc(self._shell_command(command), comp.stdin,
                       comp.stdout, comp.stderr, comp.options['env_vars'])
 
         try:
@@ -227,6 +273,122 @@ class ExternalCodeDelegate(object):
 
         return (return_code, error_msg)
 
+    def _execute_persistent(self, command, err_class):
+        """
+        Send the component's request to a persistent process and wait for its reply.
+
+        The process is started on first use, and restarted if it has exited or if the
+        previous exchange with it failed.
+
+        Parameters
+        ----------
+        command : List
+            List containing OS command string.
+        err_class : class
+            Exception class raised if the process stops unexpectedly.
+
+        Returns
+        -------
+        int
+            Return Code
+        str
+            Error Message
+        bytes or None
+            Reply payload.
+        """
+        comp = self._comp
+        key = command if isinstance(command, str) else tuple(command)
+
+        process = self._workers.get(key)
+        if process is not None and process.poll() is not None:
+            self._stop_worker(key)
+            process = None
+        if process is None:
+            process = ShellProc(self._shell_command(command), PIPE, PIPE,
+                                comp.stderr, comp.options['env_vars'])
+            self._workers[key] = process
+
+        # exchange on a separate thread so that the timeout can be enforced
+        result = []
+
+        def exchange():
+            try:
+                write_message(process.stdin, comp.request)
+                result.append(read_message(process.stdout))
+            except (EOFError, IOError, OSError, ValueError) as err:
+                result.append(err)
+
+        thread = threading.Thread(target=exchange)
+        thread.daemon = True
+        thread.start()
+        thread.join(comp.options['timeout'] if comp.options['timeout'] > 0 else None)
+
+        if not result:
+            self._stop_worker(key, kill=True)
+            thread.join()
+            return (None, 'Timed out', None)
+
+        if isinstance(result[0], Exception):
+            return_code, error_msg = self._stop_worker(key, kill=process.poll() is None)
+            raise err_class("The persistent process stopped unexpectedly "
+                            "(return_code = %d%s): %s" % (return_code, error_msg, result[0]))
+
+        return_code, reply = result[0]
+        return (return_code, process.error_message(return_code), reply)
+
+    def _stop_worker(self, key, kill=False):
+        """
+        Stop a persistent process and release its pipes and files.
+
+        Parameters
+        ----------
+        key : str or tuple
+            Command of the process to stop.
+        kill : bool
+            If True, terminate the process instead of closing its stdin and waiting
+            for it to exit. Either way, a process that does not exit in time is killed.
+
+        Returns
+        -------
+        int
+            Return Code
+        str
+            Error Message
+        """
+        process = self._workers.pop(key)
+        if kill:
+            process.terminate()
+        else:
+            try:
+                process.stdin.close()
+            except (IOError, OSError):
+                pass
+
+        # wait terminates the process if it times out.
+        return_code, error_msg = process.wait(timeout=_TERMINATE_TIMEOUT if kill
+                                              else _STOP_TIMEOUT)
+        if return_code is None and not kill:
+            return_code, error_msg = process.wait(timeout=_TERMINATE_TIMEOUT)
+        if return_code is None:
+            # the process ignored the termination signal, so force it to stop and reap it.
+            process.kill()
+            return_code, error_msg = process.wait()
+
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except (IOError, OSError):
+                pass
+
+        return (return_code, error_msg)
+
+    def stop_workers(self):
+        """
+        Stop all persistent processes.
+        """
+        for key in list(self._workers):
+            self._stop_worker(key)
+
 
 class ExternalCodeComp(ExplicitComponent):
     """
@@ -245,6 +407,10 @@ class ExternalCodeComp(ExplicitComponent):
         Error stream external code writes to.
     _external_code_runner: ExternalCodeDelegate object
         The delegate object that handles all the running of the external code for this object.
+    reply : bytes or None
+        Reply payload from the last evaluation of a persistent process.
+    request : bytes or str
+        Message payload sent to a persistent process on each evaluation.
     return_code : int
         Exit status of the child process.
     """
@@ -265,6 +431,8 @@ class ExternalCodeComp(ExplicitComponent):
         self.stdout = None
         self.stderr = "external_code_comp_error.out"
 
+        self.request = b''
+        self.reply = None
         self.return_code = 0
 
     def _declare_options(self):
@@ -288,6 +456,13 @@ class ExternalCodeComp(ExplicitComponent):
         # check for the command
         self._external_code_runner.check_config(logger)
 
+    def cleanup(self):
+        """
+        Clean up resources prior to exit.
+        """
+        super(ExternalCodeComp, self).cleanup()
+        self._external_code_runner.stop_workers()
+
     def compute(self, inputs, outputs):
         """
         Run this component.
@@ -342,6 +517,10 @@ class ExternalCodeImplicitComp(ImplicitComponent):
         Error stream external code writes to.
     _external_code_runner: ExternalCodeDelegate object
         The delegate object that handles all the running of the external code for this object.
+    reply : bytes or None
+        Reply payload from the last evaluation of a persistent process.
+    request : bytes or str
+        Message payload sent to a persistent process on each evaluation.
     return_code : int
         Exit status of the child process.
     """
@@ -362,6 +541,8 @@ class ExternalCodeImplicitComp(ImplicitComponent):
         self.stdout = None
         self.stderr = "external_code_comp_error.out"
 
+        self.request = b''
+        self.reply = None
         self.return_code = 0
 
     def _declare_options(self):
@@ -391,6 +572,13 @@ class ExternalCodeImplicitComp(ImplicitComponent):
         """
         self._external_code_runner.check_config(logger)
 
+    def cleanup(self):
+        """
+        Clean up resources prior to exit.
+        """
+        super(ExternalCodeImplicitComp, self).cleanup()
+        self._external_code_runner.stop_workers()
+
     def apply_nonlinear(self, inputs, outputs, residuals):
         """
         Compute residuals given inputs and outputs.
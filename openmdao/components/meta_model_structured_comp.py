@@ -1,14 +1,19 @@
 """Define the RegularGridInterpComp class."""
 from __future__ import division, print_function, absolute_import
 
+import os
+import struct
 import warnings
+import weakref
+import zipfile
 
-from six import raise_from, iteritems
+from six import raise_from, iteritems, string_types
 from six.moves import range, zip
 
 from scipy import __version__ as scipy_version
 try:
     from scipy.interpolate._bsplines import make_interp_spline
+    from scipy.interpolate import BSpline
 except ImportError:
     make_interp_spline = False
 
@@ -19,6 +24,107 @@ from openmdao.core.explicitcomponent import ExplicitComponent
 from openmdao.utils.general_utils import warn_deprecation
 from openmdao.core.analysis_error import AnalysisError
 
+# Training data loaded from files and the spline coefficients fit to it, shared by every
+# component that references the same file. Entries are dropped once no component uses them.
+_training_data_cache = weakref.WeakValueDictionary()
+_coeff_cache = weakref.WeakValueDictionary()
+
+
+class _CoeffCache(dict):
+    """
+    Dictionary of spline coefficients that can be shared between interpolants.
+    """
+
+    pass
+
+
+def _mmap_npz_member(path, name):
+    """
+    Open an array stored in a .npz file without reading it into memory.
+
+    Members saved with np.savez are stored uncompressed and can be memory-mapped directly.
+    Compressed members (np.savez_compressed) must be decompressed, so they are loaded.
+
+    Parameters
+    ----------
+    path : str
+        Path to the .npz file.
+    name : str
+        Name of the array within the file.
+
+    Returns
+    -------
+    ndarray
+        The (possibly memory-mapped) array.
+    """
+    with zipfile.ZipFile(path) as zf:
+        try:
+            info = zf.getinfo(name + '.npy')
+        except KeyError:
+            raise KeyError("Training data file '%s' does not contain an array named '%s'." %
+                           (path, name))
+
+    if info.compress_type != zipfile.ZIP_STORED:
+        with np.load(path) as npz:
+            return npz[name]
+
+    with open(path, 'rb') as f:
+        # skip the local file header to reach the start of the .npy data
+        f.seek(info.header_offset)
+        fname_len, extra_len = struct.unpack('<HH', f.read(30)[26:30])
+        f.seek(info.header_offset + 30 + fname_len + extra_len)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    return np.memmap(path, dtype=dtype, mode='r', shape=shape, offset=offset,
+                     order='F' if fortran_order else 'C')
+
+
+def _load_training_data(data, name):
+    """
+    Return training data, memory-mapping it if a file name is given.
+
+    Parameters
+    ----------
+    data : ndarray or str
+        Training data, or the path to a .npy file or a .npz file containing an array
+        with the same name as the variable.
+    name : str
+        Name of the variable.
+
+    Returns
+    -------
+    ndarray
+        The training data.
+    tuple or None
+        Key identifying the file the data was loaded from, or None if data was not a file name.
+    """
+    if not isinstance(data, string_types):
+        return data, None
+
+    path = os.path.abspath(data)
+    stat = os.stat(path)
+    is_npz = path.endswith('.npz')
+    key = (path, name if is_npz else None, stat.st_mtime, stat.st_size)
+
+    try:
+        return _training_data_cache[key], key
+    except KeyError:
+        pass
+
+    if is_npz:
+        array = _mmap_npz_member(path, name)
+    else:
+        array = np.load(path, mmap_mode='r')
+
+    _training_data_cache[key] = array
+    return array, key
+
 
 class OutOfBoundsError(Exception):
     """
@@ -95,6 +201,12 @@ class _RegularGridInterp(object):
         Name of interpolation method.
     _all_gradients : ndarray
         Cache of computed gradients.
+    _cardinals : dict
+        Cache of cardinal splines along each dimension, used for gradients with respect to
+        the data values.
+    _coeffs : dict
+        Cache of tensor-product spline coefficients and basis splines, keyed by the tuple of
+        spline orders in each dimension.
     _ki : list
         Interpolation order to be used in each dimension.
     fill_value : float
@@ -112,6 +224,7 @@ class _RegularGridInterp(object):
     __call__
     gradient
     methods
+    training_gradients
 
     """
 
@@ -255,6 +368,8 @@ class _RegularGridInterp(object):
         self._all_gradients = None
         self._spline_dim_error = spline_dim_error
         self._gmethod = None
+        self._coeffs = _CoeffCache()
+        self._cardinals = {}
 
     def __call__(self, xi, method=None, compute_gradients=True):
         """
@@ -323,14 +438,14 @@ class _RegularGridInterp(object):
                 if n_p <= k:
                     ki[-1] = n_p - 1
 
-        interpolator = make_interp_spline
-        result = self._evaluate_splines(self.values[:].T,
-                                        xi,
-                                        indices,
-                                        interpolator,
-                                        method,
-                                        ki,
-                                        compute_gradients=compute_gradients)
+        result, gradients = self._evaluate_splines(xi, ki,
+                                                   compute_gradients=compute_gradients)
+
+        # Cache the computed gradients for return by the gradient method
+        if compute_gradients:
+            self._all_gradients = gradients
+            # indicate what method was used to compute these
+            self._gmethod = method
 
         if not self.bounds_error and self.fill_value is not None:
             result[out_of_bounds] = self.fill_value
@@ -338,38 +453,118 @@ class _RegularGridInterp(object):
         return result.reshape(xi_shape[:-1] +
                               self.values.shape[ndim:])
 
-    def _evaluate_splines(self, data_values, xi, indices, interpolator, method,
-                          ki, compute_gradients=True):
+    def _spline_coeffs(self, ki):
         """
-        Perform interpolation using the given interpolator.
+        Return the tensor-product B-spline representation of the data for the given orders.
+
+        The interpolating spline is separable, so its coefficients are found by fitting 1D
+        splines along each grid axis in turn. The result is cached, so the fits are only
+        performed once for each combination of orders rather than at every evaluation.
+
+        Parameters
+        ----------
+        ki : list
+            List of spline interpolation orders.
+
+        Returns
+        -------
+        ndarray
+            Tensor-product spline coefficients, with the same shape as the data.
+        list of <scipy.interpolate.BSpline>
+            Basis splines for each dimension, with identity coefficients.
+        """
+        key = tuple(ki)
+        try:
+            return self._coeffs[key]
+        except KeyError:
+            pass
+
+        coeffs = np.asarray(self.values[:], dtype=float)
+        bases = []
+        for i, (grid, k) in enumerate(zip(self.grid, ki)):
+            spline = make_interp_spline(grid, np.moveaxis(coeffs, i, 0), k=k, axis=0)
+            coeffs = np.moveaxis(spline.c, 0, i)
+            bases.append(BSpline(spline.t, np.eye(grid.size), k))
+
+        self._coeffs[key] = coeffs, bases
+        return coeffs, bases
+
+    def _local_basis(self, basis, x, compute_gradients):
+        """
+        Evaluate the nonzero basis functions (and their derivatives) of one dimension.
+
+        Parameters
+        ----------
+        basis : <scipy.interpolate.BSpline>
+            Basis splines for this dimension, with identity coefficients.
+        x : ndarray
+            Coordinates in this dimension for all sample points.
+        compute_gradients : bool
+            Whether the derivatives of the basis functions should be computed.
+
+        Returns
+        -------
+        ndarray of int
+            Indices of the nonzero basis functions at each point.
+        ndarray
+            Values of the nonzero basis functions at each point.
+        ndarray or None
+            Derivatives of the nonzero basis functions at each point.
+        """
+        t = basis.t
+        k = basis.k
+        n = basis.c.shape[0]
+        span = np.clip(np.searchsorted(t, x, side='right') - 1, k, n - 1)[:, np.newaxis]
+        idx = span + np.arange(-k, 1)
+
+        # Cox-de Boor recursion for the k + 1 basis functions that are nonzero in each span,
+        # raising the degree one step at a time.
+        left = x[:, np.newaxis] - t[span + 1 - np.arange(k + 1)]
+        right = t[span + np.arange(k + 1)] - x[:, np.newaxis]
+        weights = np.zeros((x.size, k + 1))
+        weights[:, 0] = 1.
+        for j in range(1, k + 1):
+            if j == k:
+                prev = weights[:, :k].copy()
+            saved = 0.
+            for r in range(j):
+                temp = weights[:, r] / (right[:, r + 1] + left[:, j - r])
+                weights[:, r] = saved + right[:, r + 1] * temp
+                saved = left[:, j - r] * temp
+            weights[:, j] = saved
+
+        dweights = None
+        if compute_gradients:
+            # The derivatives follow from the nonzero basis functions of degree k - 1.
+            scaled = np.zeros((x.size, k + 2))
+            if k > 0:
+                r = np.arange(1, k + 1)
+                scaled[:, 1:-1] = prev / (t[span + r] - t[span + r - k])
+            dweights = k * (scaled[:, :-1] - scaled[:, 1:])
+
+        return idx, weights, dweights
+
+    def _evaluate_splines(self, xi, ki, compute_gradients=True):
+        """
+        Evaluate the tensor-product spline at all sample points at once.
 
         Parameters
         ----------
-        data_values : array_like
-            The data on the regular grid in n dimensions.
         xi : ndarray
             The coordinates to sample the gridded data at
-        indices : list
-            Indices for search lookup
-        interpolator : <scipy.interpolate.BSpline>
-            A BSpline object that is used for interpolation.
-        method : str, optional
-            The method of interpolation to perform. Supported are 'slinear', 'cubic', and
-            'quintic'. Default is None, which will use the method defined at the construction
-            of the interpolation object instance.
         ki : list
             List of spline interpolation orders.
         compute_gradients : bool, optional
             If a spline interpolation method is chosen, this determines whether gradient
-            calculations should be made and cached. Default is True.
+            calculations should be made. Default is True.
 
         Returns
         -------
         array_like
             Value of interpolant at all sample points.
+        ndarray or None
+            Gradient of the interpolant at all sample points.
         """
-        # for spline based methods
-
         # requires floating point input
         xi = xi.astype(np.float)
 
@@ -378,117 +573,78 @@ class _RegularGridInterp(object):
             xi = xi.reshape((1, xi.size))
         m, n = xi.shape
 
-        # create container arrays for output and gradients
-        result = np.empty(m)
-        if compute_gradients:
-            all_gradients = np.empty_like(xi)
-
-        # Non-stationary procedure: difficult to vectorize this part entirely
-        # into numpy-level operations. Unfortunately this requires explicit
-        # looping over each point in xi.
-
-        # can at least vectorize the first pass across all points in the
-        # last variable of xi. This provides one dimension of the entire
-        # gradient output array.
-        i = n - 1
-        first_values, first_derivs = self._do_spline_fit(interpolator,
-                                                         self.grid[i],
-                                                         data_values,
-                                                         xi[:, i],
-                                                         ki[i],
-                                                         compute_gradients)
-
-        # the rest of the dimensions have to be on a per point-in-xi basis
-        for j, x in enumerate(xi):
-            gradient = np.empty_like(x)
-            values = data_values[:]
-
-            # Main process: Apply 1D interpolate in each dimension
-            # sequentially, starting with the last dimension. These are then
-            # "folded" into the next dimension in-place.
-            for i in range(n - 1, 0, -1):
-                if i == n - 1:
-                    values = first_values[j]
-                    if compute_gradients:
-                        local_derivs = first_derivs[j]
-                else:
-                    # Interpolate and collect gradients for each 1D in this
-                    # last dimensions. This collapses each 1D sequence into a
-                    # scalar.
-                    values, local_derivs = self._do_spline_fit(interpolator,
-                                                               self.grid[i],
-                                                               values,
-                                                               x[i],
-                                                               ki[i],
-                                                               compute_gradients)
-
-                # Chain rule: to compute gradients of the output w.r.t. xi
-                # across the dimensions, apply interpolation to the collected
-                # gradients. This is equivalent to multiplication by
-                # dResults/dValues at each level.
-                if compute_gradients:
-                    gradient[i] = self._evaluate_splines(local_derivs,
-                                                         x[: i],
-                                                         indices,
-                                                         interpolator,
-                                                         method,
-                                                         ki,
-                                                         compute_gradients=False)
-
-            # All values have been folded down to a single dimensional array
-            # compute the final interpolated results, and gradient w.r.t. the
-            # first dimension
-            output_value, gradient[0] = self._do_spline_fit(interpolator,
-                                                            self.grid[0],
-                                                            values,
-                                                            x[0],
-                                                            ki[0],
-                                                            compute_gradients)
+        coeffs, bases = self._spline_coeffs(ki)
 
-            if compute_gradients:
-                all_gradients[j] = gradient
-            result[j] = output_value
+        # Gather the block of coefficients that supports each point, giving an array of
+        # shape (m, k0 + 1, ..., kn + 1, ...).
+        idx = []
+        weights = []
+        dweights = []
+        for i in range(n):
+            idx_i, w_i, dw_i = self._local_basis(bases[i], xi[:, i], compute_gradients)
+            shape = [m] + [1] * n
+            shape[i + 1] = idx_i.shape[1]
+            idx.append(idx_i.reshape(shape))
+            weights.append(w_i)
+            dweights.append(dw_i)
 
-        # Cache the computed gradients for return by the gradient method
+        block = coeffs[tuple(idx)]
+
+        result = self._contract(block, weights)
+
+        gradients = None
         if compute_gradients:
-            self._all_gradients = all_gradients
-            # indicate what method was used to compute these
-            self._gmethod = method
-        return result
+            gradients = np.empty((m, n))
+            for i in range(n):
+                w = list(weights)
+                w[i] = dweights[i]
+                gradients[:, i] = self._contract(block, w)
+
+        return result, gradients
 
-    def _do_spline_fit(self, interpolator, x, y, pt, k, compute_gradients):
+    def _contract(self, block, weights):
         """
-        Do a single interpolant call, and compute the gradient if needed.
+        Sum the coefficient block of each point against the product of the basis weights.
 
         Parameters
         ----------
-        interpolator : <scipy.interpolate.BSpline>
-            A BSpline object that is used for interpolation.
-        x : array_like, shape (n,)
-            Abscissas.
-        y : array_like, shape (n, ...)
-            Ordinates.
-        pt : array_like
-            Points to evaluate the spline at.
-        k : float
-            Spline interpolation order.
-        compute_gradients : bool
-            If a spline interpolation method is chosen, this determines whether gradient
-            calculations should be made and cached.
+        block : ndarray
+            Coefficients supporting each point, with shape (m, k0 + 1, ..., kn + 1, ...).
+        weights : list of ndarray
+            Basis weights in each dimension, each with shape (m, ki + 1).
 
         Returns
         -------
-        array_like
-            Value of interpolant at point of interest.
-        None or array_like, optional
-            Value of gradient of interpolant at point of interest.
+        ndarray
+            Weighted sums for all points.
         """
-        local_interp = interpolator(x, y, k=k, axis=0)
-        values = local_interp(pt)
-        local_derivs = None
-        if compute_gradients:
-            local_derivs = local_interp(pt, 1)
-        return values, local_derivs
+        for i in range(len(weights) - 1, -1, -1):
+            block = np.einsum('j...a,ja->j...', np.moveaxis(block, i + 1, -1), weights[i])
+        return block
+
+    def training_gradients(self, xi):
+        """
+        Return the derivatives of the interpolated values with respect to the data values.
+
+        Parameters
+        ----------
+        xi : ndarray of shape (m, ndim)
+            The coordinates to sample the gridded data at.
+
+        Returns
+        -------
+        ndarray of shape (m, m1, ..., mn)
+            Derivatives of the interpolant at each point with respect to each data value.
+        """
+        xi = np.atleast_2d(xi)
+        grads = np.ones(xi.shape[0])
+        for i, (grid, k) in enumerate(zip(self.grid, self._ki)):
+            key = (i, k)
+            if key not in self._cardinals:
+                self._cardinals[key] = make_interp_spline(grid, np.eye(grid.size), k=k, axis=0)
+            w = self._cardinals[key](xi[:, i])
+            grads = grads[..., np.newaxis] * w.reshape((w.shape[0],) + (1,) * i + w.shape[1:])
+        return grads
 
     def _find_indices(self, xi):
         """
@@ -598,6 +754,9 @@ class MetaModelStructuredComp(ExplicitComponent):
         Dictionary of training data each output.
     _ki : dict
         Dictionary of interpolation orders for each output.
+    _training_keys : dict
+        Keys identifying the files that training data was loaded from, for each variable
+        whose training data was given as a file name.
     """
 
     def __init__(self, **kwargs):
@@ -617,6 +776,7 @@ class MetaModelStructuredComp(ExplicitComponent):
         self.interps = {}
         self._ki = {}
         self.sh = ()
+        self._training_keys = {}
 
     def initialize(self):
         """
@@ -648,14 +808,20 @@ class MetaModelStructuredComp(ExplicitComponent):
             Name of the input.
         val : float or ndarray
             Initial value for the input.
-        training_data : ndarray
-            training data sample points for this input variable.
+        training_data : ndarray or str
+            training data sample points for this input variable. If a string is given, it is
+            the path to a .npy file, or to a .npz file containing an array named `name`, which
+            will be memory-mapped rather than read into memory.
         **kwargs : dict
             Additional agruments for add_input.
         """
         n = self.options['vec_size']
         super(MetaModelStructuredComp, self).add_input(name, val * np.ones(n), **kwargs)
 
+        training_data, key = _load_training_data(training_data, name)
+        if key is not None:
+            self._training_keys[name] = key
+
         self.pnames.append(name)
         self.params.append(np.asarray(training_data))
 
@@ -669,14 +835,21 @@ class MetaModelStructuredComp(ExplicitComponent):
             Name of the output.
         val : float or ndarray
             Initial value for the output.
-        training_data : ndarray
-            training data sample points for this output variable.
+        training_data : ndarray or str
+            training data sample points for this output variable. If a string is given, it is
+            the path to a .npy file, or to a .npz file containing an array named `name`, which
+            will be memory-mapped rather than read into memory. Components referencing the same
+            file share both the data and the spline coefficients fit to it.
         **kwargs : dict
             Additional agruments for add_output.
         """
         n = self.options['vec_size']
         super(MetaModelStructuredComp, self).add_output(name, val * np.ones(n), **kwargs)
 
+        training_data, key = _load_training_data(training_data, name)
+        if key is not None:
+            self._training_keys[name] = key
+
         self.training_outputs[name] = training_data
 
         if self.options['training_data_gradients']:
@@ -700,6 +873,15 @@ class MetaModelStructuredComp(ExplicitComponent):
                                                     fill_value=None,
                                                     spline_dim_error=False)
 
+            # share the spline coefficients with other components using the same data file
+            key = self._training_keys.get(name)
+            if key is not None and not self.options['training_data_gradients']:
+                key = (key, tuple(p.tobytes() for p in self.params))
+                coeffs = _coeff_cache.get(key)
+                if coeffs is None:
+                    coeffs = _coeff_cache[key] = _CoeffCache()
+                self.interps[name]._coeffs = coeffs
+
             self._ki = self.interps[name]._ki
 
         if self.options['training_data_gradients']:
@@ -781,19 +963,10 @@ class MetaModelStructuredComp(ExplicitComponent):
             sub-jac components written to partials[output_name, input_name]
         """
         pt = np.array([inputs[pname].flatten() for pname in self.pnames]).T
-        if self.options['training_data_gradients']:
-            dy_ddata = np.zeros(self.sh)
-            for j in range(self.options['vec_size']):
-                for i, axis in enumerate(self.params):
-                    e_i = np.eye(axis.size)
-                    interp = make_interp_spline(axis, e_i, k=self._ki[i], axis=0)
-                    if i == 0:
-                        val = interp(pt[j, i])
-                    else:
-                        val = np.outer(val, interp(pt[j, i]))
-                dy_ddata[j] = val.reshape(self.sh[1:])
-
         for out_name in self.interps:
+            if self.options['training_data_gradients']:
+                dy_ddata = self.interps[out_name].training_gradients(pt).reshape(self.sh)
+
             dval = self.interps[out_name].gradient(pt).T
             for i, p in enumerate(self.pnames):
                 partials[out_name, p] = dval[i]
@@ -1,7 +1,12 @@
 """MetaModel provides basic meta modeling capability."""
-from six.moves import range
+from six import string_types
+from six.moves import range, zip
+from six.moves import cPickle as pickle
 from copy import deepcopy
 from itertools import chain
+import hashlib
+import os
+import tempfile
 
 import numpy as np
 
@@ -69,6 +74,12 @@ class MetaModelUnStructuredComp(ExplicitComponent):
         self.options.declare('vec_size', types=int, default=1, lower=1,
                              desc='Number of points that will be simultaneously predicted by '
                                   'the surrogate.')
+        self.options.declare('training_cache', types=string_types, default=None,
+                             allow_none=True,
+                             desc='Directory in which trained surrogates are stored, keyed by a '
+                                  'hash of the surrogate and its training data, so that later '
+                                  'runs can load them instead of retraining. Only point this at '
+                                  'a trusted directory, since the cached files are pickles.')
 
     def add_input(self, name, val=1.0, training_data=None, **kwargs):
         """
@@ -277,6 +288,11 @@ class MetaModelUnStructuredComp(ExplicitComponent):
         for name, shape in self._surrogate_output_names:
             surrogate = self._metadata(name).get('surrogate')
 
+            if isinstance(shape, tuple):
+                output_shape = (vec_size, ) + shape
+            else:
+                output_shape = (vec_size, )
+
             if vec_size == 1:
                 # Non vectorized.
                 predicted = surrogate.predict(flat_inputs)
@@ -287,19 +303,14 @@ class MetaModelUnStructuredComp(ExplicitComponent):
 
             elif overrides_method('vectorized_predict', surrogate, SurrogateModel):
                 # Vectorized; surrogate provides vectorized computation.
-                # TODO: This code is untested because no surrogates provide this option.
-                predicted = surrogate.vectorized_predict(flat_inputs.flat)
+                predicted = surrogate.vectorized_predict(flat_inputs)
                 if isinstance(predicted, tuple):  # rmse option
                     self._metadata(name)['rmse'] = predicted[1]
                     predicted = predicted[0]
-                outputs[name] = np.reshape(predicted, shape)
+                outputs[name] = np.reshape(predicted, output_shape)
 
             else:
                 # Vectorized; must call surrogate multiple times.
-                if isinstance(shape, tuple):
-                    output_shape = (vec_size, ) + shape
-                else:
-                    output_shape = (vec_size, )
                 predicted = np.zeros(output_shape)
                 rmse = self._metadata(name)['rmse'] = []
                 for i in range(vec_size):
@@ -355,19 +366,17 @@ class MetaModelUnStructuredComp(ExplicitComponent):
             2d array, self._vectorize rows of flattened input data.
         """
         vec_size = self.options['vec_size']
-        array_real = True
 
-        arr = np.zeros((vec_size, self._input_size))
+        vals = [vec[name] for name, sz in self._surrogate_input_names]
+        if any(np.issubdtype(val.dtype, np.complexfloating) for val in vals):
+            arr = np.empty((vec_size, self._input_size), dtype=complex)
+        else:
+            arr = np.empty((vec_size, self._input_size))
 
-        for row in range(vec_size):
-            idx = 0
-            for name, sz in self._surrogate_input_names:
-                val = vec[name]
-                if array_real and np.issubdtype(val.dtype, np.complexfloating):
-                    array_real = False
-                    arr = arr.astype(np.complexfloating)
-                arr[row][idx:idx + sz] = val[row].flat
-                idx += sz
+        idx = 0
+        for val, (name, sz) in zip(vals, self._surrogate_input_names):
+            arr[:, idx:idx + sz] = val.reshape((vec_size, sz))
+            idx += sz
 
         return arr
 
@@ -391,7 +400,14 @@ class MetaModelUnStructuredComp(ExplicitComponent):
 
         for out_name, out_shape in self._surrogate_output_names:
             surrogate = self._metadata(out_name).get('surrogate')
-            if vec_size > 1:
+            if vec_size > 1 and overrides_method('vectorized_linearize', surrogate, SurrogateModel):
+                derivs = surrogate.vectorized_linearize(flat_inputs)
+                idx = 0
+                for in_name, sz in self._surrogate_input_names:
+                    partials[out_name, in_name] = derivs[:, :, idx:idx + sz].ravel()
+                    idx += sz
+
+            elif vec_size > 1:
                 out_size = np.prod(out_shape)
                 for j in range(vec_size):
                     flat_input = flat_inputs[j]
@@ -475,11 +491,70 @@ class MetaModelUnStructuredComp(ExplicitComponent):
                 raise RuntimeError("Metamodel '%s': No surrogate specified for output '%s'"
                                    % (self.pathname, name))
             else:
-                surrogate.train(self._training_input,
-                                self._training_output[name])
+                self._train_surrogate(surrogate, self._training_input,
+                                      self._training_output[name])
 
         self.train = False
 
+    def _train_surrogate(self, surrogate, x, y):
+        """
+        Train a surrogate, or load its trained state from the training cache.
+
+        Parameters
+        ----------
+        surrogate : <SurrogateModel>
+            Surrogate model to train.
+        x : ndarray
+            Training input locations.
+        y : ndarray
+            Model responses at given inputs.
+        """
+        cache_dir = self.options['training_cache']
+        if cache_dir is None:
+            surrogate.train(x, y)
+            return
+
+        # The key covers the surrogate class and its state before training, which holds its
+        # options, along with the training data.
+        h = hashlib.sha1()
+        cls = type(surrogate)
+        h.update(('%s.%s|' % (cls.__module__, cls.__name__)).encode('utf-8'))
+        h.update(pickle.dumps(surrogate.__dict__, 2))
+        for arr in (x, y):
+            h.update(str((arr.dtype.str, arr.shape)).encode('utf-8'))
+            h.update(np.ascontiguousarray(arr).tobytes())
+
+        fname = os.path.join(cache_dir, '%s_%s.pkl' % (cls.__name__, h.hexdigest()))
+
+        if os.path.isfile(fname):
+            try:
+                with open(fname, 'rb') as f:
+                    state = pickle.load(f)
+            except Exception:
+                # A damaged cache file just means we retrain and overwrite it.
+                pass
+            else:
+                surrogate.__dict__.update(state)
+                return
+
+        surrogate.train(x, y)
+
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+
+        # Write to a temporary file first so that concurrent runs never see a partial file.
+        fd, tmpname = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(surrogate.__dict__, f, pickle.HIGHEST_PROTOCOL)
+        try:
+            os.rename(tmpname, fname)
+        except OSError:
+            # Another process stored the same state first.
+            os.remove(tmpname)
+
     def _metadata(self, name):
         return self._var_rel2data_io[name]['metadata']
 
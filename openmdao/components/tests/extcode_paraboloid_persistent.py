@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+#
+# usage: extcode_paraboloid_persistent.py
+#
+# Evaluates the equation f(x,y) = (x-3)^2 + xy + (y+4)^2 - 3 for each message
+# received on stdin until stdin is closed.
+#
+# Each message is a header line '<code> <nbytes>' followed by a payload of
+# 'x y [delay]'. The reply payload is 'f_xy pid'. A payload of 'exit' makes
+# the process exit with a return code of 3, and a payload of 'hang' makes it
+# ignore SIGTERM and never reply.
+
+if __name__ == '__main__':
+    import os
+    import sys
+    import time
+
+    stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+    stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+
+    while True:
+        header = stdin.readline()
+        if not header:
+            break
+        code, size = [int(f) for f in header.split()]
+        payload = stdin.read(size).decode('utf-8')
+
+        if payload == 'exit':
+            sys.exit(3)
+
+        if payload == 'hang':
+            import signal
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            while True:
+                time.sleep(1.)
+
+        fields = [float(f) for f in payload.split()]
+        x, y = fields[:2]
+        if len(fields) > 2:
+            time.sleep(fields[2])
+
+        f_xy = (x-3.0)**2 + x*y + (y+4.0)**2 - 3.0
+
+        reply = ('%.16f %d' % (f_xy, os.getpid())).encode('utf-8')
+        stdout.write(('0 %d\n' % len(reply)).encode('ascii'))
+        stdout.write(reply)
+        stdout.flush()
@@ -378,6 +378,162 @@ class TestExecComp(unittest.TestCase):
 
         assert_rel_error(self, C1._outputs['y'], np.array([2.,1.]), 0.00001)
 
+    def test_compiled_matches_exec(self):
+        exprs = ['y[0]=x[1]', 'y[1]=2.*x[0]', 'z=sum(y)*w', 'v = w ** 2 + \\\n 1.']
+        prob = Problem(model=Group())
+        indeps = prob.model.add_subsystem('indeps', IndepVarComp('x', np.array([1., 2., 3.])))
+        indeps.add_output('w', 3.)
+        C1 = prob.model.add_subsystem('C1', ExecComp(exprs,
+                                                     x=np.array([1., 2., 3.]),
+                                                     y=np.array([0., 0.])))
+        prob.model.connect('indeps.x', 'C1.x')
+        prob.model.connect('indeps.w', 'C1.w')
+        prob.setup(check=False)
+        prob.run_model()
+
+        self.assertTrue(C1._compute_func is not None)
+        assert_rel_error(self, prob['C1.y'], np.array([2., 2.]), 1e-15)
+        assert_rel_error(self, prob['C1.z'], 12., 1e-15)
+        assert_rel_error(self, prob['C1.v'], 10., 1e-15)
+
+        J = prob.compute_totals(of=['C1.z', 'C1.v'], wrt=['indeps.x', 'indeps.w'])
+        assert_rel_error(self, J['C1.z', 'indeps.x'], np.array([[6., 3., 0.]]), 1e-10)
+        assert_rel_error(self, J['C1.v', 'indeps.w'], np.array([[6.]]), 1e-10)
+
+        # the exec fallback gives the same answers
+        C1._compute_func = None
+        C1._outputs.set_const(0.)
+        prob.run_model()
+        assert_rel_error(self, prob['C1.z'], 12., 1e-15)
+        assert_rel_error(self, prob['C1.v'], 10., 1e-15)
+
+    def test_compile_fallback(self):
+        prob = Problem(model=Group())
+        C1 = prob.model.add_subsystem('C1', ExecComp('y=2.*x; y=y+1.', x=2.))
+        prob.setup(check=False)
+        prob.run_model()
+
+        self.assertTrue(C1._compute_func is None)
+        assert_rel_error(self, prob['C1.y'], 5., 1e-15)
+
+    def test_diag_partials(self):
+        n = 50
+        prob = Problem(model=Group())
+        indeps = prob.model.add_subsystem('indeps', IndepVarComp('x', np.linspace(1., 2., n)))
+        indeps.add_output('a', 3.)
+        C1 = prob.model.add_subsystem('C1', ExecComp(['y=a*sin(x)**2', 'z=y+exp(x)/a'],
+                                                     x=np.ones(n), y=np.ones(n), z=np.ones(n)))
+        prob.model.connect('indeps.x', 'C1.x')
+        prob.model.connect('indeps.a', 'C1.a')
+        prob.setup(check=False)
+        prob.run_model()
+
+        self.assertEqual(C1._diag_size, n)
+        meta = C1._subjacs_info['C1.z', 'C1.x']
+        np.testing.assert_array_equal(meta['rows'], np.arange(n))
+        np.testing.assert_array_equal(meta['cols'], np.arange(n))
+        self.assertTrue(C1._subjacs_info['C1.z', 'C1.a']['rows'] is None)
+
+        # one complex step evaluation per input rather than one per entry
+        compute = C1.compute
+        count = [0]
+
+        def counted_compute(inputs, outputs):
+            count[0] += 1
+            compute(inputs, outputs)
+
+        C1.compute = counted_compute
+        J = prob.compute_totals(of=['C1.y', 'C1.z'], wrt=['indeps.x', 'indeps.a'])
+        self.assertEqual(count[0], 2)
+
+        x = np.linspace(1., 2., n)
+        dy_dx = 6. * np.sin(x) * np.cos(x)
+        assert_rel_error(self, J['C1.y', 'indeps.x'], np.diag(dy_dx), 1e-10)
+        assert_rel_error(self, J['C1.z', 'indeps.x'], np.diag(dy_dx + np.exp(x) / 3.), 1e-10)
+        assert_rel_error(self, J['C1.z', 'indeps.a'],
+                         (np.sin(x)**2 - np.exp(x) / 9.).reshape((n, 1)), 1e-10)
+
+    def test_diag_partials_option(self):
+        # dot isn't known to be elementwise, but the user can say the partials are diagonal
+        prob = Problem(model=Group())
+        C1 = prob.model.add_subsystem('C1', ExecComp('y=x*dot(w, w)', has_diag_partials=True,
+                                                     x=np.ones(3), y=np.ones(3), w=np.ones(3)))
+        C2 = prob.model.add_subsystem('C2', ExecComp('y=x*dot(w, w)',
+                                                     x=np.ones(3), y=np.ones(3), w=np.ones(3)))
+        prob.setup(check=False)
+        prob.run_model()
+
+        self.assertEqual(C1._diag_size, 3)
+        self.assertTrue(C2._diag_size is None)
+        self.assertTrue(C2._subjacs_info['C2.y', 'C2.x']['rows'] is None)
+
+    def test_diag_partials_bad_sizes(self):
+        prob = Problem(model=Group())
+        prob.model.add_subsystem('C1', ExecComp('y=x*sum(w)', has_diag_partials=True,
+                                                x=np.ones(3), y=np.ones(3), w=np.ones(2)))
+        with self.assertRaises(RuntimeError) as cm:
+            prob.setup(check=False)
+        self.assertEqual(str(cm.exception),
+                         "C1: has_diag_partials is True, but the array variables don't all "
+                         "have the same size: [('w', 2), ('x', 3), ('y', 3)].")
+
+    def test_symbolic_derivs(self):
+        n = 5
+        prob = Problem(model=Group())
+        indeps = prob.model.add_subsystem('indeps', IndepVarComp('x', np.linspace(.2, .8, n)),
+                                          promotes=['*'])
+        indeps.add_output('a', 1.7)
+        C1 = prob.model.add_subsystem('C1', ExecComp(['y=a*sin(x)**2/x + exp(-x)*a**x',
+                                                      'z=y*tanh(x) - maximum(x, .5)*abs(x-.4) + '
+                                                      'arctan(x)/log10(a+1) + power(x, 2.5)',
+                                                      'w=2.*a'],
+                                                     symbolic_derivs=True, x=np.ones(n),
+                                                     y=np.ones(n), z=np.ones(n), w=np.ones(n)),
+                                      promotes=['*'])
+        C2 = prob.model.add_subsystem('C2', ExecComp('v=3.*u**2 - u', symbolic_derivs=True))
+        prob.setup(check=False, force_alloc_complex=True)
+        prob.run_model()
+
+        # w doesn't depend on x, so that partial isn't declared
+        self.assertEqual(sorted(key for key in C1._subjacs_info if key[0] != key[1]),
+                         [('C1.w', 'C1.a'), ('C1.y', 'C1.a'), ('C1.y', 'C1.x'),
+                          ('C1.z', 'C1.a'), ('C1.z', 'C1.x')])
+        np.testing.assert_array_equal(C1._subjacs_info['C1.z', 'C1.x']['rows'], np.arange(n))
+
+        data = prob.check_partials(method='cs', out_stream=None)
+        for comp in ('C1', 'C2'):
+            for key, val in iteritems(data[comp]):
+                assert_rel_error(self, val['abs error'].forward, 0., 1e-12)
+
+    def test_symbolic_derivs_unsupported(self):
+        prob = Problem(model=Group())
+        prob.model.add_subsystem('C1', ExecComp('y=sum(x)', symbolic_derivs=True, x=np.ones(3)))
+        with self.assertRaises(RuntimeError) as cm:
+            prob.setup(check=False)
+        self.assertTrue(str(cm.exception).startswith(
+            "C1: symbolic derivatives are not supported for 'Call("), str(cm.exception))
+
+        # outputs can't be used before the expression that defines them
+        for exprs in (['z=y*2', 'y=x'], ['y=y+x']):
+            prob = Problem(model=Group())
+            prob.model.add_subsystem('C1', ExecComp(exprs, symbolic_derivs=True))
+            with self.assertRaises(RuntimeError) as cm:
+                prob.setup(check=False)
+            self.assertEqual(str(cm.exception), "C1: symbolic derivatives are not supported "
+                                                "for '%s'." % exprs[0])
+
+    def test_symbolic_derivs_abs(self):
+        # matches the complex step convention for abs, with a derivative of +1 at 0
+        prob = Problem(model=Group())
+        C1 = prob.model.add_subsystem('C1', ExecComp('y=2.0*abs(x)', symbolic_derivs=True,
+                                                     x=np.array([-3., 0., 2.]),
+                                                     y=np.zeros(3)))
+        prob.setup(check=False)
+        prob.run_model()
+
+        C1._linearize()
+        assert_rel_error(self, C1._jacobian['y', 'x'], [-2., 2., 2.], 1e-15)
+
     def test_simple_array_model(self):
         prob = Problem()
         prob.model = Group()
@@ -498,25 +654,23 @@ class TestExecComp(unittest.TestCase):
 
         assert_rel_error(self, C1._outputs['y'], np.ones(3)*4.0, 0.00001)
 
+        # elementwise expressions have diagonal partials, so the jacobian holds the diagonal.
         # any positive C1.x should give a 2.0 derivative for dy/dx
         C1._inputs['x'] = np.ones(3)*1.0e-10
         C1._linearize()
-        assert_rel_error(self, C1._jacobian['y','x'], np.eye(3)*2.0, 0.00001)
+        assert_rel_error(self, C1._jacobian['y','x'], np.ones(3)*2.0, 0.00001)
 
         C1._inputs['x'] = np.ones(3)*-3.0
         C1._linearize()
-        assert_rel_error(self, C1._jacobian['y','x'], np.eye(3)*-2.0, 0.00001)
+        assert_rel_error(self, C1._jacobian['y','x'], np.ones(3)*-2.0, 0.00001)
 
         C1._inputs['x'] = np.zeros(3)
         C1._linearize()
-        assert_rel_error(self, C1._jacobian['y','x'], np.eye(3)*2.0, 0.00001)
+        assert_rel_error(self, C1._jacobian['y','x'], np.ones(3)*2.0, 0.00001)
 
         C1._inputs['x'] = np.array([1.5, -0.6, 2.4])
         C1._linearize()
-        expect = np.zeros((3,3))
-        expect[0,0] = 2.0
-        expect[1,1] = -2.0
-        expect[2,2] = 2.0
+        expect = np.array([2.0, -2.0, 2.0])
 
         assert_rel_error(self, C1._jacobian['y','x'], expect, 0.00001)
 
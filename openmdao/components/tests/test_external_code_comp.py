@@ -5,6 +5,7 @@ import os
 import sys
 import shutil
 import tempfile
+import time
 import unittest
 
 from scipy.optimize import fsolve
@@ -388,6 +389,109 @@ class ParaboloidExternalCodeCompDerivs(ExternalCodeComp):
             partials['f_xy', 'y'] = float(derivs_file.readline())
 
 
+class ParaboloidPersistentComp(ExternalCodeComp):
+    def setup(self):
+        self.add_input('x', val=0.0)
+        self.add_input('y', val=0.0)
+        self.add_input('delay', val=0.0)
+
+        self.add_output('f_xy', val=0.0)
+
+        self.options['persistent'] = True
+        self.options['command'] = ['python', 'extcode_paraboloid_persistent.py']
+
+        self.pids = []
+
+    def compute(self, inputs, outputs):
+        self.request = '%.16f %.16f %.16f' % (inputs['x'], inputs['y'], inputs['delay'])
+
+        super(ParaboloidPersistentComp, self).compute(inputs, outputs)
+
+        f_xy, pid = self.reply.split()
+        outputs['f_xy'] = float(f_xy)
+        self.pids.append(int(pid))
+
+
+class TestExternalCodeCompPersistent(unittest.TestCase):
+
+    def setUp(self):
+        self.startdir = os.getcwd()
+        self.tempdir = tempfile.mkdtemp(prefix='test_extcode-')
+        os.chdir(self.tempdir)
+        shutil.copy(os.path.join(DIRECTORY, 'extcode_paraboloid_persistent.py'),
+                    os.path.join(self.tempdir, 'extcode_paraboloid_persistent.py'))
+
+        self.prob = Problem()
+        self.comp = self.prob.model.add_subsystem('p', ParaboloidPersistentComp(fail_hard=False))
+        self.prob.setup(check=False)
+
+    def tearDown(self):
+        self.prob.cleanup()
+        os.chdir(self.startdir)
+        try:
+            shutil.rmtree(self.tempdir)
+        except OSError:
+            pass
+
+    def test_reuse(self):
+        prob = self.prob
+
+        for x, y in [(3.0, -4.0), (1.0, 2.0), (-2.0, 0.5)]:
+            prob['p.x'] = x
+            prob['p.y'] = y
+            prob.run_model()
+            assert_rel_error(self, prob['p.f_xy'],
+                             (x - 3.0)**2 + x * y + (y + 4.0)**2 - 3.0, 1e-10)
+
+        self.assertEqual(len(set(self.comp.pids)), 1)
+        self.assertEqual(self.comp.return_code, 0)
+
+    def test_restart(self):
+        prob = self.prob
+        prob.run_model()
+
+        # a failed process is reported and restarted on the next evaluation.
+        self.comp.request = 'exit'
+        with self.assertRaises(AnalysisError) as cm:
+            self.comp._external_code_runner.run_component()
+        self.assertTrue('return_code = 3' in str(cm.exception), str(cm.exception))
+
+        prob.run_model()
+
+        # a timed out process is terminated and restarted on the next evaluation.
+        self.comp.options['timeout'] = 0.5
+        prob['p.delay'] = 30.
+        with self.assertRaises(AnalysisError) as cm:
+            prob.run_model()
+        self.assertEqual(str(cm.exception), 'Timed out after 0.5 sec.')
+
+        # leave plenty of time for the new process to start.
+        self.comp.options['timeout'] = 0.
+        prob['p.delay'] = 0.
+        prob.run_model()
+        assert_rel_error(self, prob['p.f_xy'], 22.0, 1e-10)
+
+        self.assertEqual(len(set(self.comp.pids)), 3)
+
+    @unittest.skipIf(sys.platform == 'win32', 'Requires POSIX signals.')
+    def test_timeout_ignores_terminate(self):
+        prob = self.prob
+        prob.run_model()
+
+        # a timed out process that ignores SIGTERM is killed, so the evaluation still ends.
+        self.comp.options['timeout'] = 0.5
+        self.comp.request = 'hang'
+        start = time.time()
+        with self.assertRaises(AnalysisError) as cm:
+            self.comp._external_code_runner.run_component()
+        self.assertEqual(str(cm.exception), 'Timed out after 0.5 sec.')
+        self.assertLess(time.time() - start, 10.)
+
+        self.comp.options['timeout'] = 0.
+        prob.run_model()
+        self.assertEqual(len(set(self.comp.pids)), 2)
+
+
 class TestExternalCodeCompFeature(unittest.TestCase):
 
     def setUp(self):
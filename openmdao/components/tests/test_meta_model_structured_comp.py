@@ -500,6 +500,36 @@ class TestRegularGridInterpolator(unittest.TestCase):
 
             assert_allclose(v1, v2)
 
+    def test_vectorized_matches_1d_fits(self):
+        # the precomputed tensor-product coefficients must reproduce sequential 1D spline fits
+        points, values = self._get_sample_4d_large()
+
+        np.random.seed(11)
+        sample = np.array([np.random.uniform(p[0], p[-1], 20) for p in points]).T
+
+        for method in self.valid_methods:
+            interp = _RegularGridInterp(points, values, method=method, spline_dim_error=False)
+            computed = interp(sample)
+            gradient = interp.gradient(sample)
+
+            for j, x in enumerate(sample):
+                vals = values
+                dvals = [values] * 4
+                for i in range(3, -1, -1):
+                    spline = make_interp_spline(points[i], np.moveaxis(vals, i, 0),
+                                                k=interp._ki[i], axis=0)
+                    vals = spline(x[i])
+                    for d in range(4):
+                        spline = make_interp_spline(points[i], np.moveaxis(dvals[d], i, 0),
+                                                    k=interp._ki[i], axis=0)
+                        dvals[d] = spline(x[i], 1 if d == i else 0)
+
+                assert_allclose(computed[j], vals, rtol=1e-10)
+                assert_allclose(gradient[j], dvals, rtol=1e-8, atol=1e-10)
+
+            # coefficients are only fit once per set of spline orders
+            self.assertEqual(list(interp._coeffs), [tuple(interp._ki)])
+
     def test_auto_reduce_spline_order(self):
         # if a spline method is used and spline_dim_error=False and a dimension
         # does not have enough points, the spline order for that dimension
@@ -1011,6 +1041,66 @@ class TestRegularGridMap(unittest.TestCase):
         assert_rel_error(self, prob['g'], val1, tol)
         self.run_and_check_derivs(prob)
 
+    def test_training_data_files(self):
+        import os
+        import shutil
+        import tempfile
+
+        mapdata = SampleMap()
+        params = mapdata.param_data
+        outs = mapdata.output_data
+
+        tempdir = tempfile.mkdtemp(prefix='test_mmsc-')
+        try:
+            np.save(os.path.join(tempdir, 'f.npy'), outs[0]['values'])
+            np.savez(os.path.join(tempdir, 'deck.npz'), g=outs[1]['values'],
+                     **dict((p['name'], p['values']) for p in params))
+
+            model = Group()
+            ivc = IndepVarComp()
+            ivc.add_output('x', np.array([-0.3, 0.7, 1.2]))
+            ivc.add_output('y', np.array([0.14, 0.313, 1.41]))
+            ivc.add_output('z', np.array([-2.11, -1.2, 2.01]))
+            model.add_subsystem('ivc', ivc, promotes=['*'])
+
+            for cname in ('comp', 'comp2', 'mem'):
+                comp = MetaModelStructuredComp(method='cubic', vec_size=3)
+                for param in params:
+                    data = param['values'] if cname == 'mem' else \
+                        os.path.join(tempdir, 'deck.npz')
+                    comp.add_input(param['name'], param['default'], data)
+                for out, fname in zip(outs, ('f.npy', 'deck.npz')):
+                    data = out['values'] if cname == 'mem' else os.path.join(tempdir, fname)
+                    comp.add_output(out['name'], out['default'], data)
+                model.add_subsystem(cname, comp)
+                model.connect('x', cname + '.x')
+                model.connect('y', cname + '.y')
+                model.connect('z', cname + '.z')
+
+            prob = Problem(model)
+            prob.setup()
+            prob.run_model()
+
+            comp, comp2 = model.comp, model.comp2
+            for name in ('f', 'g'):
+                self.assertIsInstance(comp.training_outputs[name], np.memmap)
+                self.assertIs(comp.training_outputs[name], comp2.training_outputs[name])
+                self.assertIs(comp.interps[name]._coeffs, comp2.interps[name]._coeffs)
+                self.assertIsNot(comp.interps[name]._coeffs, model.mem.interps[name]._coeffs)
+
+                assert_allclose(prob['comp.' + name], prob['mem.' + name], rtol=1e-12)
+                assert_allclose(prob['comp2.' + name], prob['mem.' + name], rtol=1e-12)
+
+            self.run_and_check_derivs(prob)
+
+            # release the memory maps so the files can be removed
+            del prob, model, comp, comp2
+        finally:
+            try:
+                shutil.rmtree(tempdir)
+            except OSError:
+                pass
+
     def run_and_check_derivs(self, prob, tol=1e-5, verbose=False):
         """Runs check_partials and compares to analytic derivatives."""
 
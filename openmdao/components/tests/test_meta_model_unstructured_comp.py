@@ -1,11 +1,15 @@
 """
 Unit tests for the unstructured metamodel component.
 """
-import numpy as np
+import os
+import shutil
+import tempfile
 import unittest
 
+import numpy as np
+
 from openmdao.api import Group, Problem, MetaModelUnStructuredComp, IndepVarComp, ResponseSurface, \
-    FloatKrigingSurrogate, KrigingSurrogate, ScipyOptimizeDriver
+    FloatKrigingSurrogate, KrigingSurrogate, ScipyOptimizeDriver, NearestNeighbor
 from openmdao.utils.assert_utils import assert_rel_error
 
 from openmdao.utils.logger_utils import TestLogger
@@ -550,6 +554,52 @@ class MetaModelTestCase(unittest.TestCase):
                          1e-4)
         self.assertEqual(len(prob.model.trig._metadata('y')['rmse']), 3)
 
+    def test_vectorized_surrogates(self):
+        # surrogates with vectorized_predict/vectorized_linearize must match point by point
+        vec_size = 6
+        np.random.seed(11)
+        x_train = np.random.uniform(0., 3., (40, 3))
+        y_train = np.column_stack([np.sin(x_train[:, 0]) * x_train[:, 1] + x_train[:, 2],
+                                   x_train[:, 0] * x_train[:, 2] ** 2])
+
+        surrogates = [KrigingSurrogate(), FloatKrigingSurrogate(), ResponseSurface(),
+                      NearestNeighbor(interpolant_type='linear'),
+                      NearestNeighbor(interpolant_type='weighted'),
+                      NearestNeighbor(interpolant_type='rbf', num_neighbors=10)]
+
+        for surrogate in surrogates:
+            mm = MetaModelUnStructuredComp(vec_size=vec_size, default_surrogate=surrogate)
+            mm.add_input('x', np.zeros(vec_size))
+            mm.add_input('z', np.zeros((vec_size, 2)))
+            mm.add_output('y', np.zeros((vec_size, 2)))
+
+            prob = Problem()
+            prob.model.add_subsystem('mm', mm)
+            prob.setup(check=False)
+
+            mm.options['train:x'] = x_train[:, 0]
+            mm.options['train:z'] = x_train[:, 1:]
+            mm.options['train:y'] = y_train
+
+            pts = np.random.uniform(0.5, 2.5, (vec_size, 3))
+            prob['mm.x'] = pts[:, 0]
+            prob['mm.z'] = pts[:, 1:]
+            prob.run_model()
+
+            sur = mm._metadata('y')['surrogate']
+            for i, pt in enumerate(pts):
+                expected = sur.predict(pt.copy())
+                if isinstance(expected, tuple):
+                    expected = expected[0]
+                assert_rel_error(self, prob['mm.y'][i], np.ravel(expected), 1e-10)
+
+                jac = np.reshape(sur.linearize(pt.copy()), (2, 3))
+                assert_rel_error(self, sur.vectorized_linearize(pts)[i], jac, 1e-10)
+
+            data = prob.check_partials(out_stream=None)
+            for key in [('y', 'x'), ('y', 'z')]:
+                assert_rel_error(self, data['mm'][key]['J_fwd'], data['mm'][key]['J_fd'], 1e-4)
+
     def test_derivatives_vectorized_multiD(self):
         vec_size = 5
 
@@ -739,6 +789,46 @@ class MetaModelTestCase(unittest.TestCase):
         self.assertEqual(prob['trig.x'], [5.])
         assert_rel_error(self, prob['trig.sin_x'], [.0], 1e-6)
 
+    def test_training_cache(self):
+        train_calls = []
+
+        class CountingKriging(KrigingSurrogate):
+            def train(self, x, y):
+                train_calls.append(1)
+                super(CountingKriging, self).train(x, y)
+
+        cache_dir = os.path.join(tempfile.mkdtemp(), 'surrogates')
+        try:
+            def run(nugget):
+                mm = MetaModelUnStructuredComp(training_cache=cache_dir)
+                mm.add_input('x', 0., training_data=np.linspace(0., 5., 12))
+                mm.add_output('y', 0., training_data=np.sin(np.linspace(0., 5., 12)),
+                              surrogate=CountingKriging(nugget=nugget))
+
+                prob = Problem()
+                prob.model.add_subsystem('p', IndepVarComp('x', 2.2))
+                prob.model.add_subsystem('mm', mm)
+                prob.model.connect('p.x', 'mm.x')
+                prob.setup(check=False)
+                prob.run_model()
+                prob.compute_totals(of=['mm.y'], wrt=['p.x'])
+                return prob['mm.y']
+
+            y = run(1e-12)
+            self.assertEqual(len(train_calls), 1)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # A fresh surrogate with the same options and data is loaded from the cache.
+            assert_rel_error(self, run(1e-12), y, 1e-15)
+            self.assertEqual(len(train_calls), 1)
+
+            # Different options need a new training.
+            run(1e-10)
+            self.assertEqual(len(train_calls), 2)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+        finally:
+            shutil.rmtree(os.path.dirname(cache_dir))
+
     def test_meta_model_unstructured_deprecated(self):
         # run same test as above, only with the deprecated component,
         # to ensure we get the warning and the correct answer.
@@ -84,6 +84,9 @@ class Component(System):
         Cached storage of user-declared approximations.
     _declared_partial_checks : list
         Cached storage of user-declared check partial options.
+    _linearize_cache : tuple of (ndarray, ndarray) or None
+        Copies of the input and output data at the last linearization, used to skip
+        recomputing partials when the 'skip_unchanged_linearize' option is set.
     """
 
     def __init__(self, **kwargs):
@@ -113,6 +116,28 @@ class Component(System):
         self._approximated_partials = []
         self._declared_partial_checks = []
 
+        self._linearize_cache = None
+
+    def _declare_builtin_options(self):
+        """
+        Declare options that every component needs, before kwargs are processed.
+        """
+        self.options.declare('skip_unchanged_linearize', types=bool, default=False,
+                             desc='If True, partials are only recomputed during linearization '
+                                  'if the inputs or outputs of this component have changed '
+                                  'since the last linearization. Only use this if the partials '
+                                  'depend on nothing but the inputs and outputs.')
+        self.options.declare('multi_column_safe', types=bool, default=False,
+                             desc='If True, compute (or apply_nonlinear) also works when every '
+                                  'input and output value has an extra trailing dimension '
+                                  'holding multiple columns, so complex step can evaluate '
+                                  'several perturbations in a single call.')
+        self.options.declare('cs_batch_size', types=int, default=None, allow_none=True,
+                             lower=1,
+                             desc='Maximum number of complex step perturbations evaluated in a '
+                                  'single call when multi_column_safe is True. If None, all '
+                                  'perturbations of a variable are evaluated at once.')
+
     def setup(self):
         """
         Declare inputs and outputs.
@@ -285,6 +310,7 @@ class Component(System):
         """
         self._subjacs_info = {}
         self._jacobian = DictionaryJacobian(system=self)
+        self._linearize_cache = None
 
         for of, wrt, dependent, rows, cols, val in self._declared_partials:
             self._declare_partials(of, wrt, dependent=dependent, rows=rows, cols=cols, val=val)
@@ -292,6 +318,32 @@ class Component(System):
         for of, wrt, method, kwargs in self._approximated_partials:
             self._approx_partials(of, wrt, method=method, **kwargs)
 
+    def _linearization_unchanged(self):
+        """
+        Return True if the last linearization of this component is still valid.
+
+        This is only the case when the 'skip_unchanged_linearize' option is set and the
+        inputs and outputs are identical to those at the last linearization.
+
+        Returns
+        -------
+        bool
+            True if recomputing the partials can be skipped.
+        """
+        if not self.options['skip_unchanged_linearize'] or self._inputs._under_complex_step:
+            return False
+
+        cache = self._linearize_cache
+        return (cache is not None and np.array_equal(cache[0], self._inputs._data) and
+                np.array_equal(cache[1], self._outputs._data))
+
+    def _save_linearization_point(self):
+        """
+        Store the current inputs and outputs if the 'skip_unchanged_linearize' option is set.
+        """
+        if self.options['skip_unchanged_linearize'] and not self._inputs._under_complex_step:
+            self._linearize_cache = (self._inputs._data.copy(), self._outputs._data.copy())
+
     def add_input(self, name, val=1.0, shape=None, src_indices=None, flat_src_indices=None,
                   units=None, desc=''):
         """
@@ -602,7 +654,8 @@ class Component(System):
                 info[abs_key] = meta
 
     def declare_partials(self, of, wrt, dependent=True, rows=None, cols=None, val=None,
-                         method='exact', step=None, form=None, step_calc=None):
+                         method='exact', step=None, form=None, step_calc=None, parallel=None,
+                         num_procs=None):
         """
         Declare information about this component's subjacobians.
 
@@ -645,6 +698,16 @@ class Component(System):
             Step type for finite difference, can be 'abs' for absolute', or 'rel' for
             relative. Defaults to None, in which case the approximation method provides
             its default value.
+        parallel : str or None
+            Set to 'processes' to run the finite difference points in a pool of worker
+            processes forked from this one, each holding a copy of the component. The workers
+            are forked again each time the partials are computed, and any changes they make to
+            the component, besides its outputs, are lost. The component must be safe to
+            evaluate concurrently, e.g., an external code must not share files between runs.
+            Not supported under MPI. Defaults to None, in which case the points are run serially.
+        num_procs : int or None
+            Number of worker processes used when parallel='processes'. Defaults to None, in
+            which case the number of cpus is used.
         """
         try:
             method_func, default_opts = _supported_methods[method]
@@ -667,11 +730,12 @@ class Component(System):
             if method not in self._approx_schemes:
                 self._approx_schemes[method] = method_func()
 
-            # If rows/cols is specified
-            if rows is not None or cols is not None:
-                raise ValueError('Sparse FD specification not supported yet.')
+            # If only one of rows/cols is specified
+            if (rows is None) ^ (cols is None):
+                raise ValueError('If one of rows/cols is specified, then both must be specified')
 
-            # Need to declare the Jacobian element too.
+            # Need to declare the Jacobian element too. Declared rows/cols are used to color
+            # the approximation so that independent columns are perturbed together.
             self._declared_partials.append((of, wrt, True, rows, cols, val))
 
             kwargs = {}
@@ -690,6 +754,16 @@ class Component(System):
                     kwargs['step_calc'] = step_calc
                 else:
                     raise RuntimeError("'step_calc' is not a valid option for '%s'" % method)
+            if parallel:
+                if 'parallel' in default_opts:
+                    kwargs['parallel'] = parallel
+                else:
+                    raise RuntimeError("'parallel' is not a valid option for '%s'" % method)
+            if num_procs:
+                if 'num_procs' in default_opts:
+                    kwargs['num_procs'] = num_procs
+                else:
+                    raise RuntimeError("'num_procs' is not a valid option for '%s'" % method)
 
             self._approximated_partials.append((of, wrt, method, kwargs))
 
@@ -723,7 +723,9 @@ class Driver(object):
         return_format : string
             Format to return the derivatives. Default is a 'flat_dict', which
             returns them in a dictionary whose keys are tuples of form (of, wrt). For
-            the scipy optimizer, 'array' is also supported.
+            the scipy optimizer, 'array' is also supported. The 'coo' and 'csr' formats return
+            a scipy sparse matrix holding only the nonzeros given by the total jacobian
+            sparsity or coloring.
         global_names : bool
             Set to True when passing in global names to skip some translation steps.
 
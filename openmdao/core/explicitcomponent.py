@@ -353,6 +353,9 @@ class ExplicitComponent(Component):
         if not self._has_compute_partials and not self._approx_schemes:
             return
 
+        if self._linearization_unchanged():
+            return
+
         with self._unscaled_context(outputs=[self._outputs], residuals=[self._residuals]):
             # Computing the approximation before the call to compute_partials allows users to
             # override FD'd values.
@@ -368,6 +371,8 @@ class ExplicitComponent(Component):
                 finally:
                     self._inputs.read_only = False
 
+        self._save_linearization_point()
+
     def compute(self, inputs, outputs):
         """
         Compute outputs given inputs. The model is assumed to be in an unscaled state.
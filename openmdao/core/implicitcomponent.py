@@ -292,18 +292,21 @@ class ImplicitComponent(Component):
         sub_do_ln : boolean
             Flag indicating if the children should call linearize on their linear solvers.
         """
-        with self._unscaled_context(outputs=[self._outputs]):
-            # Computing the approximation before the call to compute_partials allows users to
-            # override FD'd values.
-            for approximation in itervalues(self._approx_schemes):
-                approximation.compute_approximations(self, jac=self._jacobian)
-
-            self._inputs.read_only = self._outputs.read_only = True
-
-            try:
-                self.linearize(self._inputs, self._outputs, self._jacobian)
-            finally:
-                self._inputs.read_only = self._outputs.read_only = False
+        if not self._linearization_unchanged():
+            with self._unscaled_context(outputs=[self._outputs]):
+                # Computing the approximation before the call to compute_partials allows users to
+                # override FD'd values.
+                for approximation in itervalues(self._approx_schemes):
+                    approximation.compute_approximations(self, jac=self._jacobian)
+
+                self._inputs.read_only = self._outputs.read_only = True
+
+                try:
+                    self.linearize(self._inputs, self._outputs, self._jacobian)
+                finally:
+                    self._inputs.read_only = self._outputs.read_only = False
+
+            self._save_linearization_point()
 
         if (jac is None or jac is self._assembled_jac) and self._assembled_jac is not None:
             self._assembled_jac._update(self)
@@ -1357,9 +1357,11 @@ class Problem(object):
             Variables with respect to which the derivatives will be computed.
             Default is None, which uses the driver's desvars.
         return_format : string
-            Format to return the derivatives. Can be either 'dict' or 'flat_dict'.
-            Default is a 'flat_dict', which returns them in a dictionary whose keys are
-            tuples of form (of, wrt).
+            Format to return the derivatives. Can be 'dict', 'flat_dict', 'array', 'coo' or
+            'csr'. Default is a 'flat_dict', which returns them in a dictionary whose keys are
+            tuples of form (of, wrt). The 'coo' and 'csr' formats return a scipy sparse matrix
+            that only stores the nonzeros given by the driver's total jacobian sparsity or
+            simultaneous derivative coloring, if either is available.
         debug_print : bool
             Set to True to print out some debug information during linear solve.
         driver_scaling : bool
@@ -144,6 +144,9 @@ class System(object):
         A mapping of approximation types to the associated ApproximationScheme.
     _jacobian : <Jacobian>
         <Jacobian> object to be used in apply_linear.
+    _owns_approx_coloring : list or None
+        Column coloring of the total jacobian set when calculating approximated totals, so that
+        the approximation objects can perturb independent design variables at the same time.
     _owns_approx_jac : bool
         If True, this system approximated its Jacobian
     _owns_approx_jac_meta : dict
@@ -321,6 +324,7 @@ class System(object):
         self._owns_approx_of = None
         self._owns_approx_wrt_idx = {}
         self._owns_approx_of_idx = {}
+        self._owns_approx_coloring = None
 
         self.under_complex_step = False
         self.force_alloc_complex = False
@@ -344,6 +348,7 @@ class System(object):
 
         self._scope_cache = {}
 
+        self._declare_builtin_options()
         self._declare_options()
         self.initialize()
         self.options.update(kwargs)
@@ -359,6 +364,15 @@ class System(object):
 
         self._assembled_jac = None
 
+    def _declare_builtin_options(self):
+        """
+        Declare options that every instance of a framework class needs.
+
+        Unlike `_declare_options`, this is always called, so subclasses that override
+        `_declare_options` without calling the base version still get these options.
+        """
+        pass
+
     def _declare_options(self):
         """
         Declare options before kwargs are processed in the init method.
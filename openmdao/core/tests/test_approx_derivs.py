@@ -1,4 +1,5 @@
 """ Testing for group finite differencing."""
+import os
 from six.moves import range
 import unittest
 import itertools
@@ -7,8 +8,10 @@ from parameterized import parameterized
 import numpy as np
 
 from openmdao.api import Problem, Group, IndepVarComp, ScipyKrylov, ExecComp, NewtonSolver, \
-    ExplicitComponent, DefaultVector, NonlinearBlockGS, LinearRunOnce, DirectSolver
+    ExplicitComponent, DefaultVector, NonlinearBlockGS, LinearRunOnce, DirectSolver, \
+    ImplicitComponent, ScipyOptimizeDriver
 from openmdao.utils.assert_utils import assert_rel_error
+from openmdao.utils.coloring import get_simul_meta
 from openmdao.utils.mpi import MPI
 from openmdao.test_suite.components.impl_comp_array import TestImplCompArray, TestImplCompArrayDense
 from openmdao.test_suite.components.paraboloid import Paraboloid
@@ -1356,6 +1359,383 @@ class TestComponentComplexStep(unittest.TestCase):
         prob.compute_totals(of=['comp.y'], wrt=['px.x'])
 
 
+class SparseApproxComp(ExplicitComponent):
+    """
+    Vectorized component with banded partials that are approximated using declared sparsity.
+    """
+
+    def initialize(self):
+        self.options.declare('method', default='fd')
+        self.options.declare('size', default=8)
+
+    def setup(self):
+        n = self.options['size']
+        method = self.options['method']
+
+        self.add_input('a', val=2.0)
+        self.add_input('x', val=np.ones(n))
+        self.add_output('y1', val=np.ones(n))
+        self.add_output('y2', val=np.ones(n - 1))
+
+        ar = np.arange(n)
+        self.declare_partials('y1', 'x', rows=ar, cols=ar, method=method)
+        self.declare_partials('y2', 'x', rows=np.repeat(ar[:-1], 2),
+                              cols=np.column_stack([ar[:-1], ar[1:]]).ravel(), method=method)
+        self.declare_partials('y1', 'a', method=method)
+
+        self.count = 0
+
+    def compute(self, inputs, outputs):
+        a = inputs['a']
+        x = inputs['x']
+        outputs['y1'] = a * x ** 2
+        outputs['y2'] = x[:-1] * x[1:]
+        self.count += 1
+
+
+class TestComponentSparseApprox(unittest.TestCase):
+
+    def _run(self, method):
+        n = 8
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem('px', IndepVarComp('x', val=np.arange(1, n + 1, dtype=float)))
+        model.add_subsystem('pa', IndepVarComp('a', val=2.0))
+        comp = model.add_subsystem('comp', SparseApproxComp(method=method, size=n))
+        model.connect('px.x', 'comp.x')
+        model.connect('pa.a', 'comp.a')
+
+        prob.setup(check=False, force_alloc_complex=True)
+        prob.run_model()
+
+        comp.count = 0
+        J = prob.compute_totals(of=['comp.y1', 'comp.y2'], wrt=['px.x', 'pa.a'])
+
+        x = prob['px.x']
+        assert_rel_error(self, J['comp.y1', 'px.x'], np.diag(4. * x), 1e-5)
+        expected = np.zeros((n - 1, n))
+        expected[np.arange(n - 1), np.arange(n - 1)] = x[1:]
+        expected[np.arange(n - 1), np.arange(1, n)] = x[:-1]
+        assert_rel_error(self, J['comp.y2', 'px.x'], expected, 1e-5)
+        assert_rel_error(self, J['comp.y1', 'pa.a'], (x ** 2).reshape((n, 1)), 1e-5)
+
+        return comp
+
+    def test_sparse_fd(self):
+        comp = self._run('fd')
+
+        # the banded x columns need only 2 colors, plus 1 step for the dense 'a' column
+        self.assertEqual(comp.count, 3)
+
+    def test_sparse_cs(self):
+        comp = self._run('cs')
+        self.assertEqual(comp.count, 3)
+
+
+class MultiColumnComp(ExplicitComponent):
+
+    def setup(self):
+        self.add_input('a', val=2.0)
+        self.add_input('x', val=np.ones(5))
+        self.add_output('y', val=np.ones(5))
+        self.add_output('z', val=1.0)
+        self.declare_partials('*', '*', method='cs')
+        self.count = 0
+
+    def compute(self, inputs, outputs):
+        a = inputs['a']
+        x = inputs['x']
+        outputs['y'] = a * np.sin(x)
+        # sum over the variable's axis only, so that extra columns are preserved
+        outputs['z'] = a * np.sum(x ** 2, axis=0)
+        self.count += 1
+
+
+class MultiColumnImplComp(ImplicitComponent):
+
+    def setup(self):
+        self.add_input('b', val=np.ones(4))
+        self.add_output('x', val=np.ones(4))
+        self.declare_partials('x', ['b', 'x'], method='cs')
+        self.count = 0
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        residuals['x'] = outputs['x'] ** 3 + np.cumsum(outputs['x'], axis=0) - inputs['b']
+        self.count += 1
+
+
+class TestBatchedComplexStep(unittest.TestCase):
+
+    def _explicit(self, **options):
+        prob = Problem()
+        prob.model.add_subsystem('px', IndepVarComp('x', val=np.linspace(.1, .9, 5)))
+        comp = prob.model.add_subsystem('comp', MultiColumnComp(**options))
+        prob.model.connect('px.x', 'comp.x')
+        prob.setup(check=False, force_alloc_complex=True)
+        prob.run_model()
+
+        comp.count = 0
+        J = prob.compute_totals(of=['comp.y', 'comp.z'], wrt=['px.x'])
+
+        x = np.linspace(.1, .9, 5)
+        assert_rel_error(self, J['comp.y', 'px.x'], np.diag(2. * np.cos(x)), 1e-12)
+        assert_rel_error(self, J['comp.z', 'px.x'], 4. * x.reshape((1, 5)), 1e-12)
+
+        return comp
+
+    def test_explicit(self):
+        # one column per input entry
+        self.assertEqual(self._explicit().count, 6)
+
+        # all columns of each input in one call
+        self.assertEqual(self._explicit(multi_column_safe=True).count, 2)
+
+        # at most 2 columns per call, so 3 calls for x and 1 for a
+        self.assertEqual(self._explicit(multi_column_safe=True, cs_batch_size=2).count, 4)
+
+    def test_implicit(self):
+        for multi_column_safe in (False, True):
+            prob = Problem()
+            prob.model.add_subsystem('pb', IndepVarComp('b', val=np.arange(1., 5.)))
+            comp = prob.model.add_subsystem('comp',
+                                            MultiColumnImplComp(multi_column_safe=multi_column_safe))
+            prob.model.connect('pb.b', 'comp.b')
+            prob.setup(check=False, force_alloc_complex=True)
+            prob.run_model()
+
+            comp.count = 0
+            prob.model.run_linearize()
+
+            x = prob['comp.x']
+            J = comp._jacobian
+            assert_rel_error(self, J['x', 'x'], np.diag(3. * x ** 2) + np.tril(np.ones((4, 4))),
+                             1e-12)
+            assert_rel_error(self, J['x', 'b'], -np.eye(4), 1e-12)
+
+            self.assertEqual(comp.count, 2 if multi_column_safe else 8)
+
+    def test_declare_options_override(self):
+        # the options are available even if _declare_options doesn't call the base version
+        class OptionsComp(MultiColumnComp):
+            def _declare_options(self):
+                self.options.declare('units', default='m')
+
+        prob = Problem()
+        prob.model.add_subsystem('px', IndepVarComp('x', val=np.linspace(.1, .9, 5)))
+        comp = prob.model.add_subsystem('comp', OptionsComp(multi_column_safe=True))
+        prob.model.connect('px.x', 'comp.x')
+        prob.setup(check=False, force_alloc_complex=True)
+        prob.run_model()
+
+        comp.count = 0
+        J = prob.compute_totals(of=['comp.y'], wrt=['px.x'])
+        assert_rel_error(self, J['comp.y', 'px.x'], np.diag(2. * np.cos(np.linspace(.1, .9, 5))),
+                         1e-12)
+        self.assertEqual(comp.count, 2)
+
+
+class ParallelFDComp(ExplicitComponent):
+
+    def initialize(self):
+        self.options.declare('parallel', default=None, allow_none=True)
+
+    def setup(self):
+        self.add_input('x', val=np.ones(6))
+        self.add_output('y', val=np.ones(3))
+        self.add_output('z', val=1.0)
+        self.declare_partials('*', 'x', method='fd', form='central',
+                              parallel=self.options['parallel'], num_procs=3)
+        self.count = 0
+        self.scale = 1.
+
+    def compute(self, inputs, outputs):
+        x = inputs['x']
+        outputs['y'] = np.sin(x[:3]) * x[3:]
+        outputs['z'] = self.scale * np.sum(x ** 2)
+        self.count += 1
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "parallel FD requires os.fork")
+class TestParallelFD(unittest.TestCase):
+
+    def _run(self, parallel):
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem('px', IndepVarComp('x', val=np.arange(1., 7.)))
+        comp = model.add_subsystem('comp', ParallelFDComp(parallel=parallel))
+        model.connect('px.x', 'comp.x')
+
+        prob.setup(check=False)
+        prob.run_model()
+
+        comp.count = 0
+        J = prob.compute_totals(of=['comp.y', 'comp.z'], wrt=['px.x'])
+        return prob, comp, J
+
+    def test_parallel_processes(self):
+        _, serial_comp, J_serial = self._run(None)
+        prob, comp, J = self._run('processes')
+
+        # all 12 points were run in the workers instead of in this process
+        self.assertEqual(serial_comp.count, 12)
+        self.assertEqual(comp.count, 0)
+
+        for key in J_serial:
+            assert_rel_error(self, J[key], J_serial[key], 1e-12)
+
+        # the workers see the current point, not the one they were forked at
+        prob['px.x'] = np.arange(2., 8.)
+        prob.run_model()
+        J = prob.compute_totals(of=['comp.y', 'comp.z'], wrt=['px.x'])
+        assert_rel_error(self, J['comp.z', 'px.x'], 2. * np.arange(2., 8.).reshape((1, 6)), 1e-8)
+
+        # nor the component state they were forked with
+        comp.scale = 3.
+        J = prob.compute_totals(of=['comp.y', 'comp.z'], wrt=['px.x'])
+        assert_rel_error(self, J['comp.z', 'px.x'], 6. * np.arange(2., 8.).reshape((1, 6)), 1e-8)
+
+        comp._approx_schemes['fd']._close_pool()
+
+    def test_parallel_processes_under_mpi(self):
+        from openmdao.approximation_schemes import finite_difference
+
+        old_mpi = finite_difference.MPI
+        finite_difference.MPI = True
+        try:
+            with self.assertRaises(RuntimeError) as cm:
+                self._run('processes')
+        finally:
+            finite_difference.MPI = old_mpi
+
+        self.assertEqual(str(cm.exception),
+                         "comp: parallel='processes' finite difference is not supported under MPI.")
+
+    def test_bad_parallel(self):
+        prob = Problem()
+        prob.model.add_subsystem('comp', ParallelFDComp(parallel='threads'))
+        prob.setup(check=False)
+        with self.assertRaises(ValueError) as cm:
+            prob.final_setup()
+        self.assertEqual(str(cm.exception),
+                         "'threads' is not a valid parallel mode for finite difference; "
+                         "must be one of [None, 'processes']")
+
+
+class CountedDiagComp(ExplicitComponent):
+
+    def setup(self):
+        self.add_input('x', val=np.ones(6))
+        self.add_input('z', val=1.0)
+        self.add_output('y', val=np.ones(6))
+        self.add_output('obj', val=1.0)
+        self.count = 0
+
+    def compute(self, inputs, outputs):
+        outputs['y'] = inputs['x'] ** 3
+        outputs['obj'] = inputs['z'] ** 2 + 3. * inputs['x'][0]
+        self.count += 1
+
+
+class TestColoredApproxTotals(unittest.TestCase):
+
+    def _build(self, form, step_calc):
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem('px', IndepVarComp('x', val=np.arange(1., 7.)))
+        model.add_subsystem('pz', IndepVarComp('z', val=2.0))
+        comp = model.add_subsystem('comp', CountedDiagComp())
+        model.connect('px.x', 'comp.x')
+        model.connect('pz.z', 'comp.z')
+
+        model.add_design_var('px.x', indices=[0, 2, 3, 5])
+        model.add_design_var('pz.z')
+        model.add_objective('comp.obj')
+        model.add_constraint('comp.y', lower=0., indices=[1, 2, 3, 4, 5])
+
+        model.approx_totals(method='fd', form=form, step_calc=step_calc)
+
+        prob.driver = ScipyOptimizeDriver(optimizer='SLSQP')
+        prob.setup(check=False)
+        prob.run_model()
+        return prob, comp
+
+    def _check(self, form, step_calc, count):
+        prob, comp = self._build(form, step_calc)
+        comp.count = 0
+        J_dense = prob.driver._compute_totals(return_format='array')
+        self.assertEqual(comp.count, 5 * count)
+
+        coloring = get_simul_meta(prob, stream=None)
+        prob.driver.set_simul_deriv_color(coloring)
+        prob.driver._setup_simul_coloring()
+
+        comp.count = 0
+        J = prob.driver._compute_totals(return_format='array')
+
+        # x[2], x[3], x[5] and z are perturbed together, and x[0] by itself since it affects
+        # the objective.
+        self.assertEqual(comp.count, 2 * count)
+        assert_rel_error(self, J, J_dense, 1e-9)
+
+        x = np.arange(1., 7.)
+        expected = np.zeros((6, 5))
+        expected[0, 0] = 3.
+        expected[0, 4] = 4.
+        expected[[2, 3, 5], [1, 2, 3]] = 3. * x[[2, 3, 5]] ** 2
+        assert_rel_error(self, J, expected, 1e-4)
+
+    def test_forward(self):
+        self._check('forward', 'abs', 1)
+
+    def test_central_rel(self):
+        self._check('central', 'rel', 2)
+
+    def test_totals_dict(self):
+        prob, comp = self._build('forward', 'abs')
+        coloring = get_simul_meta(prob, stream=None)
+        prob.driver.set_simul_deriv_color(coloring)
+        prob.driver._setup_simul_coloring()
+
+        comp.count = 0
+        J = prob.driver._compute_totals(return_format='dict')
+        self.assertEqual(comp.count, 2)
+        expected = np.zeros((5, 4))
+        expected[[1, 2, 4], [1, 2, 3]] = 3. * np.arange(1., 7.)[[2, 3, 5]] ** 2
+        assert_rel_error(self, J['comp.y']['px.x'], expected, 1e-4)
+        assert_rel_error(self, J['comp.obj']['pz.z'], np.array([[4.]]), 1e-4)
+
+    def test_sparsity_sampled_at_several_points(self):
+        # at x = 0, d(y[0])/dx[0:2] is zero, but it isn't structurally zero.
+        from openmdao.utils.coloring import _get_bool_jac
+
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem('px', IndepVarComp('x', val=np.zeros(3)))
+        model.add_subsystem('comp', ExecComp(['y0=x[0]*x[1]', 'y1=2.*x[2]'], x=np.zeros(3)))
+        model.connect('px.x', 'comp.x')
+        model.add_design_var('px.x', lower=-1., upper=1.)
+        model.add_constraint('comp.y0', lower=0.)
+        model.add_constraint('comp.y1', lower=0.)
+        model.approx_totals(method='fd')
+
+        prob.driver = ScipyOptimizeDriver(optimizer='SLSQP')
+        prob.setup(check=False)
+        prob.run_model()
+
+        J = _get_bool_jac(prob, repeats=3)
+        np.testing.assert_array_equal(J, [[True, True, False], [False, False, True]])
+
+        # the model is left at the original design
+        assert_rel_error(self, prob['px.x'], np.zeros(3), 1e-15)
+        assert_rel_error(self, prob['comp.y0'], 0., 1e-15)
+        assert_rel_error(self, prob['comp.x'], np.zeros(3), 1e-15)
+        assert_rel_error(self, prob.model._residuals._data, np.zeros(5), 1e-15)
+
+        # later approximations start from the original design
+        J = prob.driver._compute_totals(return_format='array')
+        assert_rel_error(self, J, np.array([[0., 0., 0.], [0., 0., 2.]]), 1e-6)
+
+
 class ApproxTotalsFeature(unittest.TestCase):
 
     def test_basic(self):
@@ -1,6 +1,7 @@
 from __future__ import print_function
 
 import os
+import json
 import shutil
 import tempfile
 import warnings
@@ -12,6 +13,7 @@ import math
 from distutils.version import LooseVersion
 from numpy.testing import assert_array_almost_equal, assert_almost_equal
 import scipy
+from scipy.sparse import coo_matrix
 try:
     from scipy.sparse import load_npz
 except ImportError:
@@ -22,7 +24,7 @@ from openmdao.api import Problem, IndepVarComp, ExecComp, DirectSolver,\
 from openmdao.utils.assert_utils import assert_rel_error
 
 from openmdao.utils.general_utils import set_pyoptsparse_opt
-from openmdao.utils.coloring import get_simul_meta, _solves_info
+from openmdao.utils.coloring import get_simul_meta, _solves_info, _check_coloring
 from openmdao.test_suite.tot_jac_builder import TotJacBuilder
 import openmdao.test_suite
 
@@ -587,6 +589,17 @@ class SimulColoringScipyTestCase(unittest.TestCase):
         self.assertEqual(len(w), 1)
         self.assertEqual(str(w[0].message), "compute_totals called using a different list of design vars and/or responses than those used to define coloring, so coloring will be turned off.\ncoloring design vars: ['indeps.x', 'indeps.y', 'indeps.r'], current design vars: ['indeps.x', 'indeps.y', 'indeps.r']\ncoloring responses: ['circle.area', 'r_con.g', 'theta_con.g', 'delta_theta_con.g', 'l_conx.g'], current responses: ['delta_theta_con.g', 'circle.area', 'r_con.g', 'theta_con.g', 'l_conx.g'].")
 
+    def test_simul_coloring_sparse_return_format(self):
+        p_color = run_opt(ScipyOptimizeDriver, 'fwd', self.color_info, optimizer='SLSQP', disp=False)
+
+        J = p_color.compute_totals(return_format='array')
+        for fmt in ('coo', 'csr'):
+            Jsparse = p_color.compute_totals(return_format=fmt)
+            self.assertEqual(Jsparse.format, fmt)
+            # only the nonzeros given by the coloring are stored (plus dense column 20)
+            self.assertEqual(Jsparse.nnz, 73)
+            assert_almost_equal(Jsparse.toarray(), J, decimal=12)
+
     def test_bad_mode(self):
         with self.assertRaises(Exception) as context:
             p_color = run_opt(ScipyOptimizeDriver, 'rev', self.color_info, optimizer='SLSQP', disp=False)
@@ -770,6 +783,20 @@ class SimulColoringRevScipyTestCase(unittest.TestCase):
         self.assertEqual((p.model.linear_solver._solve_count - 1) / 22,
                          (p_color.model.linear_solver._solve_count - 1) / 11)
 
+    def test_simul_coloring_sparse_return_format(self):
+        p_color = run_opt(ScipyOptimizeDriver, 'rev', self.color_info, optimizer='SLSQP', disp=False)
+
+        J = p_color.compute_totals(return_format='array')
+        for fmt in ('coo', 'csr'):
+            Jsparse = p_color.compute_totals(return_format=fmt)
+            self.assertEqual(Jsparse.format, fmt)
+            assert_almost_equal(Jsparse.toarray(), J, decimal=12)
+
+        # driver scaling is applied to the stored nonzeros
+        Jscaled = p_color.compute_totals(return_format='csr', driver_scaling=True)
+        assert_almost_equal(Jscaled.toarray(), J * np.array([-1.] + [1.] * 21)[:, np.newaxis],
+                            decimal=12)
+
     def test_bad_mode(self):
         with self.assertRaises(Exception) as context:
             p_color = run_opt(ScipyOptimizeDriver, 'fwd', self.color_info, optimizer='SLSQP', disp=False)
@@ -879,6 +906,104 @@ class SparsityTestCase(unittest.TestCase):
         assert_almost_equal(p_sparsity['circle.area'], np.pi, decimal=7)
 
 
+class ColoringCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.startdir = os.getcwd()
+        self.tempdir = tempfile.mkdtemp(prefix='ColoringCacheTestCase-')
+        os.chdir(self.tempdir)
+
+    def tearDown(self):
+        os.chdir(self.startdir)
+        try:
+            shutil.rmtree(self.tempdir)
+        except OSError:
+            pass
+
+    def test_dynamic_coloring_cache(self):
+        cache_dir = os.path.join(self.tempdir, 'coloring_cache')
+
+        p1 = run_opt(ScipyOptimizeDriver, 'auto', optimizer='SLSQP', disp=False,
+                     dynamic_simul_derivs=True, dynamic_derivs_cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # same structure, so the coloring is loaded instead of computing 3 full jacobians
+        p2 = run_opt(ScipyOptimizeDriver, 'auto', optimizer='SLSQP', disp=False,
+                     dynamic_simul_derivs=True, dynamic_derivs_cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        assert_almost_equal(p1['circle.area'], np.pi, decimal=7)
+        assert_almost_equal(p2['circle.area'], np.pi, decimal=7)
+        # one full jacobian is still computed to check the cached coloring
+        self.assertEqual(p1.model.linear_solver._solve_count - 21 * 2,
+                         p2.model.linear_solver._solve_count)
+        self.assertEqual(p1.driver._simul_coloring_info['fwd'][0],
+                         p2.driver._simul_coloring_info['fwd'][0])
+
+        # a different structure gets its own cache entry
+        p3 = run_opt(ScipyOptimizeDriver, 'fwd', optimizer='SLSQP', disp=False,
+                     dynamic_simul_derivs=True, dynamic_derivs_cache_dir=cache_dir)
+        assert_almost_equal(p3['circle.area'], np.pi, decimal=7)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    def _select_prob(self, index, cache_dir, expr=None):
+        from openmdao.utils.coloring import dynamic_simul_coloring
+
+        p = Problem()
+        p.model.add_subsystem('indeps', IndepVarComp('x', np.arange(1., 4.)), promotes=['*'])
+        if expr is None:
+            p.model.add_subsystem('comp', SelectComp(index=index), promotes=['*'])
+        else:
+            p.model.add_subsystem('comp', ExecComp(['y0=' + expr, 'y1=x[2]'], x=np.ones(3)),
+                                  promotes=['*'])
+        p.model.add_design_var('x')
+        p.model.add_objective('y1')
+        p.model.add_constraint('y0', lower=0.)
+
+        p.driver = ScipyOptimizeDriver(optimizer='SLSQP', dynamic_derivs_cache_dir=cache_dir)
+        p.setup(mode='fwd')
+        p.run_model()
+        dynamic_simul_coloring(p.driver)
+        return p
+
+    def test_stale_cached_coloring(self):
+        cache_dir = os.path.join(self.tempdir, 'coloring_cache')
+
+        for index in (0, 1):
+            # the partials change with the option, but their declared sparsity doesn't
+            p = self._select_prob(index, cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            expected = np.array([[0., 0., 1.], [0., 0., 0.]])
+            expected[1, index] = 1.
+            assert_almost_equal(p.driver._compute_totals(return_format='array'), expected)
+
+        for index in (0, 1):
+            # different ExecComp expressions get their own cache entries
+            p = self._select_prob(index, cache_dir, expr='x[%d]' % index)
+            self.assertEqual(len(os.listdir(cache_dir)), 2 + index)
+            expected = np.array([[0., 0., 1.], [0., 0., 0.]])
+            expected[1, index] = 1.
+            assert_almost_equal(p.driver._compute_totals(return_format='array'), expected)
+
+    def test_damaged_cache_file(self):
+        cache_dir = os.path.join(self.tempdir, 'coloring_cache')
+        self._select_prob(0, cache_dir)
+        cache_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+
+        # simulate an interrupted write
+        with open(cache_file, 'r') as f:
+            data = f.read()
+        with open(cache_file, 'w') as f:
+            f.write(data[:len(data) // 2])
+
+        p = self._select_prob(0, cache_dir)
+        assert_almost_equal(p.driver._compute_totals(return_format='array'),
+                            np.array([[0., 0., 1.], [1., 0., 0.]]))
+        self.assertEqual(os.listdir(cache_dir), [os.path.basename(cache_file)])
+        with open(cache_file, 'r') as f:
+            json.load(f)
+
+
 class BidirectionalTestCase(unittest.TestCase):
     def test_eisenstat(self):
         for n in range(6, 20, 2):
@@ -911,6 +1036,39 @@ class BidirectionalTestCase(unittest.TestCase):
             tot_size, tot_colors, fwd_solves, rev_solves, pct = _solves_info(builder.coloring)
             self.assertEqual(tot_colors, 3)
 
+    def test_arrowhead_sparse_return_format(self):
+        # totals stored in sparse form must combine the fwd and rev solves of a bidirectional
+        # coloring without either direction overwriting the other.
+        n = 12
+        rows = np.concatenate([np.zeros(n, dtype=int), np.arange(1, n), np.arange(1, n)])
+        cols = np.concatenate([np.arange(n), np.zeros(n - 1, dtype=int), np.arange(1, n)])
+        vals = np.random.RandomState(11).random_sample(rows.size) + 1.
+        A = coo_matrix((vals, (rows, cols)), shape=(n, n)).toarray()
+
+        p = Problem()
+        p.model.add_subsystem('indeps', IndepVarComp('x', np.ones(n)))
+        p.model.add_subsystem('arrow', ExecComp('y=A.dot(x)', A=A, x=np.ones(n), y=np.ones(n)))
+        p.model.connect('indeps.x', 'arrow.x')
+        p.model.add_design_var('indeps.x')
+        p.model.add_constraint('arrow.y', lower=0.)
+
+        coloring = get_simul_meta(None, 'auto', include_sparsity=False, bool_jac=A != 0.,
+                                  stream=None)
+        self.assertEqual(_solves_info(coloring)[2:4], (1, 2))
+        p.driver = ScipyOptimizeDriver(optimizer='SLSQP')
+        p.driver.set_simul_deriv_color(coloring)
+
+        p.setup(mode='auto')
+        p.run_model()
+
+        J = p.compute_totals(return_format='array')
+        assert_almost_equal(J, A, decimal=12)
+        for fmt in ('coo', 'csr'):
+            Jsparse = p.compute_totals(return_format=fmt)
+            self.assertEqual(Jsparse.format, fmt)
+            self.assertEqual(Jsparse.nnz, rows.size)
+            assert_almost_equal(Jsparse.toarray(), J, decimal=12)
+
     @unittest.skipIf(LooseVersion(scipy.__version__) < LooseVersion("0.19.1"), "scipy version too old")
     def test_can_715(self):
         # this test is just to show the superiority of bicoloring vs. single coloring in
@@ -947,5 +1105,153 @@ class BidirectionalTestCase(unittest.TestCase):
         self.assertEqual(tot_colors, 105)
 
 
+    @unittest.skipIf(LooseVersion(scipy.__version__) < LooseVersion("0.19.1"), "scipy version too old")
+    def test_can_715_sparse_orderings(self):
+        matdir = os.path.join(os.path.dirname(openmdao.test_suite.__file__), 'matrices')
+        mat = load_npz(os.path.join(matdir, 'can_715.npz'))
+        dense = np.asarray(mat.toarray(), dtype=bool)
+
+        for mode in ('fwd', 'rev', 'auto'):
+            expected = get_simul_meta(None, mode, include_sparsity=False, bool_jac=dense,
+                                      stream=None)
+            # a sparse jacobian gives the same coloring as the equivalent dense one
+            coloring = get_simul_meta(None, mode, include_sparsity=False, bool_jac=mat,
+                                      stream=None)
+            for m in ('fwd', 'rev'):
+                self.assertEqual(m in coloring, m in expected)
+                if m in coloring:
+                    self.assertEqual(coloring[m][0], expected[m][0])
+
+            for order in ('largest_first', 'smallest_last'):
+                coloring = get_simul_meta(None, mode, include_sparsity=False, bool_jac=mat,
+                                          stream=None, order=order)
+                _check_coloring(dense, coloring)
+
+        with self.assertRaises(ValueError) as cm:
+            get_simul_meta(None, 'fwd', bool_jac=mat, stream=None, order='foo')
+        self.assertEqual(str(cm.exception),
+                         "Unknown column ordering 'foo'. Valid orderings are "
+                         "['incidence_degree', 'largest_first', 'smallest_last'].")
+
+    def test_large_sparse(self):
+        # a banded jacobian with 20000 columns and a dense row, which would require a
+        # dense 20000 x 20000 column intersection matrix
+        n = 20000
+        rows = np.concatenate([np.arange(n), np.arange(n - 3), np.full(n, n)])
+        cols = np.concatenate([np.arange(n), np.arange(3, n), np.arange(n)])
+        J = coo_matrix((np.ones(rows.size, dtype=bool), (rows, cols)), shape=(n + 1, n))
+
+        coloring = get_simul_meta(None, 'auto', include_sparsity=False, bool_jac=J, stream=None)
+        tot_size, tot_colors, fwd_solves, rev_solves, pct = _solves_info(coloring)
+        self.assertEqual(fwd_solves, 2)
+        self.assertEqual(rev_solves, 1)
+
+
+class DiagCubeComp(ExplicitComponent):
+    """y = x**3, elementwise, with declared diagonal partials."""
+
+    def initialize(self):
+        self.options.declare('size', types=int)
+
+    def setup(self):
+        n = self.options['size']
+        self.add_input('x', np.ones(n))
+        self.add_output('y', np.ones(n))
+        ar = np.arange(n)
+        self.declare_partials('y', 'x', rows=ar, cols=ar)
+
+    def compute(self, inputs, outputs):
+        outputs['y'] = inputs['x'] ** 3
+
+    def compute_partials(self, inputs, partials):
+        partials['y', 'x'] = 3. * inputs['x'] ** 2
+
+
+class SelectComp(ExplicitComponent):
+    """y0 = x[index], y1 = x[2], with dense declared partials."""
+
+    def initialize(self):
+        self.options.declare('index', types=int)
+
+    def setup(self):
+        self.add_input('x', np.ones(3))
+        self.add_output('y0', 1.)
+        self.add_output('y1', 1.)
+        self.declare_partials('*', 'x')
+
+    def compute(self, inputs, outputs):
+        outputs['y0'] = inputs['x'][self.options['index']]
+        outputs['y1'] = inputs['x'][2]
+
+    def compute_partials(self, inputs, partials):
+        partials['y0', 'x'] = np.eye(3)[self.options['index']]
+        partials['y1', 'x'] = np.eye(3)[2]
+
+
+class StructuralSparsityTestCase(unittest.TestCase):
+
+    def _build(self, n=6):
+        from openmdao.api import Group, BalanceComp, NewtonSolver
+
+        p = Problem()
+        indeps = p.model.add_subsystem('indeps', IndepVarComp())
+        indeps.add_output('a', np.arange(1, n + 1, dtype=float))
+        indeps.add_output('b', 2.0)
+
+        cycle = p.model.add_subsystem('cycle', Group())
+        cycle.add_subsystem('cube', DiagCubeComp(size=n))
+        bal = cycle.add_subsystem('bal', BalanceComp())
+        bal.add_balance('x', val=np.ones(n), lhs_name='y', rhs_name='a')
+        cycle.connect('cube.y', 'bal.y')
+        cycle.connect('bal.x', 'cube.x')
+        cycle.nonlinear_solver = NewtonSolver(solve_subsystems=False)
+        cycle.linear_solver = DirectSolver()
+
+        p.model.add_subsystem('obj', ExecComp('f=sum(x) + b', x=np.ones(n)))
+        p.model.connect('indeps.a', 'cycle.bal.a')
+        p.model.connect('indeps.b', 'obj.b')
+        p.model.connect('cycle.bal.x', 'obj.x')
+
+        p.model.add_design_var('indeps.a')
+        p.model.add_design_var('indeps.b')
+        p.model.add_objective('obj.f')
+        p.model.add_constraint('cycle.bal.x', upper=10.)
+        p.model.add_constraint('cycle.cube.y', upper=100., indices=[1, 3])
+
+        p.setup(mode='fwd')
+        p.run_model()
+        return p
+
+    def test_structural_matches_numeric(self):
+        from openmdao.utils.coloring import _get_bool_jac
+
+        p = self._build()
+        J_numeric = _get_bool_jac(p, repeats=2)
+        J_struct = _get_bool_jac(p, structural=True)
+
+        expected = np.zeros((9, 7), dtype=bool)
+        expected[0] = True                          # obj.f
+        expected[1:7, :6] = np.eye(6, dtype=bool)   # cycle.bal.x
+        expected[7, 1] = expected[8, 3] = True      # cycle.cube.y[[1, 3]]
+
+        np.testing.assert_array_equal(J_numeric, expected)
+        np.testing.assert_array_equal(J_struct, expected)
+
+    def test_structural_coloring(self):
+        p = self._build()
+        numeric = get_simul_meta(p, repeats=2, include_sparsity=False, stream=None)
+        struct = get_simul_meta(p, structural=True, include_sparsity=False, stream=None)
+        self.assertEqual(_solves_info(struct), _solves_info(numeric))
+
+    def test_structural_fallback_matrix_free(self):
+        from openmdao.utils.coloring import _get_structural_bool_jac
+
+        p = run_opt(ScipyOptimizeDriver, 'fwd', optimizer='SLSQP', disp=False)
+        self.assertIsNotNone(_get_structural_bool_jac(p))
+
+        p.model.matrix_free = True
+        self.assertIsNone(_get_structural_bool_jac(p))
+
+
 if __name__ == '__main__':
     unittest.main()
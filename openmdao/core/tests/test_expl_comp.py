@@ -764,6 +764,53 @@ class ExplCompTestCase(unittest.TestCase):
         # verify read_only status is reset after AnalysisError
         prob['length'] = 111.
 
+    def test_skip_unchanged_linearize(self):
+        class CountingComp(RectanglePartial):
+            def initialize(self):
+                self.count = 0
+
+            def compute_partials(self, inputs, partials):
+                super(CountingComp, self).compute_partials(inputs, partials)
+                self.count += 1
+
+        prob = Problem()
+        prob.model.add_subsystem('ivc', IndepVarComp('length', 3.0), promotes=['*'])
+        comp = prob.model.add_subsystem('comp', CountingComp(skip_unchanged_linearize=True),
+                                        promotes=['*'])
+        prob.setup()
+        prob.run_model()
+
+        J = prob.compute_totals(of=['area'], wrt=['length'])
+        assert_rel_error(self, J['area', 'length'], [[1.]], 1e-12)
+        self.assertEqual(comp.count, 1)
+
+        # nothing changed, so the partials are reused
+        prob.run_model()
+        J = prob.compute_totals(of=['area'], wrt=['length'])
+        self.assertEqual(comp.count, 1)
+
+        prob['width'] = 5.
+        prob.run_model()
+        J = prob.compute_totals(of=['area'], wrt=['length'])
+        assert_rel_error(self, J['area', 'length'], [[5.]], 1e-12)
+        self.assertEqual(comp.count, 2)
+
+    def test_skip_unchanged_linearize_declare_options_override(self):
+        # the option is available even if _declare_options doesn't call the base version
+        class OptionsComp(RectanglePartial):
+            def _declare_options(self):
+                self.options.declare('units', default='m')
+
+        prob = Problem()
+        prob.model.add_subsystem('ivc', IndepVarComp('length', 3.0), promotes=['*'])
+        prob.model.add_subsystem('comp', OptionsComp(skip_unchanged_linearize=True),
+                                 promotes=['*'])
+        prob.setup()
+        prob.run_model()
+
+        J = prob.compute_totals(of=['area'], wrt=['length'])
+        assert_rel_error(self, J['area', 'length'], [[1.]], 1e-12)
+
 
 if __name__ == '__main__':
     unittest.main()
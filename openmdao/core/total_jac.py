@@ -5,14 +5,17 @@ from __future__ import print_function, division
 
 import warnings
 from collections import OrderedDict, defaultdict
+from itertools import chain
 from copy import deepcopy
+import json
 import pprint
-from six import iteritems, itervalues
+from six import iteritems, itervalues, string_types
 from six.moves import zip
 import sys
 import time
 
 import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
 
 try:
     from petsc4py import PETSc
@@ -29,6 +32,9 @@ from openmdao.utils.mpi import MPI
 
 _contains_all = ContainsAll()
 
+# return formats that give the total jacobian as a scipy sparse matrix
+_sparse_formats = {'coo': coo_matrix, 'csr': csr_matrix}
+
 
 class _TotalJacInfo(object):
     """
@@ -36,6 +42,8 @@ class _TotalJacInfo(object):
 
     Attributes
     ----------
+    approx_coloring : list or None
+        Column coloring of the total jacobian used when the model approximates its totals.
     comm : MPI.Comm or <FakeComm>
         The global communicator.
     debug_print : bool
@@ -44,14 +52,16 @@ class _TotalJacInfo(object):
         If True, this total jacobian contains linear constraints.
     idx_iter_dict : dict
         A dict containing an entry for each outer iteration of the total jacobian computation.
-    J : ndarray
-        The dense array form of the total jacobian.
+    J : ndarray or None
+        The dense array form of the total jacobian. This is None if only the nonzero entries
+        are stored in sparse_J.
     J_dict : dict
         Nested or flat dict with views of the jacobian.
     J_final : ndarray or dict
-        If return_format is 'array', Jfinal is J.  Otherwise it's either a nested dict (if
-        return_format is 'dict') or a flat dict (return_format 'flat_dict') with views into
-        the array jacobian.
+        If return_format is 'array', Jfinal is J.  If return_format is 'coo' or 'csr' and the
+        sparsity of the total jacobian is known, it's a sparse matrix sharing its data with
+        sparse_J.  Otherwise it's either a nested dict (if return_format is 'dict') or a flat
+        dict (return_format 'flat_dict') with views into the array jacobian.
     lin_sol_cache : dict
         Dict of indices keyed to solution vectors.
     mode : str
@@ -77,9 +87,12 @@ class _TotalJacInfo(object):
         Cache containing names of desvars or responses for each parallel derivative color.
     return_format : str
         Indicates the desired return format of the total jacobian. Can have value of
-        'array', 'dict', or 'flat_dict'.
+        'array', 'dict', 'flat_dict', 'coo', or 'csr'.
     simul_coloring : tuple of the form (column_lists, row_map, sparsity) or None
         Contains all data necessary to simultaneously solve for groups of total derivatives.
+    sparse_J : dict or None
+        Storage for the nonzero entries of the total jacobian when a sparse return format is
+        requested and the sparsity of the total jacobian is known.
     """
 
     def __init__(self, problem, of, wrt, global_names, return_format, approx=False,
@@ -99,7 +112,7 @@ class _TotalJacInfo(object):
             If True, names in of and wrt are global names.
         return_format : str
             Indicates the desired return format of the total jacobian. Can have value of
-            'array', 'dict', or 'flat_dict'.
+            'array', 'dict', 'flat_dict', 'coo', or 'csr'.
         approx : bool
             If True, the object will compute approx total jacobians.
         debug_print : bool
@@ -157,6 +170,10 @@ class _TotalJacInfo(object):
 
         if approx:
             self._initialize_approx()
+            self.has_lin_cons = False
+            self.simul_coloring = driver._simul_coloring_info
+            if self.simul_coloring is not None and (wrt != driver_wrt or of != driver_of):
+                self.simul_coloring = None
         else:
             constraints = driver._cons
 
@@ -216,9 +233,22 @@ class _TotalJacInfo(object):
         self.wrt_meta, self.wrt_size = self._get_tuple_map(wrt, design_vars, abs2meta)
         self.out_meta = {'fwd': self.of_meta, 'rev': self.wrt_meta}
 
-        # always allocate a 2D dense array and we can assign views to dict keys later if
+        if approx:
+            self.approx_coloring = self._get_approx_coloring(driver)
+
+        # for sparse return formats, only store the nonzero entries if we know where they are.
+        self.sparse_J = None
+        if return_format in _sparse_formats and not approx:
+            nonzeros = self._get_nonzero_coords(driver)
+            if nonzeros is not None:
+                self._setup_sparse_J(nonzeros[0], nonzeros[1], modes)
+
+        # otherwise allocate a 2D dense array and we can assign views to dict keys later if
         # return format is 'dict' or 'flat_dict'.
-        self.J = J = np.zeros((self.of_size, self.wrt_size))
+        if self.sparse_J is None:
+            self.J = J = np.zeros((self.of_size, self.wrt_size))
+        else:
+            self.J = J = None
 
         if not approx:
             self.solvec_map = {}
@@ -230,13 +260,16 @@ class _TotalJacInfo(object):
             self.jac_petsc = {}
             self.soln_petsc = {}
             if 'fwd' in modes:
-                self._compute_jac_scatters('fwd', J.shape[0], has_remote_vars)
+                self._compute_jac_scatters('fwd', self.of_size, has_remote_vars)
 
             if 'rev' in modes:
-                self._compute_jac_scatters('rev', J.shape[1], has_remote_vars)
+                self._compute_jac_scatters('rev', self.wrt_size, has_remote_vars)
 
         # for dict type return formats, map var names to views of the Jacobian array.
-        if return_format == 'array':
+        if self.sparse_J is not None:
+            self.J_final = self.sparse_J['mtx']
+            self.J_dict = None
+        elif return_format == 'array' or return_format in _sparse_formats:
             self.J_final = J
             if self.has_scaling or approx:
                 # for array return format, create a 'dict' view for scaling or FD, since
@@ -254,6 +287,189 @@ class _TotalJacInfo(object):
             self.prom_design_vars = {prom_wrt[i]: design_vars[dv] for i, dv in enumerate(wrt)}
             self.prom_responses = {prom_of[i]: responses[r] for i, r in enumerate(of)}
 
+    def _get_nonzero_coords(self, driver):
+        """
+        Return the row and column indices of the possibly nonzero entries of the total jacobian.
+
+        The total jacobian sparsity is taken from the driver's total jacobian sparsity if it
+        has been set, or else from the simultaneous derivative coloring.
+
+        Parameters
+        ----------
+        driver : <Driver>
+            The driver that owns the total jacobian sparsity and coloring.
+
+        Returns
+        -------
+        tuple of (ndarray, ndarray) or None
+            Row and column indices in row major order, or None if the sparsity is unknown.
+        """
+        nrows = self.of_size
+        ncols = self.wrt_size
+        rows = []
+        cols = []
+
+        sparsity = driver._total_jac_sparsity
+        if isinstance(sparsity, string_types):
+            with open(sparsity, 'r') as f:
+                sparsity = json.load(f)
+
+        if isinstance(sparsity, dict):
+            for of in self.of:
+                oslc = self.of_meta[of][0]
+                resdict = sparsity.get(of, {})
+                for wrt in self.wrt:
+                    wslc = self.wrt_meta[wrt][0]
+                    shape = (oslc.stop - oslc.start, wslc.stop - wslc.start)
+                    if wrt in resdict and tuple(resdict[wrt][2]) == shape:
+                        r, c, _ = resdict[wrt]
+                        r = np.asarray(r, dtype=INT_DTYPE)
+                        c = np.asarray(c, dtype=INT_DTYPE)
+                    else:  # no sparsity info for this sub-jac, so treat it as dense
+                        r, c = np.indices(shape, dtype=INT_DTYPE)
+                    rows.append(r.ravel() + oslc.start)
+                    cols.append(c.ravel() + wslc.start)
+
+        elif self.simul_coloring is not None:
+            for mode, size, other_size in (('fwd', ncols, nrows), ('rev', nrows, ncols)):
+                if mode not in self.simul_coloring:
+                    continue
+                col_lists, nz_lists = self.simul_coloring[mode][:2]
+                # uncolored columns (fwd) or rows (rev) are solved individually in full, while
+                # any not listed at all are solved in the other direction.
+                for i in chain.from_iterable(col_lists):
+                    nzs = nz_lists[i]
+                    if nzs is None or isinstance(nzs, slice):  # a full row or column
+                        nzs = np.arange(other_size, dtype=INT_DTYPE)
+                    else:
+                        nzs = np.asarray(nzs, dtype=INT_DTYPE)
+                    idxs = np.full(nzs.size, i, dtype=INT_DTYPE)
+                    if mode == 'fwd':
+                        rows.append(nzs)
+                        cols.append(idxs)
+                    else:
+                        rows.append(idxs)
+                        cols.append(nzs)
+        else:
+            return None
+
+        if rows:
+            # remove duplicates and put into row major order
+            flat = np.unique(np.concatenate(rows) * ncols + np.concatenate(cols))
+        else:
+            flat = np.zeros(0, dtype=INT_DTYPE)
+
+        return flat // ncols, flat % ncols
+
+    def _get_approx_coloring(self, driver):
+        """
+        Color the columns of the total jacobian for approximation of the totals by the model.
+
+        Design variable entries of the same color don't affect any of the same responses, so
+        the model can perturb all of them in a single finite difference run.
+
+        Parameters
+        ----------
+        driver : <Driver>
+            The driver that owns the total jacobian sparsity and coloring.
+
+        Returns
+        -------
+        list or None
+            For each color, a tuple of the form (perturbs, scatters), where perturbs is a list
+            of (wrt, idxs) giving the entries of each design var to perturb and scatters is a
+            list of (of, wrt, rows, cols) giving where in the d(of)/d(wrt) sub-jacobian the
+            results belong.  None if the sparsity is unknown or coloring doesn't reduce the
+            number of runs.
+        """
+        # avoid circular import
+        from openmdao.utils.coloring import _get_full_disjoint_cols
+
+        nonzeros = self._get_nonzero_coords(driver)
+        if nonzeros is None:
+            return None
+
+        rows, cols = nonzeros
+        J = coo_matrix((np.ones(rows.size, dtype=bool), (rows, cols)),
+                       shape=(self.of_size, self.wrt_size)).tocsc()
+
+        col_groups = _get_full_disjoint_cols(J)
+        if len(col_groups) >= self.wrt_size:
+            return None
+
+        of_starts = np.array([self.of_meta[of][0].start for of in self.of], dtype=INT_DTYPE)
+        wrt_starts = np.array([self.wrt_meta[wrt][0].start for wrt in self.wrt], dtype=INT_DTYPE)
+
+        coloring = []
+        for group in col_groups:
+            group = np.array(sorted(group), dtype=INT_DTYPE)
+
+            # the design vars, and their entries, that own the columns of this color
+            wrt_ids = np.searchsorted(wrt_starts, group, side='right') - 1
+            perturbs = []
+            for w in np.unique(wrt_ids):
+                perturbs.append((self.wrt[w], group[wrt_ids == w] - wrt_starts[w]))
+
+            # the nonzeros in the columns of this color, by sub-jacobian
+            sub = J[:, group].tocoo()
+            if sub.nnz > 0:
+                nz_cols = group[sub.col]
+                nz_of = np.searchsorted(of_starts, sub.row, side='right') - 1
+                nz_wrt = wrt_ids[sub.col]
+                keys = nz_of * len(self.wrt) + nz_wrt
+                scatters = []
+                for key in np.unique(keys):
+                    o, w = divmod(key, len(self.wrt))
+                    mask = keys == key
+                    scatters.append((self.of[o], self.wrt[w], sub.row[mask] - of_starts[o],
+                                     nz_cols[mask] - wrt_starts[w]))
+            else:
+                scatters = []
+
+            coloring.append((perturbs, scatters))
+
+        return coloring
+
+    def _setup_sparse_J(self, rows, cols, modes):
+        """
+        Allocate storage for the nonzero entries of the total jacobian.
+
+        Parameters
+        ----------
+        rows : ndarray
+            Row indices of the nonzero entries, in row major order.
+        cols : ndarray
+            Column indices of the nonzero entries, in row major order.
+        modes : list of str
+            Derivative directions that will be used to compute the total jacobian.
+        """
+        shape = (self.of_size, self.wrt_size)
+        if self.return_format == 'coo':
+            mtx = coo_matrix((np.zeros(rows.size), (rows, cols)), shape=shape)
+        else:
+            indptr = np.zeros(shape[0] + 1, dtype=INT_DTYPE)
+            np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+            mtx = csr_matrix((np.zeros(rows.size), cols, indptr), shape=shape)
+
+        self.sparse_J = sparse_J = {
+            'mtx': mtx,
+            'data': mtx.data,
+            'rows': rows,
+            'cols': cols,
+        }
+
+        # for each solve direction, map each column (fwd) or row (rev) to the positions of its
+        # nonzeros in the data array and to their row (fwd) or column (rev) indices.
+        for mode in modes:
+            if mode == 'fwd':
+                idxs, others, size, other_size = cols, rows, shape[1], shape[0]
+            else:
+                idxs, others, size, other_size = rows, cols, shape[0], shape[1]
+            order = np.argsort(idxs, kind='mergesort')
+            ptrs = np.searchsorted(idxs[order], np.arange(size + 1))
+            sparse_J[mode] = (ptrs, order, others[order], np.zeros(other_size),
+                              np.zeros(other_size, dtype=bool))
+
     def _compute_jac_scatters(self, mode, size, has_remote_vars):
         rank = self.comm.rank
         self.jac_scatters[mode] = jac_scatters = {}
@@ -1073,7 +1289,10 @@ class _TotalJacInfo(object):
         scatter = self.jac_scatters[mode][vecname]
         if scatter is None:
             deriv_val = self.output_vec[mode][vecname]._data
-            if mode == 'fwd':
+            if self.sparse_J is not None:
+                self._sparse_jac_setter(i, jac_idxs[vecname], deriv_val[deriv_idxs[vecname]],
+                                        mode)
+            elif mode == 'fwd':
                 self.J[jac_idxs[vecname], i] = deriv_val[deriv_idxs[vecname]]
             else:  # rev
                 self.J[i, jac_idxs[vecname]] = deriv_val[deriv_idxs[vecname]]
@@ -1081,7 +1300,9 @@ class _TotalJacInfo(object):
             self.jac_petsc[mode].array[:] = 0.
             scatter.scatter(self.soln_petsc[mode][vecname][0],
                             self.jac_petsc[mode], addv=False, mode=False)
-            if mode == 'fwd':
+            if self.sparse_J is not None:
+                self._sparse_jac_setter(i, slice(None), self.jac_petsc[mode].array, mode)
+            elif mode == 'fwd':
                 self.J[:, i] = self.jac_petsc[mode].array
             else:
                 self.J[i] = self.jac_petsc[mode].array
@@ -1125,7 +1346,10 @@ class _TotalJacInfo(object):
 
         # TODO: add code here to handle running under MPI
 
-        if fwd:
+        if self.sparse_J is not None:
+            for i in inds:
+                self._sparse_jac_setter(i, row_col_map[i], reduced_derivs[row_col_map[i]], mode)
+        elif fwd:
             for i in inds:
                 J[row_col_map[i], i] = reduced_derivs[row_col_map[i]]
         else:
@@ -1158,7 +1382,10 @@ class _TotalJacInfo(object):
         jac_inds = jac_idxs[vecname]
         if scatter is None:
             deriv_val = deriv_val[deriv_idxs[vecname], :]
-            if mode == 'fwd':
+            if self.sparse_J is not None:
+                for col, i in enumerate(inds):
+                    self._sparse_jac_setter(i, jac_inds, deriv_val[:, col], mode)
+            elif mode == 'fwd':
                 for col, i in enumerate(inds):
                     self.J[jac_inds, i] = deriv_val[:, col]
             else:  # rev
@@ -1174,11 +1401,41 @@ class _TotalJacInfo(object):
                     solution[0].array = solution[1]
                 scatter.scatter(self.soln_petsc[mode][vecname][0],
                                 self.jac_petsc[mode], addv=False, mode=False)
-                if mode == 'fwd':
+                if self.sparse_J is not None:
+                    self._sparse_jac_setter(i, slice(None), self.jac_petsc[mode].array, mode)
+                elif mode == 'fwd':
                     self.J[:, i] = self.jac_petsc[mode].array
                 else:
                     self.J[i] = self.jac_petsc[mode].array
 
+    def _sparse_jac_setter(self, i, idxs, vals, mode):
+        """
+        Set the nonzero entries of a single column (fwd) or row (rev) of the sparse jacobian.
+
+        Parameters
+        ----------
+        i : int
+            Total jacobian row or column index.
+        idxs : ndarray of int or slice
+            Row (fwd) or column (rev) indices of the computed derivative values.
+        vals : ndarray
+            Computed derivative values.
+        mode : str
+            Direction of derivative solution.
+        """
+        ptrs, order, others, full, computed = self.sparse_J[mode]
+        full[idxs] = vals
+        computed[idxs] = True
+
+        # only overwrite the nonzeros computed in this direction, since under a bidirectional
+        # coloring the others are filled in by solves in the opposite direction.
+        start, end = ptrs[i], ptrs[i + 1]
+        others = others[start:end]
+        mask = computed[others]
+        self.sparse_J['data'][order[start:end][mask]] = full[others[mask]]
+
+        computed[idxs] = False
+
     def par_deriv_matmat_jac_setter(self, inds, mode):
         """
         Set the appropriate part of the total jacobian for par_deriv matrix matrix input indices.
@@ -1257,7 +1514,10 @@ class _TotalJacInfo(object):
                     jac_setter(inds, mode)
 
         if self.has_scaling:
-            self._do_scaling(self.J_dict)
+            if self.sparse_J is not None:
+                self._do_sparse_scaling()
+            else:
+                self._do_scaling(self.J_dict)
 
         if debug_print:
             # Debug outputs scaled derivatives.
@@ -1265,6 +1525,10 @@ class _TotalJacInfo(object):
 
         # np.save("total_jac.npy", self.J)
 
+        if self.return_format in _sparse_formats and self.sparse_J is None:
+            # sparsity is unknown, so just convert the dense jacobian
+            return _sparse_formats[self.return_format](self.J)
+
         return self.J_final
 
     def compute_totals_approx(self, initialize=False):
@@ -1299,6 +1563,9 @@ class _TotalJacInfo(object):
         # Solve for derivs with the approximation_scheme.
         # This cuts out the middleman by grabbing the Jacobian directly after linearization.
 
+        # The model's approximation schemes use this to perturb independent design vars together.
+        model._owns_approx_coloring = self.approx_coloring
+
         # Re-initialize so that it is clean.
         if initialize:
             if model._approx_schemes:
@@ -1333,7 +1600,7 @@ class _TotalJacInfo(object):
                     tot[prom_in] = _get_subjac(approx_jac[output_name, input_name],
                                                prom_out, prom_in, of_idx, wrt_idx)
 
-        elif return_format == 'array':
+        elif return_format == 'array' or return_format in _sparse_formats:
             totals = self.J_dict  # J_dict has views into the array jacobian
             for prom_out, output_name in zip(self.prom_of, of):
                 tot = totals[prom_out]
@@ -1349,6 +1616,8 @@ class _TotalJacInfo(object):
 
         if return_format == 'array':
             totals = self.J  # change back to array version
+        elif return_format in _sparse_formats:
+            totals = _sparse_formats[return_format](self.J)
 
         return totals
 
@@ -1409,7 +1678,7 @@ class _TotalJacInfo(object):
         desvars = self.prom_design_vars
         responses = self.prom_responses
 
-        if self.return_format in ('dict', 'array'):
+        if self.return_format in ('dict', 'array') or self.return_format in _sparse_formats:
             for prom_out, odict in iteritems(J):
                 oscaler = responses[prom_out]['scaler']
 
@@ -1441,6 +1710,39 @@ class _TotalJacInfo(object):
             raise RuntimeError("Derivative scaling by the driver only supports the 'dict' and "
                                "'array' formats at present.")
 
+    def _do_sparse_scaling(self):
+        """
+        Apply scalers to the nonzero entries of the sparse jacobian if the driver defined any.
+        """
+        sparse_J = self.sparse_J
+        if 'scale' not in sparse_J:
+            row_scale = np.ones(self.of_size)
+            col_scale = np.ones(self.wrt_size)
+            for of in self.of:
+                oscaler = self.responses[of]['scaler']
+                if oscaler is not None:
+                    row_scale[self.of_meta[of][0]] = oscaler
+            for wrt in self.wrt:
+                iscaler = self.design_vars[wrt]['scaler']
+                if iscaler is not None:
+                    col_scale[self.wrt_meta[wrt][0]] = 1.0 / iscaler
+            sparse_J['scale'] = row_scale[sparse_J['rows']] * col_scale[sparse_J['cols']]
+
+        sparse_J['data'] *= sparse_J['scale']
+
+    def _get_dense_J(self):
+        """
+        Return the total jacobian as a dense array.
+
+        Returns
+        -------
+        ndarray
+            Dense total jacobian.
+        """
+        if self.sparse_J is not None:
+            return self.sparse_J['mtx'].toarray()
+        return self.J
+
     def _print_derivatives(self):
         """
         Print out the derivatives when debug_print is True.
@@ -1451,7 +1753,7 @@ class _TotalJacInfo(object):
                 for wrt in self.wrt:
                     pprint.pprint({(of, wrt): J[of][wrt]})
         else:
-            J = self.J
+            J = self._get_dense_J()
             for i, of in enumerate(self.of):
                 out_slice = self.of_meta[of][0]
                 for j, wrt in enumerate(self.wrt):
@@ -1474,8 +1776,9 @@ class _TotalJacInfo(object):
         recording_iteration.stack.append((requester._get_name(), requester.iter_count))
 
         try:
-            totals = self._get_dict_J(self.J, self.wrt, self.prom_wrt, self.of, self.prom_of,
-                                      self.wrt_meta, self.of_meta, 'flat_dict_structured_key')
+            totals = self._get_dict_J(self._get_dense_J(), self.wrt, self.prom_wrt, self.of,
+                                      self.prom_of, self.wrt_meta, self.of_meta,
+                                      'flat_dict_structured_key')
             requester._rec_mgr.record_derivatives(requester, totals, metadata)
 
         finally:
@@ -162,6 +162,19 @@ class pyOptSparseDriver(Driver):
         self.options.declare('dynamic_derivs_repeats', default=3, types=int,
                              desc='Number of compute_totals calls during dynamic computation of '
                                   'simultaneous derivative coloring or derivatives sparsity')
+        self.options.declare('dynamic_sparsity_method', default='numeric',
+                             values=['numeric', 'structural'],
+                             desc="How to compute the total jacobian sparsity during dynamic "
+                                  "computation of simultaneous derivative coloring or derivatives "
+                                  "sparsity. 'numeric' uses randomized total jacobians and "
+                                  "'structural' uses the declared partial sparsity, if the model "
+                                  "allows it.")
+        self.options.declare('dynamic_derivs_cache_dir', default=None, types=string_types,
+                             allow_none=True,
+                             desc='If set, dynamically computed total derivative coloring and '
+                                  'sparsity are stored in this directory, keyed by a hash of the '
+                                  'model structure, and reused by later runs of the same '
+                                  'structure instead of being recomputed.')
 
     def _setup_driver(self, problem):
         """
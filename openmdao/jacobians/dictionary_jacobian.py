@@ -2,7 +2,6 @@
 from __future__ import division
 
 import numpy as np
-from six.moves import range
 
 from openmdao.jacobians.jacobian import Jacobian
 
@@ -15,6 +14,9 @@ class DictionaryJacobian(Jacobian):
     ----------
     _iter_keys : list of (vname, vname) tuples
         List of tuples of variable names that match subjacs in the this Jacobian.
+    _apply_plans : dict
+        Cached lists of matvec operations keyed by vec_name and the input/output/residual
+        names in scope.
 
     """
 
@@ -32,6 +34,7 @@ class DictionaryJacobian(Jacobian):
         super(DictionaryJacobian, self).__init__(system, **kwargs)
 
         self._iter_keys = {}
+        self._apply_plans = {}
 
     def _iter_abs_keys(self, vec_name):
         """
@@ -66,9 +69,13 @@ class DictionaryJacobian(Jacobian):
 
         return self._iter_keys[entry]
 
-    def _apply(self, d_inputs, d_outputs, d_residuals, mode):
+    def _get_apply_plan(self, d_inputs, d_outputs, d_residuals):
         """
-        Compute matrix-vector product.
+        Return the cached list of matvec operations for the current vectors and scope.
+
+        The plan is built once per (vec_name, input scope, output scope) and contains one
+        entry per subjac that participates in the product, so that _apply doesn't need to
+        repeat name lookups and membership checks on every call.
 
         Parameters
         ----------
@@ -78,81 +85,102 @@ class DictionaryJacobian(Jacobian):
             outputs linear vector.
         d_residuals : Vector
             residuals linear vector.
-        mode : str
-            'fwd' or 'rev'.
+
+        Returns
+        -------
+        list
+            List of (subjac_info, res_name, other_name, is_output, rows, cols, is_identity)
+            tuples.
         """
         # avoid circular import
         from openmdao.core.explicitcomponent import ExplicitComponent
 
-        fwd = mode == 'fwd'
-        system = self._system
+        vec_name = d_residuals._name
+        plan_key = (vec_name, d_inputs._names, d_outputs._names, d_residuals._names)
+        try:
+            return self._apply_plans[plan_key]
+        except KeyError:
+            pass
+
+        is_explicit = isinstance(self._system, ExplicitComponent)
         d_res_names = d_residuals._names
         d_out_names = d_outputs._names
         d_inp_names = d_inputs._names
-        rflat = d_residuals._views_flat
-        oflat = d_outputs._views_flat
-        iflat = d_inputs._views_flat
+        subjacs_info = self._subjacs_info
+
+        plan = []
+        for abs_key in self._iter_abs_keys(vec_name):
+            res_name, other_name = abs_key
+            if res_name not in d_res_names:
+                continue
+            if other_name in d_out_names:
+                is_output = True
+            elif other_name in d_inp_names:
+                is_output = False
+            else:
+                continue
+
+            subjac_info = subjacs_info[abs_key]
+            rows = subjac_info['rows']
+            cols = subjac_info['cols'] if rows is not None else None
+            # skip the matvec mult completely for identity subjacs
+            is_identity = (rows is not None and is_output and is_explicit and
+                           res_name == other_name)
+            plan.append((subjac_info, res_name, other_name, is_output, rows, cols, is_identity))
+
+        self._apply_plans[plan_key] = plan
+        return plan
+
+    def _apply(self, d_inputs, d_outputs, d_residuals, mode):
+        """
+        Compute matrix-vector product.
+
+        Parameters
+        ----------
+        d_inputs : Vector
+            inputs linear vector.
+        d_outputs : Vector
+            outputs linear vector.
+        d_residuals : Vector
+            residuals linear vector.
+        mode : str
+            'fwd' or 'rev'.
+        """
+        fwd = mode == 'fwd'
+        system = self._system
         np_add_at = np.add.at
 
         with system._unscaled_context(outputs=[d_outputs], residuals=[d_residuals]):
+            plan = self._get_apply_plan(d_inputs, d_outputs, d_residuals)
+            if not plan:
+                return
+
             ncol = d_residuals._ncol
-            subjacs_info = self._subjacs_info
-            for abs_key in self._iter_abs_keys(d_residuals._name):
-                subjac_info = subjacs_info[abs_key]
+            rflat = d_residuals._views_flat
+            oflat = d_outputs._views_flat
+            iflat = d_inputs._views_flat
+
+            for subjac_info, res_name, other_name, is_output, rows, cols, is_identity in plan:
+                resvec = rflat[res_name]
+                othervec = oflat[other_name] if is_output else iflat[other_name]
+
+                if is_identity:
+                    if fwd:
+                        resvec -= othervec
+                    else:
+                        othervec -= resvec
+                    continue
+
                 subjac = subjac_info['value']
-                res_name, other_name = abs_key
-                if res_name in d_res_names:
-                    rows = subjac_info['rows']
-                    if rows is not None:  # sparse list format
-                        cols = subjac_info['cols']
-                        if other_name in d_out_names:
-                            # skip the matvec mult completely for identity subjacs
-                            if res_name is other_name and isinstance(system, ExplicitComponent):
-                                if fwd:
-                                    rflat[res_name] -= oflat[other_name]
-                                else:
-                                    oflat[other_name] -= rflat[res_name]
-                            elif fwd:
-                                if ncol > 1:
-                                    for i in range(ncol):
-                                        np_add_at(rflat[res_name][:, i], rows,
-                                                  oflat[other_name][:, i][cols] * subjac)
-                                else:
-                                    np_add_at(rflat[res_name], rows,
-                                              oflat[other_name][cols] * subjac)
-                            else:  # rev
-                                if ncol > 1:
-                                    for i in range(ncol):
-                                        np_add_at(oflat[other_name][:, i], cols,
-                                                  rflat[res_name][:, i][rows] * subjac)
-                                else:
-                                    np_add_at(oflat[other_name], cols,
-                                              rflat[res_name][rows] * subjac)
-                        elif other_name in d_inp_names:
-                            if fwd:
-                                if ncol > 1:
-                                    for i in range(ncol):
-                                        np_add_at(rflat[res_name][:, i], rows,
-                                                  iflat[other_name][:, i][cols] * subjac)
-                                else:
-                                    np_add_at(rflat[res_name], rows,
-                                              iflat[other_name][cols] * subjac)
-                            else:  # rev
-                                if ncol > 1:
-                                    for i in range(ncol):
-                                        np_add_at(iflat[other_name][:, i], cols,
-                                                  rflat[res_name][:, i][rows] * subjac)
-                                else:
-                                    np_add_at(iflat[other_name], cols,
-                                              rflat[res_name][rows] * subjac)
-                    else:  # ndarray or sparse
-                        if other_name in d_out_names:
-                            if fwd:
-                                rflat[res_name] += subjac.dot(oflat[other_name])
-                            else:  # rev
-                                oflat[other_name] += subjac.T.dot(rflat[res_name])
-                        elif other_name in d_inp_names:
-                            if fwd:
-                                rflat[res_name] += subjac.dot(iflat[other_name])
-                            else:  # rev
-                                iflat[other_name] += subjac.T.dot(rflat[res_name])
+                if rows is not None:  # sparse list format
+                    if ncol > 1:
+                        subjac = subjac[:, np.newaxis]
+                    if fwd:
+                        np_add_at(resvec, rows, othervec[cols] * subjac)
+                    else:  # rev
+                        np_add_at(othervec, cols, resvec[rows] * subjac)
+                else:  # ndarray or sparse
+                    if fwd:
+                        resvec += subjac.dot(othervec)
+                    else:  # rev
+                        othervec += subjac.T.dot(resvec)
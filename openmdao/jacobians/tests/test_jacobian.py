@@ -764,6 +764,29 @@ class TestJacobian(unittest.TestCase):
         J = prob.compute_totals(of=['G1.C1.z'], wrt=['indeps.x'])
         assert_rel_error(self, J['G1.C1.z', 'indeps.x'], np.eye(10)*5.0, .0001)
 
+    def test_dictionary_jacobian_apply_plan_reuse(self):
+        size = 5
+        prob = Problem()
+        indeps = prob.model.add_subsystem('indeps', IndepVarComp('x', np.ones(size)))
+        prob.model.add_subsystem('C2', ExecComp('z=2.0*y', y=np.zeros(size), z=np.zeros(size)))
+        prob.model.connect('indeps.x', 'C2.y')
+
+        prob.model.linear_solver = ScipyKrylov()
+        prob.setup(mode='rev')
+        prob.run_model()
+
+        J = prob.compute_totals(of=['C2.z'], wrt=['indeps.x'])
+        assert_rel_error(self, J['C2.z', 'indeps.x'], np.eye(size) * 2.0, 1e-10)
+
+        jac = prob.model.C2._jacobian
+        nplans = len(jac._apply_plans)
+        self.assertTrue(nplans > 0)
+
+        # a second solve at the same point must reuse the cached plans
+        J = prob.compute_totals(of=['C2.z'], wrt=['indeps.x'])
+        assert_rel_error(self, J['C2.z', 'indeps.x'], np.eye(size) * 2.0, 1e-10)
+        self.assertEqual(len(jac._apply_plans), nplans)
+
 
 if __name__ == '__main__':
     unittest.main()
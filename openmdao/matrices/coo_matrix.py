@@ -78,7 +78,15 @@ class COOMatrix(Matrix):
 
             if loc in locations:
                 ind1, ind2, otherkey = locations[loc]
-                if not (src_indices is None and (ind2 - ind1) == delta == full_size):
+                other_info, _, other_src_indices, _, _ = submats[otherkey]
+                # subjacs can share their entries if they're both dense or both have the
+                # same sparsity pattern.
+                if rows is None or other_info['rows'] is None:
+                    same = (ind2 - ind1) == delta == full_size
+                else:
+                    same = (other_src_indices is None and np.array_equal(rows, other_info['rows'])
+                            and np.array_equal(info['cols'], other_info['cols']))
+                if not (src_indices is None and same):
                     raise RuntimeError("Keys %s map to the same sub-jacobian of a CSC or "
                                        "CSR partial jacobian and at least one of them is either "
                                        "not dense or uses src_indices.  This can occur when "
@@ -3,12 +3,39 @@
 import numpy as np
 import scipy.linalg as linalg
 from scipy.optimize import minimize
-from six.moves import zip, range
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import pdist, squareform
+from six.moves import range
 
 from openmdao.surrogate_models.surrogate_model import SurrogateModel
 
 MACHINE_EPSILON = np.finfo(np.double).eps
 
+# Upper bound on the number of entries in the temporary arrays built for one block of
+# prediction points.
+_MAX_BLOCK_ENTRIES = 2 ** 21
+
+
+def _point_blocks(n_pts, entries_per_point):
+    """
+    Split a set of points into blocks whose temporary arrays fit in _MAX_BLOCK_ENTRIES.
+
+    Parameters
+    ----------
+    n_pts : int
+        Number of points.
+    entries_per_point : int
+        Number of temporary array entries needed for each point.
+
+    Yields
+    ------
+    slice
+        Indices of the points in the next block.
+    """
+    block = max(1, _MAX_BLOCK_ENTRIES // max(1, entries_per_point))
+    for start in range(0, n_pts, block):
+        yield slice(start, start + block)
+
 
 class KrigingSurrogate(SurrogateModel):
     """
@@ -23,8 +50,9 @@ class KrigingSurrogate(SurrogateModel):
         Reduced likelyhood parameter: alpha
     eval_rmse : bool
         When true, calculate the root mean square prediction error.
-    L : ndarray
-        Reduced likelyhood parameter: L
+    L : ndarray or None
+        Reduced likelyhood parameter: lower Cholesky factor of the correlation matrix, or None
+        if it was nearly singular.
     n_dims : int
         Number of independents in the surrogate
     n_samples : int
@@ -33,10 +61,16 @@ class KrigingSurrogate(SurrogateModel):
         Nugget smoothing parameter for smoothing noisy data. Represents the variance
         of the input values. If nugget is an ndarray, it must be of the same length
         as the number of training points. Default: 10. * Machine Epsilon
+    S_inv : ndarray or None
+        Reduced likelyhood parameter: regularized inverse eigenvalues of the correlation
+        matrix, used when it is nearly singular.
     sigma2 : ndarray
         Reduced likelyhood parameter: sigma squared
     thetas : ndarray
         Kriging hyperparameters.
+    V : ndarray or None
+        Reduced likelyhood parameter: eigenvectors of the correlation matrix, used when it is
+        nearly singular.
     X : ndarray
         Training input values, normalized.
     X_mean : ndarray
@@ -76,7 +110,9 @@ class KrigingSurrogate(SurrogateModel):
         self.nugget = nugget
 
         self.alpha = np.zeros(0)
-        self.L = np.zeros(0)
+        self.L = None
+        self.V = None
+        self.S_inv = None
         self.sigma2 = np.zeros(0)
 
         # Normalized Training Values
@@ -126,15 +162,21 @@ class KrigingSurrogate(SurrogateModel):
         self.X_mean, self.X_std = X_mean, X_std
         self.Y_mean, self.Y_std = Y_mean, Y_std
 
+        self._fit_hyperparameters()
+
+    def _fit_hyperparameters(self):
+        """
+        Optimize the hyperparameters and compute the reduced likelihood parameters.
+        """
         def _calcll(thetas):
-            """Calculate loglike (callback function)."""
-            loglike = self._calculate_reduced_likelihood_params(np.exp(thetas))[0]
-            return -loglike
+            """Calculate loglike and its gradient wrt log(thetas) (callback function)."""
+            loglike, params = self._calculate_reduced_likelihood_params(np.exp(thetas),
+                                                                        compute_gradient=True)
+            return -loglike, -params['gradient']
 
         bounds = [(np.log(1e-5), np.log(1e5)) for _ in range(self.n_dims)]
 
-        optResult = minimize(_calcll, 1e-1 * np.ones(self.n_dims), method='slsqp',
-                             options={'eps': 1e-3},
+        optResult = minimize(_calcll, 1e-1 * np.ones(self.n_dims), method='slsqp', jac=True,
                              bounds=bounds)
 
         if not optResult.success:
@@ -144,20 +186,26 @@ class KrigingSurrogate(SurrogateModel):
         self.thetas = np.exp(optResult.x)
         _, params = self._calculate_reduced_likelihood_params()
         self.alpha = params['alpha']
-        self.U = params['U']
-        self.S_inv = params['S_inv']
-        self.Vh = params['Vh']
+        self.L = params.get('L')
+        self.V = params.get('V')
+        self.S_inv = params.get('S_inv')
         self.sigma2 = params['sigma2']
 
-    def _calculate_reduced_likelihood_params(self, thetas=None):
+    def _calculate_reduced_likelihood_params(self, thetas=None, compute_gradient=False):
         """
         Calculate quantity with same maximum location as the log-likelihood for a given theta.
 
+        The correlation matrix is factored with a Cholesky decomposition. If it is nearly
+        singular, a Tikhonov-regularized eigendecomposition is used instead.
+
         Parameters
         ----------
         thetas : ndarray, optional
             Given input correlation coefficients. If none given, uses self.thetas
             from training.
+        compute_gradient : bool
+            If True, also compute the gradient of the reduced likelihood with respect to
+            log(thetas) and store it in the returned parameters under 'gradient'.
 
         Returns
         -------
@@ -170,38 +218,88 @@ class KrigingSurrogate(SurrogateModel):
             thetas = self.thetas
 
         X, Y = self.X, self.Y
+        n = self.n_samples
         params = {}
 
         # Correlation Matrix
-        distances = np.zeros((self.n_samples, self.n_dims, self.n_samples))
-        for i in range(self.n_samples):
-            distances[i, :, i + 1:] = np.abs(X[i, ...] - X[i + 1:, ...]).T
-            distances[i + 1:, :, i] = distances[i, :, i + 1:].T
-
-        R = np.exp(-thetas.dot(np.square(distances)))
+        R = squareform(np.exp(-pdist(X * np.sqrt(thetas), 'sqeuclidean')))
         R[np.diag_indices_from(R)] = 1. + self.nugget
 
-        [U, S, Vh] = linalg.svd(R)
-
-        # Penrose-Moore Pseudo-Inverse:
-        # Given A = USV^* and Ax=b, the least-squares solution is
-        # x = V S^-1 U^* b.
-        # Tikhonov regularization is used to make the solution significantly
-        # more robust.
-        h = 1e-8 * S[0]
-        inv_factors = S / (S ** 2. + h ** 2.)
-
-        alpha = Vh.T.dot(np.einsum('j,kj,kl->jl', inv_factors, U, Y))
-        logdet = -np.sum(np.log(inv_factors))
-        sigma2 = np.dot(Y.T, alpha).sum(axis=0) / self.n_samples
-        reduced_likelihood = -(np.log(np.sum(sigma2)) +
-                               logdet / self.n_samples)
+        # Sum of the outputs, which is what sum(sigma2) measures.
+        y_sum = Y.sum(axis=1)
+
+        try:
+            L = linalg.cholesky(R, lower=True)
+        except linalg.LinAlgError:
+            L = None
+        else:
+            rcond, _ = linalg.lapack.dpocon(L, np.abs(R).sum(axis=0).max(), uplo='L')
+            if rcond < 1e-6:
+                L = None
+
+        if L is not None:
+            alpha = linalg.cho_solve((L, True), Y)
+            logdet = 2. * np.sum(np.log(np.diag(L)))
+            params['L'] = L
+        else:
+            # Nearly singular: fall back on an eigendecomposition.
+            # Tikhonov regularization is used to make the solution significantly
+            # more robust.
+            lam, V = linalg.eigh(R)
+            lam[lam == 0.] = np.finfo(float).tiny
+            h = 1e-8 * np.max(np.abs(lam))
+            inv_factors = lam / (lam ** 2. + h ** 2.)
+
+            alpha = V.dot(inv_factors[:, np.newaxis] * V.T.dot(Y))
+            logdet = np.sum(np.log((lam ** 2. + h ** 2.) / np.abs(lam)))
+            params['V'] = V
+            params['S_inv'] = inv_factors
+
+        sigma2 = np.dot(Y.T, alpha).sum(axis=0) / n
+        q = n * np.sum(sigma2)
+        reduced_likelihood = -(np.log(q / n) + logdet / n)
 
         params['alpha'] = alpha
         params['sigma2'] = sigma2 * np.square(self.Y_std)
-        params['S_inv'] = inv_factors
-        params['U'] = U
-        params['Vh'] = Vh
+
+        if compute_gradient:
+            # The gradient of the reduced likelihood with respect to R is W, so the gradient
+            # with respect to log(theta_k) is sum(W * dR/dlog(theta_k)), where
+            # dR/dlog(theta_k) = -theta_k * D_k * R and D_k holds the squared distances between
+            # training points in dimension k.
+            if L is not None:
+                R_inv, _ = linalg.lapack.dpotri(L, lower=True)
+                R_inv = np.tril(R_inv) + np.tril(R_inv, -1).T
+                a = alpha.sum(axis=1)
+                W = np.outer(a, a) / q - R_inv / n
+            else:
+                # Derivatives of the regularized spectral functions, via divided differences
+                # of the eigenvalues.
+                lam2h2 = lam ** 2. + h ** 2.
+                dinv = (h ** 2. - lam ** 2.) / lam2h2 ** 2.
+                dlam = lam[:, np.newaxis] - lam
+                close = np.abs(dlam) <= 1e-8 * np.maximum(np.abs(lam[:, np.newaxis]), h)
+                dlam[close] = 1.
+                gamma = np.where(close, .5 * (dinv[:, np.newaxis] + dinv),
+                                 (inv_factors[:, np.newaxis] - inv_factors) / dlam)
+
+                # Assemble W in the eigenbasis from the contributions of sum(sigma2) and logdet.
+                b = V.T.dot(y_sum)
+                W_eig = gamma * np.outer(b, b) / -q
+                W_eig[np.diag_indices_from(W_eig)] -= (2. * lam / lam2h2 - 1. / lam) / n
+
+                # h is proportional to the largest eigenvalue, so it depends on R too.
+                qh = np.sum(b ** 2 * -2. * h * lam / lam2h2 ** 2.)
+                lh = np.sum(2. * h / lam2h2)
+                i_max = np.argmax(np.abs(lam))
+                W_eig[i_max, i_max] -= 1e-8 * (qh / q + lh / n)
+
+                W = V.dot(W_eig).dot(V.T)
+
+            # The sum over D_k is expanded so the distance tensor is never formed.
+            W *= R
+            WD = 2. * (W.sum(axis=1).dot(np.square(X)) - np.einsum('ik,ik->k', X, W.dot(X)))
+            params['gradient'] = -thetas * WD
 
         return reduced_likelihood, params
 
@@ -227,24 +325,39 @@ class KrigingSurrogate(SurrogateModel):
         if isinstance(x, list):
             x = np.array(x)
         x = np.atleast_2d(x)
-        n_eval = x.shape[0]
 
         # Normalize input
         x_n = (x - self.X_mean) / self.X_std
-
-        r = np.zeros((n_eval, self.n_samples), dtype=x.dtype)
-        for r_i, x_i in zip(r, x_n):
-            r_i[:] = np.exp(-thetas.dot(np.square((x_i - self.X).T)))
-
-        # Scaled Predictor
-        y_t = np.dot(r, self.alpha)
+        n_pts = x_n.shape[0]
+
+        # Complex inputs are allowed so that the predictor can be complex stepped.
+        dtype = np.result_type(x_n, self.alpha)
+        y_t = np.empty((n_pts, self.alpha.shape[1]), dtype=dtype)
+        r_Rinv_r = np.empty(n_pts, dtype=dtype)
+
+        # Points are processed in blocks to bound the size of the temporary arrays.
+        for pts in _point_blocks(n_pts, self.n_samples * self.n_dims):
+            # Correlation of each point with each training point
+            dx = x_n[pts, np.newaxis, :] - self.X
+            r = np.exp(-np.einsum('ijk,ijk,k->ij', dx, dx, thetas))
+
+            # Scaled Predictor
+            y_t[pts] = np.dot(r, self.alpha)
+
+            # Only the diagonal of r R^-1 r^T is needed for the error.
+            if self.eval_rmse:
+                if self.L is not None:
+                    r_scaled = linalg.solve_triangular(self.L, r.T, lower=True)
+                    r_Rinv_r[pts] = np.einsum('ij,ij->j', r_scaled, r_scaled)
+                else:
+                    r_V = r.dot(self.V)
+                    r_Rinv_r[pts] = np.einsum('ij,j,ij->i', r_V, self.S_inv, r_V)
 
         # Predictor
         y = self.Y_mean + self.Y_std * y_t
 
         if self.eval_rmse:
-            mse = (1. - np.dot(np.dot(r, self.Vh.T),
-                               np.einsum('j,kj,lk->jl', self.S_inv, self.U, r))) * self.sigma2
+            mse = (1. - r_Rinv_r)[:, np.newaxis] * self.sigma2
 
             # Forcing negative RMSE to zero if negative due to machine precision
             mse[mse < 0.] = 0.
@@ -281,6 +394,58 @@ class KrigingSurrogate(SurrogateModel):
                         self.X_std, gradr.dot(self.alpha).T)
         return jac
 
+    def vectorized_predict(self, x):
+        """
+        Calculate predicted values of the response at many points at once.
+
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate is evaluated, with one point per row.
+
+        Returns
+        -------
+        ndarray
+            Kriging predictions, with one row per point.
+        ndarray, optional (if eval_rmse is True)
+            Root mean square of the prediction error, with one row per point.
+        """
+        # predict already handles many points, but subclasses may reduce its result
+        return KrigingSurrogate.predict(self, x)
+
+    def vectorized_linearize(self, x):
+        """
+        Calculate the jacobian of the Kriging surface at many points at once.
+
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate Jacobian is evaluated, with one point per row.
+
+        Returns
+        -------
+        ndarray
+            Jacobians of surrogate output wrt inputs, with shape (n_points, n_outputs, n_inputs).
+        """
+        thetas = self.thetas
+
+        # Normalize Input
+        x_n = (np.atleast_2d(x) - self.X_mean) / self.X_std
+        n_pts = x_n.shape[0]
+
+        jac = np.empty((n_pts, self.alpha.shape[1], self.n_dims),
+                       dtype=np.result_type(x_n, self.alpha))
+
+        for pts in _point_blocks(n_pts, self.n_samples * self.n_dims):
+            dx = x_n[pts, np.newaxis, :] - self.X
+            r = np.exp(-np.einsum('ijk,ijk,k->ij', dx, dx, thetas))
+
+            # gradr[i, j, k] is the derivative of r[i, j] wrt the k-th input of point i
+            gradr = -2. * np.einsum('ij,ijk,k->ijk', r, dx, thetas)
+            jac[pts] = np.einsum('o,k,ijk,jo->iok', self.Y_std, 1. / self.X_std, gradr,
+                                 self.alpha)
+        return jac
+
 
 class FloatKrigingSurrogate(KrigingSurrogate):
     """
@@ -305,3 +470,249 @@ class FloatKrigingSurrogate(KrigingSurrogate):
         """
         dist = super(FloatKrigingSurrogate, self).predict(x)
         return dist[0]  # mean value
+
+    def vectorized_predict(self, x):
+        """
+        Calculate the mean predicted values of the response at many points at once.
+
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate is evaluated, with one point per row.
+
+        Returns
+        -------
+        ndarray
+            Mean values of kriging prediction, with one row per point.
+        """
+        dist = super(FloatKrigingSurrogate, self).vectorized_predict(x)
+        if self.eval_rmse:
+            return dist[0]
+        return dist
+
+
+class SparseKrigingSurrogate(KrigingSurrogate):
+    """
+    Surrogate model based on local neighborhood Kriging, for large training sets.
+
+    The hyperparameters are fit on a random subset of at most max_fit_samples training points.
+    Each prediction is then made by Kriging on the num_neighbors training points that are most
+    correlated with it, which are found with a KD-tree. Training cost and memory therefore grow
+    linearly with the number of training points, rather than with its cube and square. The
+    predicted surface is smooth except where the neighborhood changes.
+
+    Attributes
+    ----------
+    max_fit_samples : int
+        Maximum number of training points used to fit the hyperparameters.
+    num_neighbors : int
+        Number of nearest training points used for each prediction.
+    _tree : scipy.spatial.cKDTree
+        KD-tree of the normalized training inputs, scaled by the square root of the thetas.
+    """
+
+    def __init__(self, nugget=10. * MACHINE_EPSILON, eval_rmse=False, num_neighbors=50,
+                 max_fit_samples=500):
+        """
+        Initialize all attributes.
+
+        Parameters
+        ----------
+        nugget : double or ndarray, optional
+            Nugget smoothing parameter for smoothing noisy data. Represents the variance
+            of the input values. If nugget is an ndarray, it must be of the same length
+            as the number of training points. Default: 10. * Machine Epsilon
+        eval_rmse : bool
+            Flag indicating whether the Root Mean Squared Error (RMSE) should be computed.
+            Set to False by default.
+        num_neighbors : int
+            Number of nearest training points used for each prediction.
+        max_fit_samples : int
+            Maximum number of training points used to fit the hyperparameters.
+        """
+        super(SparseKrigingSurrogate, self).__init__(nugget=nugget, eval_rmse=eval_rmse)
+
+        self.num_neighbors = num_neighbors
+        self.max_fit_samples = max_fit_samples
+        self._tree = None
+
+    def _fit_hyperparameters(self):
+        """
+        Fit the hyperparameters on a subset of the training points and build the KD-tree.
+        """
+        X, Y, n = self.X, self.Y, self.n_samples
+        nugget = self.nugget
+
+        if n > self.max_fit_samples:
+            # A fixed seed keeps training reproducible.
+            idx = np.random.RandomState(0).choice(n, self.max_fit_samples, replace=False)
+            self.X, self.Y, self.n_samples = X[idx], Y[idx], self.max_fit_samples
+            if np.ndim(nugget) > 0:
+                self.nugget = np.asarray(nugget)[idx]
+
+        try:
+            super(SparseKrigingSurrogate, self)._fit_hyperparameters()
+        finally:
+            self.X, self.Y, self.n_samples = X, Y, n
+            self.nugget = nugget
+
+        # The global factorization only covers the subset, so it is not kept.
+        self.alpha = np.zeros(0)
+        self.L = self.V = self.S_inv = None
+
+        self._tree = cKDTree(X * np.sqrt(self.thetas))
+
+    def _local_kriging(self, x, compute_gradient=False):
+        """
+        Krige each point from its nearest training points.
+
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate is evaluated, with one point per row.
+        compute_gradient : bool
+            If True, also compute the jacobian at each point.
+
+        Returns
+        -------
+        ndarray
+            Kriging predictions, with one row per point.
+        ndarray
+            Mean square of the prediction error, with one row per point.
+        ndarray or None
+            Jacobians of the outputs wrt inputs, with shape (n_points, n_outputs, n_inputs).
+        """
+        thetas = self.thetas
+        sqrt_thetas = np.sqrt(thetas)
+        n_pts = x.shape[0]
+        n_out = self.Y.shape[1]
+        k = min(self.num_neighbors, self.n_samples)
+
+        # Normalize and scale input, so that distances in the tree give the correlation.
+        x_s = (x - self.X_mean) / self.X_std * sqrt_thetas
+        X_s = self._tree.data
+
+        # Complex inputs are allowed so that the predictor can be complex stepped.
+        dtype = np.result_type(x_s, self.Y)
+        y_t = np.empty((n_pts, n_out), dtype=dtype)
+        r_Rinv_r = np.empty(n_pts, dtype=dtype)
+        jac = np.empty((n_pts, n_out, self.n_dims), dtype=dtype) if compute_gradient else None
+
+        for pts in _point_blocks(n_pts, k * k):
+            # Neighbors only depend on the real part of a complex stepped input.
+            _, idx = self._tree.query(x_s[pts].real, k=k)
+            idx = idx.reshape(-1, k)
+
+            # Local correlation matrices and correlations with the neighbors
+            X_k = X_s[idx]
+            sq_norms = np.einsum('ijl,ijl->ij', X_k, X_k)
+            sq_dist = sq_norms[:, :, np.newaxis] + sq_norms[:, np.newaxis, :] - \
+                2. * np.einsum('ijl,ikl->ijk', X_k, X_k)
+            R = np.exp(-np.maximum(sq_dist, 0.))
+            nugget = self.nugget[idx] if np.ndim(self.nugget) > 0 else self.nugget
+            diag = np.arange(k)
+            R[:, diag, diag] = 1. + nugget
+            dx = x_s[pts, np.newaxis, :] - X_k
+            r = np.exp(-np.einsum('ijl,ijl->ij', dx, dx))
+
+            # Same Tikhonov-regularized inverse as the global fallback, one per point.
+            lam, V = np.linalg.eigh(R)
+            lam[lam == 0.] = np.finfo(float).tiny
+            h = 1e-8 * np.max(np.abs(lam), axis=1, keepdims=True)
+            inv_factors = lam / (lam ** 2. + h ** 2.)
+
+            r_V = np.einsum('ij,ijk->ik', r, V)
+            V_Y = np.einsum('ilk,ilo->iko', V, self.Y[idx])
+            alpha = np.einsum('ijk,ik,iko->ijo', V, inv_factors, V_Y)
+
+            y_t[pts] = np.einsum('ij,ijo->io', r, alpha)
+            r_Rinv_r[pts] = np.einsum('ik,ik,ik->i', r_V, inv_factors, r_V)
+
+            if compute_gradient:
+                # gradr[i, j, l] is the derivative of r[i, j] wrt the l-th input of point i
+                gradr = -2. * r[:, :, np.newaxis] * dx * sqrt_thetas
+                jac[pts] = np.einsum('o,l,ijl,ijo->iol', self.Y_std, 1. / self.X_std,
+                                     gradr, alpha)
+
+        y = self.Y_mean + self.Y_std * y_t
+        mse = (1. - r_Rinv_r)[:, np.newaxis] * self.sigma2
+
+        # Forcing negative MSE to zero if negative due to machine precision
+        mse[mse < 0.] = 0.
+
+        return y, mse, jac
+
+    def predict(self, x):
+        """
+        Calculate predicted value of the response based on the current trained model.
+
+        Parameters
+        ----------
+        x : array-like
+            Point at which the surrogate is evaluated.
+
+        Returns
+        -------
+        ndarray
+            Kriging prediction.
+        ndarray, optional (if eval_rmse is True)
+            Root mean square of the prediction error.
+        """
+        SurrogateModel.predict(self, x)
+
+        y, mse, _ = self._local_kriging(np.atleast_2d(np.asarray(x)))
+
+        if self.eval_rmse:
+            return y, np.sqrt(mse)
+
+        return y
+
+    def linearize(self, x):
+        """
+        Calculate the jacobian of the Kriging surface at the requested point.
+
+        Parameters
+        ----------
+        x : array-like
+            Point at which the surrogate Jacobian is evaluated.
+
+        Returns
+        -------
+        ndarray
+            Jacobian of surrogate output wrt inputs.
+        """
+        return self.vectorized_linearize(x)[0]
+
+    def vectorized_predict(self, x):
+        """
+        Calculate predicted values of the response at many points at once.
+
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate is evaluated, with one point per row.
+
+        Returns
+        -------
+        ndarray
+            Kriging predictions, with one row per point.
+        ndarray, optional (if eval_rmse is True)
+            Root mean square of the prediction error, with one row per point.
+        """
+        return SparseKrigingSurrogate.predict(self, x)
+
+    def vectorized_linearize(self, x):
+        """
+        Calculate the jacobian of the Kriging surface at many points at once.
+
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate Jacobian is evaluated, with one point per row.
+
+        Returns
+        -------
+        ndarray
+            Jacobians of surrogate output wrt inputs, with shape (n_points, n_outputs, n_inputs).
+        """
+        return self._local_kriging(np.atleast_2d(np.asarray(x)), compute_gradient=True)[2]
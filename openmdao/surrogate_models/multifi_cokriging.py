@@ -12,20 +12,28 @@ from scikit-learn package here to avoid scikit-learn dependency.
 
 ISAE/DMSM - ONERA/DCPS
 """
-from six.moves import range
+from six.moves import range, zip
+
+import multiprocessing
 
 import numpy as np
 from numpy import atleast_2d as array2d
 
 from scipy import linalg
 from scipy.optimize import minimize
-from scipy.spatial.distance import squareform
 
 from openmdao.surrogate_models.surrogate_model import MultiFiSurrogateModel
+from openmdao.utils.concurrent import fork_context
 
 import logging
 _logger = logging.getLogger()
 
+# Models whose levels are being fit by forked worker processes, keyed by id.
+_fork_state = {}
+
+# Per-level parameters set by MultiFiCoKriging.rlf.
+_BLUP_PARAMS = ('beta', 'beta_rho', 'beta_regr', 'sigma2', 'C', 'G')
+
 MACHINE_EPSILON = np.finfo(np.double).eps  # machine precision
 NUGGET = 10. * MACHINE_EPSILON  # nugget for robustness
 
@@ -151,14 +159,9 @@ def l1_cross_distances(X, Y=None):
     """
     if Y is None:
         X = array2d(X)
-        n_samples, n_features = X.shape
-        n_nonzero_cross_dist = n_samples * (n_samples - 1) // 2
-        D = np.zeros((n_nonzero_cross_dist, n_features))
-        ll_1 = 0
-        for k in range(n_samples - 1):
-            ll_0 = ll_1
-            ll_1 = ll_0 + n_samples - k - 1
-            D[ll_0:ll_1] = np.abs(X[k] - X[(k + 1):])
+        # Pairs are in the same row-major order as the upper triangle used by squareform.
+        i, j = np.triu_indices(X.shape[0], k=1)
+        D = np.abs(X[i] - X[j])
     else:
         X = array2d(X)
         Y = array2d(Y)
@@ -166,19 +169,34 @@ def l1_cross_distances(X, Y=None):
         n_samples_Y, n_features_Y = Y.shape
         if n_features_X != n_features_Y:
             raise ValueError("X and Y must have the same dimensions.")
-        n_features = n_features_X
 
-        n_nonzero_cross_dist = n_samples_X * n_samples_Y
-        D = np.zeros((n_nonzero_cross_dist, n_features))
-        ll_1 = 0
-        for k in range(n_samples_X):
-            ll_0 = ll_1
-            ll_1 = ll_0 + n_samples_Y  # - k - 1
-            D[ll_0:ll_1] = np.abs(X[k] - Y)
+        D = np.abs(X[:, np.newaxis, :] - Y).reshape(n_samples_X * n_samples_Y, n_features_X)
 
     return D
 
 
+def _max_rlf_worker(args):
+    """
+    Run the maximum likelihood estimation of one fidelity level in a forked worker process.
+
+    Parameters
+    ----------
+    args : tuple
+        Model id, level of fidelity, initial range of the optimizer and tolerance.
+
+    Returns
+    -------
+    dict
+        The solution returned by MultiFiCoKriging._max_rlf, with the BLUP parameters of the
+        level under 'blup'.
+    """
+    model_id, lvl, initial_range, tol = args
+    model = _fork_state[model_id]
+    sol = model._max_rlf(lvl=lvl, initial_range=initial_range, tol=tol)
+    sol['blup'] = [getattr(model, name)[lvl] for name in _BLUP_PARAMS]
+    return sol
+
+
 class MultiFiCoKriging(object):
     """
     Integrate the Multi-Fidelity Co-Kriging method described in [LeGratiet2013].
@@ -233,6 +251,9 @@ class MultiFiCoKriging(object):
         if array_like: An array with shape matching theta0's. It is replicated
         for all levels of code.
         if list: a list of nlevel arrays specifying value for each level
+    num_procs : int or None
+        Number of worker processes used to fit the fidelity levels in parallel. If 1, the
+        levels are fit sequentially. If None, one process per CPU is used.
     _nfev : int
         Number of function evaluations.
 
@@ -288,7 +309,7 @@ class MultiFiCoKriging(object):
     }
 
     def __init__(self, regr='constant', rho_regr='constant',
-                 theta=None, theta0=None, thetaL=None, thetaU=None):
+                 theta=None, theta0=None, thetaL=None, thetaU=None, num_procs=1):
         """
         Initialize all attributes.
 
@@ -340,6 +361,9 @@ class MultiFiCoKriging(object):
             if array_like: An array with shape matching theta0's. It is replicated
             for all levels of code.
             if list: a list of nlevel arrays specifying value for each level
+        num_procs : int or None, optional
+            Number of worker processes used to fit the fidelity levels in parallel. If 1, the
+            levels are fit sequentially. If None, one process per CPU is used.
         """
         self.corr = squared_exponential_correlation
         self.regr = regr
@@ -348,6 +372,7 @@ class MultiFiCoKriging(object):
         self.theta0 = theta0
         self.thetaL = thetaL
         self.thetaU = thetaU
+        self.num_procs = num_procs
 
         self._nfev = 0
 
@@ -368,15 +393,26 @@ class MultiFiCoKriging(object):
         Returns
         -------
         ndarray
-            Correlatioin matrix.
+            Correlatioin matrix. This is the work array of the level, which is overwritten
+            by the next call.
         """
-        D = self.D[lvl]
-        n_samples = self.n_samples[lvl]
-
-        R = np.eye(n_samples) * (1. + NUGGET)
+        if self.corr is squared_exponential_correlation:
+            # Use the squared distances computed in fit.
+            theta = np.asarray(theta, dtype=float).ravel()
+            D2 = self._D2[lvl]
+            if theta.size == 1:
+                theta = np.full(D2.shape[1], theta[0])
+            corr = np.exp(-D2.dot(theta))
+        else:
+            corr = self.corr(theta, self.D[lvl])
 
-        corr = squareform(self.corr(theta, D))
-        R = R + corr
+        # Update the work array in place.
+        R = self._R[lvl]
+        R_flat = R.reshape(-1)
+        upper, lower, diag = self._R_index[lvl]
+        R_flat[upper] = corr
+        R_flat[lower] = corr
+        R_flat[diag] = 1. + NUGGET
 
         return R
 
@@ -416,6 +452,9 @@ class MultiFiCoKriging(object):
         self.beta_regr = nlevel * [None]
         self.C = nlevel * [0]
         self.D = nlevel * [0]
+        self._D2 = nlevel * [None]
+        self._R = nlevel * [None]
+        self._R_index = nlevel * [None]
         self.F = nlevel * [0]
         self.p = nlevel * [0]
         self.q = nlevel * [0]
@@ -441,6 +480,13 @@ class MultiFiCoKriging(object):
                 raise Exception("Multiple input features cannot have the same"
                                 " value.")
 
+            # Reused by every likelihood evaluation during the optimization.
+            self._D2[lvl] = np.square(self.D[lvl])
+            n = n_samples[lvl]
+            i, j = np.triu_indices(n, k=1)
+            self._R[lvl] = np.empty((n, n))
+            self._R_index[lvl] = (i + j * n, j + i * n, np.arange(n) * (n + 1))
+
             # Regression matrix and parameters
             self.F[lvl] = self.regr(X[lvl])
             self.p[lvl] = self.F[lvl].shape[1]
@@ -473,18 +519,41 @@ class MultiFiCoKriging(object):
 
         self.rlf_value = np.zeros(nlevel)
 
+        # The data of each level is fixed, so the levels can be fit independently.
+        mle_levels = [lvl for lvl in range(nlevel) if self.theta[lvl] is None]
+        if len(mle_levels) > 1 and self.num_procs != 1 and fork_context is not None:
+            _fork_state[id(self)] = self
+            num_procs = self.num_procs or multiprocessing.cpu_count()
+            pool = fork_context.Pool(min(num_procs, len(mle_levels)))
+            try:
+                sols = pool.map(_max_rlf_worker,
+                                [(id(self), lvl, initial_range, tol) for lvl in mle_levels])
+            finally:
+                pool.terminate()
+                pool.join()
+                _fork_state.pop(id(self), None)
+        else:
+            sols = [self._max_rlf(lvl=lvl, initial_range=initial_range, tol=tol)
+                    for lvl in mle_levels]
+        sols = dict(zip(mle_levels, sols))
+
         for lvl in range(nlevel):
             # Determine Gaussian Process model parameters
             if self.theta[lvl] is None:
                 # Maximum Likelihood Estimation of the parameters
-                sol = self._max_rlf(
-                    lvl=lvl, initial_range=initial_range, tol=tol)
+                sol = sols[lvl]
+                self._nfev += sol['nfev']
                 self.theta[lvl] = sol['theta']
                 self.rlf_value[lvl] = sol['rlf_value']
 
                 if np.isinf(self.rlf_value[lvl]):
                     raise Exception("Bad parameter region. "
                                     "Try increasing upper bound")
+
+                # Copy back the BLUP parameters from the worker process.
+                if 'blup' in sol:
+                    for name, val in zip(_BLUP_PARAMS, sol['blup']):
+                        getattr(self, name)[lvl] = val
             else:
                 self.rlf_value[lvl] = self.rlf(lvl=lvl)
                 if np.isinf(self.rlf_value[lvl]):
@@ -534,7 +603,7 @@ class MultiFiCoKriging(object):
         R = self._build_R(lvl, theta)
 
         try:
-            C = linalg.cholesky(R, lower=True)
+            C = linalg.cholesky(R, lower=True, check_finite=False)
         except linalg.LinAlgError:
             _logger.warning(('Cholesky decomposition of R at level %i failed' % lvl) +
                             ' with theta=' + str(theta))
@@ -597,6 +666,7 @@ class MultiFiCoKriging(object):
         dict
             res['theta']: optimal theta
             res['rlf_value']: optimal value for likelihood
+            res['nfev']: number of function evaluations
         """
         # Initialize input
         thetaL = self.thetaL[lvl]
@@ -624,13 +694,13 @@ class MultiFiCoKriging(object):
 
         log10_optimal_x = sol['x']
         optimal_rlf_value = sol['fun']
-        self._nfev += sol['nfev']
 
         optimal_theta = 10. ** log10_optimal_x
 
         res = {}
         res['theta'] = optimal_theta
         res['rlf_value'] = optimal_rlf_value
+        res['nfev'] = sol['nfev']
 
         return res
 
@@ -884,7 +954,7 @@ class MultiFiCoKrigingSurrogate(MultiFiSurrogateModel):
 
     def __init__(self, regr='constant', rho_regr='constant',
                  theta=None, theta0=None, thetaL=None, thetaU=None,
-                 tolerance=TOLERANCE_DEFAULT, initial_range=INITIAL_RANGE_DEFAULT):
+                 tolerance=TOLERANCE_DEFAULT, initial_range=INITIAL_RANGE_DEFAULT, num_procs=1):
         """
         Initialize all attributes.
 
@@ -940,13 +1010,17 @@ class MultiFiCoKrigingSurrogate(MultiFiSurrogateModel):
             Optimizer terminates when the tolerance tol is reached.
         initial_range : float
             Initial range for the optimizer.
+        num_procs : int or None
+            Number of worker processes used to fit the fidelity levels in parallel. If 1, the
+            levels are fit sequentially. If None, one process per CPU is used.
         """
         super(MultiFiCoKrigingSurrogate, self).__init__()
 
         self.tolerance = tolerance
         self.initial_range = initial_range
         self.model = MultiFiCoKriging(regr=regr, rho_regr=rho_regr, theta=theta,
-                                      theta0=theta0, thetaL=thetaL, thetaU=thetaU)
+                                      theta0=theta0, thetaL=thetaL, thetaU=thetaU,
+                                      num_procs=num_procs)
 
     def predict(self, new_x):
         """
@@ -5,6 +5,9 @@ https://github.com/SMarone/NDInterp
 """
 
 from collections import OrderedDict
+
+import numpy as np
+
 from openmdao.surrogate_models.surrogate_model import SurrogateModel
 from openmdao.surrogate_models.nn_interpolators.linear_interpolator import \
     LinearInterpolator
@@ -112,3 +115,40 @@ class NearestNeighbor(SurrogateModel):
         if jac.shape[0] == 1 and len(jac.shape) > 2:
             return jac[0, ...]
         return jac
+
+    def vectorized_predict(self, x, **kwargs):
+        """
+        Calculate predicted values of the response at many points at once.
+
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate is evaluated, with one point per row.
+        **kwargs : dict
+            Additional keyword arguments passed to the interpolant.
+
+        Returns
+        -------
+        ndarray
+            Predicted values, with one row per point.
+        """
+        super(NearestNeighbor, self).predict(x)
+        return self.interpolant(np.atleast_2d(x), **kwargs)
+
+    def vectorized_linearize(self, x, **kwargs):
+        """
+        Calculate the jacobian of the interpolant at many points at once.
+
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate Jacobian is evaluated, with one point per row.
+        **kwargs : dict
+            Additional keyword arguments passed to the interpolant.
+
+        Returns
+        -------
+        ndarray
+            Jacobians of surrogate output wrt inputs, with shape (n_points, n_outputs, n_inputs).
+        """
+        return self.interpolant.gradient(np.atleast_2d(x), **kwargs)
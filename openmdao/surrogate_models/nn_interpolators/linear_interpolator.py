@@ -89,9 +89,11 @@ class LinearInterpolator(NNBase):
 
         # KData query takes (data, #ofneighbors) to determine closest
         # training points to predicted data
-        ndist, nloc = self._KData.query(normalized_pts.real, points_needed)
+        ndist, nloc, derived = self._query(normalized_pts, points_needed)
 
-        normal, pc = self._find_hyperplane(nloc)
+        if 'hyperplane' not in derived:
+            derived['hyperplane'] = self._find_hyperplane(nloc)
+        normal, pc = derived['hyperplane']
 
         # Set all predictions from values on plane
         predictions = np.einsum('ij,ijk->ik', normalized_pts,
@@ -108,8 +110,6 @@ class LinearInterpolator(NNBase):
         # Rescale to original units
         predictions = (predictions * self._tvr) + self._tvm
 
-        self._pt_cache = (normalized_pts, ndist, nloc)
-
         return predictions
 
     def gradient(self, prediciton_points):
@@ -137,17 +137,15 @@ class LinearInterpolator(NNBase):
         # Linear interp only uses as many neighbors as it has dimensions
         dims = self._indep_dims + 1
 
-        # Find the neighbors
-        if self._pt_cache is not None and \
-                np.allclose(self._pt_cache[0], normPredPts):
-            ndist, nloc = self._pt_cache[1:]
-        else:
-            ndist, nloc = self._KData.query(normPredPts.real, dims)
+        # Find the neighbors, and the hyperplanes if they were found by the prediction
+        ndist, nloc, derived = self._query(normPredPts, dims)
 
-        normal, pc = self._find_hyperplane(nloc)
+        if 'hyperplane' not in derived:
+            derived['hyperplane'] = self._find_hyperplane(nloc)
+        normal, pc = derived['hyperplane']
         if np.any(normal[:, -1, :]) == 0:
             return gradient
-        gradient[:] = (-normal[:, :-1, :] / normal[:, -1, :]).squeeze().T
+        gradient[:] = np.transpose(-normal[:, :-1, :] / normal[:, -1:, :], (0, 2, 1))
 
         grad = gradient * (self._tvr[:, np.newaxis] / self._tpr)
 
@@ -1,10 +1,22 @@
 """Define the NNBase class."""
 
+from distutils.version import LooseVersion
+
 import numpy as np
 
 from math import ceil
+from scipy import __version__ as scipy_version
 from scipy.spatial import cKDTree
 
+# cKDTree.query renamed its n_jobs argument to workers in scipy 1.6.
+if LooseVersion(scipy_version) >= LooseVersion('1.6'):
+    _WORKERS_ARG = 'workers'
+else:
+    _WORKERS_ARG = 'n_jobs'
+
+# Smallest number of query points for which worker threads are started.
+_MIN_PARALLEL_QUERY = 1000
+
 
 class NNBase(object):
     """
@@ -38,11 +50,15 @@ class NNBase(object):
         Number of training points
     _KData : scipy.spatial.cKDTree
         KDTree used for finding the nearest neighbors.
-    _pt_cache : tuple(ndarray, ndarray, ndarray)
-        Internal cache of the last found neighbors.
+    _num_workers : int
+        Number of threads used by the KDTree to query many points at once. If -1, all CPUs
+        are used.
+    _pt_cache : tuple(ndarray, ndarray, ndarray, dict)
+        Internal cache of the last normalized prediction points, their neighbor distances and
+        indices, and any quantities the interpolant derived from those neighbors.
     """
 
-    def __init__(self, training_points, training_values, num_leaves=2):
+    def __init__(self, training_points, training_values, num_leaves=2, num_workers=1):
         """
         Initialize nearest neighbor interpolant by scaling input to the unit hypercube.
 
@@ -56,6 +72,10 @@ class NNBase(object):
 
         num_leaves : int
             How many leaves the tree should have.
+
+        num_workers : int
+            Number of threads used by the KDTree to query many points at once. If -1, all
+            CPUs are used.
         """
         # training_points and training_values are the known points and their
         # respective values which will be interpolated against.
@@ -82,5 +102,46 @@ class NNBase(object):
         leavesz = ceil(self._ntpts / float(num_leaves))
         self._KData = cKDTree(self._tp, leafsize=leavesz)
 
+        self._num_workers = num_workers
+
         # Cache for gradients
         self._pt_cache = None
+
+    def _query(self, normalized_pts, num_neighbors):
+        """
+        Find the nearest training points, reusing the last result for the same points.
+
+        Parameters
+        ----------
+        normalized_pts : ndarray
+            Normalized prediction points, with one point per row.
+        num_neighbors : int
+            Number of neighbors to find for each point.
+
+        Returns
+        -------
+        ndarray
+            Distances to the neighbors, with shape (num_points, num_neighbors).
+        ndarray
+            Indices of the neighbors, with shape (num_points, num_neighbors).
+        dict
+            Quantities derived from these neighbors that the interpolant has cached.
+        """
+        cache = self._pt_cache
+        if cache is not None and cache[0].shape == normalized_pts.shape and \
+                cache[2].shape[1] == num_neighbors and np.array_equal(cache[0], normalized_pts):
+            return cache[1:]
+
+        npts = normalized_pts.shape[0]
+        kwargs = {}
+        if self._num_workers != 1 and npts >= _MIN_PARALLEL_QUERY:
+            kwargs[_WORKERS_ARG] = self._num_workers
+
+        # The tree ignores any imaginary part used for complex step.
+        ndist, nloc = self._KData.query(normalized_pts.real, num_neighbors, **kwargs)
+        ndist = ndist.reshape(npts, num_neighbors)
+        nloc = nloc.reshape(npts, num_neighbors)
+
+        self._pt_cache = (normalized_pts, ndist, nloc, {})
+
+        return self._pt_cache[1:]
@@ -3,7 +3,6 @@
 import numpy as np
 
 from openmdao.surrogate_models.nn_interpolators.nn_base import NNBase
-from six.moves import range
 from scipy.sparse import csc_matrix
 from scipy.sparse.linalg import spsolve
 
@@ -39,11 +38,10 @@ class RBFInterpolator(NNBase):
 
         Returns
         -------
-        ndarray
-            Evaluation of RBF polynomial.
+        csc_matrix
+            Evaluation of RBF polynomial, with one row per point and one column per training
+            point.
         """
-        R = np.zeros((npp, self._ntpts), dtype="float")
-
         # Choose type of CRBF R matrix
         if self.rbf_family == -1:
             # Comp #1 - a
@@ -165,8 +163,10 @@ class RBFInterpolator(NNBase):
 
         Cb = np.polyval(cb_poly, T)
 
-        for i in range(npp):
-            R[i, neighbor_idx[i, :-1]] = Cf[i, :] * Cb[i, :]
+        # Each point only has nonzeros for its neighbors, excluding the farthest one.
+        rows = np.repeat(np.arange(npp), neighbor_idx.shape[1] - 1)
+        cols = neighbor_idx[:, :-1].ravel()
+        R = csc_matrix(((Cf * Cb).ravel(), (rows, cols)), shape=(npp, self._ntpts))
 
         return R
 
@@ -321,7 +321,7 @@ class RBFInterpolator(NNBase):
         return grad.reshape((prediction_points.shape[0], self._dep_dims, self._indep_dims))
 
     def __init__(self, training_points, training_values, num_leaves=2, num_neighbors=5,
-                 rbf_family=2):
+                 rbf_family=2, num_workers=1):
         """
         Initialize all attributes.
 
@@ -339,8 +339,12 @@ class RBFInterpolator(NNBase):
             Specifies the order of the radial basis function to be used.
             <-2> uses an 11th order, <-1> uses a 9th order, and any value from <0> to <4> uses an
             order equal to <floor((dimensions-1)/2) + (3*comp) +1>.
+        num_workers : int
+            Number of threads used by the KDTree to query many points at once. If -1, all
+            CPUs are used.
         """
-        super(RBFInterpolator, self).__init__(training_points, training_values, num_leaves)
+        super(RBFInterpolator, self).__init__(training_points, training_values, num_leaves,
+                                              num_workers)
 
         if self._ntpts < num_neighbors:
             raise ValueError('RBFInterpolator only given {0} training points, '
@@ -350,11 +354,11 @@ class RBFInterpolator(NNBase):
         self.rbf_family = rbf_family
 
         # For weights, first find the training points radial neighbors
-        tdist, tloc = self._KData.query(self._tp, num_neighbors)
+        tdist, tloc, _ = self._query(self._tp, num_neighbors)
         Tt = tdist[:, :-1] / tdist[:, -1:]
         # Next determine weight matrix
         Rt = self._find_R(self._ntpts, Tt, tloc)
-        weights = (spsolve(csc_matrix(Rt), self._tv))[..., np.newaxis]
+        weights = (spsolve(Rt, self._tv))[..., np.newaxis]
 
         self.N = num_neighbors
         self.weights = weights
@@ -380,7 +384,7 @@ class RBFInterpolator(NNBase):
         normalized_pts = (prediction_points - self._tpm) / self._tpr
         nppts = normalized_pts.shape[0]
         # Setup prediction points and find their radial neighbors
-        ndist, nloc = self._KData.query(normalized_pts, self.N)
+        ndist, nloc, _ = self._query(normalized_pts, self.N)
         # Check if complex step is being run
         if np.any(np.abs(normalized_pts[0, :].imag)) > 0:
             dimdiff = np.subtract(normalized_pts.reshape((nppts, 1, self._indep_dims)),
@@ -392,11 +396,9 @@ class RBFInterpolator(NNBase):
         Tp = ndist[:, :-1] / ndist[:, -1:]
 
         Rp = self._find_R(nppts, Tp, nloc)
-        predz = ((np.dot(Rp, self.weights[..., 0]) * self._tvr) +
+        predz = ((Rp.dot(self.weights[..., 0]) * self._tvr) +
                  self._tvm).reshape(nppts, self._dep_dims)
 
-        self._pt_cache = (normalized_pts, ndist, nloc)
-
         return predz
 
     def gradient(self, prediction_points):
@@ -419,11 +421,7 @@ class RBFInterpolator(NNBase):
 
         normalized_pts = (prediction_points - self._tpm) / self._tpr
         # Setup prediction points and find their radial neighbors
-        if self._pt_cache is not None and \
-                np.allclose(self._pt_cache[0], normalized_pts):
-            pdist, ploc = self._pt_cache[1:]
-        else:
-            pdist, ploc = self._KData.query(normalized_pts, self.N)
+        pdist, ploc, _ = self._query(normalized_pts, self.N)
 
         # Find Gradient
         grad = self._find_dR(normalized_pts[:, np.newaxis, :], ploc,
@@ -1,12 +1,11 @@
-
 """
 Surrogate Model based on second order response surface equations.
 """
 
-from numpy import zeros, einsum
+from numpy import zeros, einsum, atleast_2d, result_type, asarray, hstack, vstack, triu_indices
 from numpy.dual import lstsq
+from numpy.linalg import qr
 from openmdao.surrogate_models.surrogate_model import SurrogateModel
-from six.moves import range
 
 
 class ResponseSurface(SurrogateModel):
@@ -21,6 +20,10 @@ class ResponseSurface(SurrogateModel):
         Number of training points.
     n : int
         Number of independent variables.
+    _qr_r : ndarray or None
+        Triangular factor of the QR decomposition of the training terms augmented with the
+        training responses. It holds all that is needed from the training points to update
+        the least squares solution when more are added.
     """
 
     def __init__(self):
@@ -33,6 +36,7 @@ class ResponseSurface(SurrogateModel):
         self.n = 0  # number of independents
         # vector of response surface equation coefficients
         self.betas = zeros(0)
+        self._qr_r = None
 
     def train(self, x, y):
         """
@@ -45,12 +49,67 @@ class ResponseSurface(SurrogateModel):
         y : array-like
             Model responses at given inputs.
         """
+        self.m = 0
+        self._qr_r = None
+        self.update(x, y)
+
+    def update(self, x, y):
+        """
+        Add training points and update the response surface equation coefficients.
+
+        The least squares problem is kept as a QR factorization, which is updated with the
+        new rows only, so the cost does not depend on the number of earlier training points.
+        If the surrogate has not been trained yet, this is the same as train.
+
+        Parameters
+        ----------
+        x : array-like
+            Training input locations to add.
+        y : array-like
+            Model responses at given inputs.
+        """
         super(ResponseSurface, self).train(x, y)
 
-        m = self.m = x.shape[0]
-        n = self.n = x.shape[1]
+        x = atleast_2d(x)
+        y = asarray(y)
+
+        if self._qr_r is None:
+            self.n = x.shape[1]
+        elif x.shape[1] != self.n:
+            raise ValueError("ResponseSurface was trained with {0} inputs, but {1} were "
+                             "given.".format(self.n, x.shape[1]))
 
-        X = zeros((m, ((n + 1) * (n + 2)) // 2))
+        self.m += x.shape[0]
+
+        # Rows of the least squares problem, with the responses as extra columns
+        rows = hstack((self._terms(x), y.reshape(x.shape[0], -1)))
+        if self._qr_r is not None:
+            rows = vstack((self._qr_r, rows))
+        self._qr_r = qr(rows, mode='r')
+
+        # Determine response surface equation coefficients (betas) using least
+        # squares. This gives the same minimum norm solution as the full problem.
+        p = ((self.n + 1) * (self.n + 2)) // 2
+        betas = lstsq(self._qr_r[:p, :p], self._qr_r[:p, p:])[0]
+        self.betas = betas.reshape((p,) + y.shape[1:])
+
+    def _terms(self, x):
+        """
+        Compute the constant, linear and quadratic terms of the response surface at each point.
+
+        Parameters
+        ----------
+        x : ndarray
+            Points at which the terms are evaluated, with one point per row.
+
+        Returns
+        -------
+        ndarray
+            Terms of the response surface equation, with one row per point.
+        """
+        m, n = x.shape
+
+        X = zeros((m, ((n + 1) * (n + 2)) // 2), dtype=result_type(x, 1.0))
 
         # Modify X to include constant, squared terms and cross terms
 
@@ -60,18 +119,11 @@ class ResponseSurface(SurrogateModel):
         # Linear Terms
         X[:, 1:n + 1] = x
 
-        # Quadratic Terms
-        X_offset = X[:, n + 1:]
-        for i in range(n):
-            # Z = einsum('i,ij->ij', X, Y) is equivalent to, but much faster and
-            # memory efficient than, diag(X).dot(Y) for vector X and 2D array Y.
-            # I.e. Z[i,j] = X[i]*Y[i,j]
-            X_offset[:, :n - i] = einsum('i,ij->ij', x[:, i], x[:, i:])
-            X_offset = X_offset[:, n - i:]
+        # Quadratic Terms, ordered by the first and then the second index
+        i, j = triu_indices(n)
+        X[:, n + 1:] = x[:, i] * x[:, j]
 
-        # Determine response surface equation coefficients (betas) using least
-        # squares
-        self.betas, rs, r, s = lstsq(X, y)
+        return X
 
     def predict(self, x):
         """
@@ -89,51 +141,68 @@ class ResponseSurface(SurrogateModel):
         """
         super(ResponseSurface, self).predict(x)
 
-        n = x.size
+        # Predict new_y using X and betas
+        return self._terms(asarray(x).reshape(1, self.n)).dot(self.betas)[0]
+
+    def linearize(self, x):
+        """
+        Calculate the jacobian of the Kriging surface at the requested point.
 
-        X = zeros(((self.n + 1) * (self.n + 2)) // 2)
+        Parameters
+        ----------
+        x : array-like
+            Point at which the surrogate Jacobian is evaluated.
 
-        # Modify X to include constant, squared terms and cross terms
+        Returns
+        -------
+        ndarray
+            Jacobian of surrogate output wrt inputs.
+        """
+        return self.vectorized_linearize(asarray(x).reshape(1, self.n))[0]
 
-        # Constant Terms
-        X[0] = 1.0
+    def vectorized_predict(self, x):
+        """
+        Calculate predicted values of the response at many points at once.
 
-        # Linear Terms
-        X[1:n + 1] = x
+        Parameters
+        ----------
+        x : array-like
+            Points at which the surrogate is evaluated, with one point per row.
 
-        # Quadratic Terms
-        X_offset = X[n + 1:]
-        for i in range(n):
-            X_offset[:n - i] = x[i] * x[i:]
-            X_offset = X_offset[n - i:]
+        Returns
+        -------
+        ndarray
+            Predicted responses, with one row per point.
+        """
+        super(ResponseSurface, self).predict(x)
 
-        # Predict new_y using X and betas
-        return X.dot(self.betas)
+        return self._terms(atleast_2d(x)).dot(self.betas)
 
-    def linearize(self, x):
+    def vectorized_linearize(self, x):
         """
-        Calculate the jacobian of the Kriging surface at the requested point.
+        Calculate the jacobian of the response surface at many points at once.
 
         Parameters
         ----------
         x : array-like
-            Point at which the surrogate Jacobian is evaluated.
+            Points at which the surrogate Jacobian is evaluated, with one point per row.
 
         Returns
         -------
         ndarray
-            Jacobian of surrogate output wrt inputs.
+            Jacobians of surrogate output wrt inputs, with shape (n_points, n_outputs, n_inputs).
         """
         n = self.n
-        betas = self.betas
+        betas = self.betas.reshape(self.betas.shape[0], -1)
+        x = atleast_2d(x)
 
-        x = x.flat
+        # The quadratic terms are x^T A x with A upper triangular, so the gradient of
+        # each output is its linear coefficients plus (A + A^T) x.
+        i, j = triu_indices(n)
+        H = zeros((n, n, betas.shape[1]), dtype=betas.dtype)
+        H[i, j] = betas[n + 1:]
+        H += H.transpose((1, 0, 2))
 
-        jac = betas[1:n + 1, :].copy()
-        beta_offset = betas[n + 1:, :]
-        for i in range(n):
-            jac[i, :] += x[i:].dot(beta_offset[:n - i, :])
-            jac[i:, :] += x[i] * beta_offset[:n - i, :]
-            beta_offset = beta_offset[n - i:, :]
+        jac = betas[1:n + 1].T + einsum('ij,kjo->iok', x, H)
 
-        return jac.T
+        return jac
@@ -50,10 +50,29 @@ class SurrogateModel(object):
         """
         Calculate predicted values of the response based on the current trained model.
 
+        Surrogates that can evaluate many points at once should override this method. It is
+        used by MetaModelUnStructuredComp when vec_size is greater than 1.
+
+        Parameters
+        ----------
+        x : array-like
+            Vectorized point(s) at which the surrogate is evaluated, with one point per row.
+        """
+        pass
+
+    def vectorized_linearize(self, x):
+        """
+        Calculate the jacobian of the interpolant at many points at once.
+
+        Surrogates that can linearize many points at once should override this method and
+        return an array of shape (n_points, n_outputs, n_inputs). It is used by
+        MetaModelUnStructuredComp when vec_size is greater than 1.
+
         Parameters
         ----------
         x : array-like
-            Vectorized point(s) at which the surrogate is evaluated.
+            Vectorized point(s) at which the surrogate Jacobian is evaluated, with one point
+            per row.
         """
         pass
 
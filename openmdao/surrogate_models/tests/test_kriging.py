@@ -5,7 +5,8 @@ import unittest
 import itertools
 import numpy as np
 
-from openmdao.api import KrigingSurrogate
+from openmdao.api import KrigingSurrogate, SparseKrigingSurrogate
+from openmdao.surrogate_models import kriging
 from openmdao.utils.assert_utils import assert_rel_error
 from six.moves import zip
 
@@ -149,5 +150,111 @@ class TestKrigingSurrogate(unittest.TestCase):
         jac = surrogate.linearize(np.array([[0.5, 0.5]]))
         assert_rel_error(self, jac, np.array([[1, 1], [1, -1], [1, 2]]), 5e-4)
 
+    def test_blocked_predict(self):
+        np.random.seed(0)
+        x = np.random.rand(30, 2)
+        y = np.column_stack([np.sin(3. * x.sum(axis=1)), x[:, 0] * x[:, 1]])
+
+        surrogate = KrigingSurrogate(eval_rmse=True)
+        surrogate.train(x, y)
+
+        new_x = np.random.rand(25, 2)
+        mu, sigma = surrogate.predict(new_x)
+        jac = surrogate.vectorized_linearize(new_x)
+
+        # Force the points to be split over several blocks.
+        max_entries = kriging._MAX_BLOCK_ENTRIES
+        kriging._MAX_BLOCK_ENTRIES = 4 * 30 * 2
+        try:
+            blocked_mu, blocked_sigma = surrogate.predict(new_x)
+            blocked_jac = surrogate.vectorized_linearize(new_x)
+        finally:
+            kriging._MAX_BLOCK_ENTRIES = max_entries
+
+        assert_rel_error(self, blocked_mu, mu, 1e-12)
+        assert_rel_error(self, blocked_sigma, sigma, 1e-6)
+        assert_rel_error(self, blocked_jac, jac, 1e-12)
+
+        for x0, mu0, sigma0 in zip(new_x, mu, sigma):
+            point_mu, point_sigma = surrogate.predict(x0)
+            assert_rel_error(self, point_mu, [mu0], 1e-12)
+            assert_rel_error(self, point_sigma, [sigma0], 1e-6)
+
+    def test_likelihood_gradient(self):
+        np.random.seed(0)
+        x = np.random.rand(50, 3)
+        y = np.column_stack([np.sin(3. * x.sum(axis=1)), x[:, 0] * x[:, 2]])
+
+        surrogate = KrigingSurrogate()
+        surrogate.train(x, y)
+
+        for thetas in [np.array([0.5, 2., 10.]), np.ones(3), 5. * np.ones(3)]:
+            llh, params = surrogate._calculate_reduced_likelihood_params(thetas,
+                                                                         compute_gradient=True)
+            fd = np.zeros(3)
+            for k in range(3):
+                log_thetas = np.log(thetas)
+                log_thetas[k] += 1e-6
+                fd[k] = (surrogate._calculate_reduced_likelihood_params(
+                    np.exp(log_thetas))[0] - llh) / 1e-6
+
+            assert_rel_error(self, params['gradient'], fd, 1e-4)
+
+
+class TestSparseKrigingSurrogate(unittest.TestCase):
+
+    def test_matches_kriging(self):
+        # With every training point in the neighborhood, it reduces to the global model.
+        np.random.seed(0)
+        x = np.random.rand(40, 2) * 15. - [5., 0.]
+        y = np.array([[branin(case), case[0] * case[1]] for case in x])
+
+        kriging = KrigingSurrogate(eval_rmse=True)
+        kriging.train(x, y)
+        sparse = SparseKrigingSurrogate(eval_rmse=True, num_neighbors=40)
+        sparse.train(x, y)
+
+        new_x = np.random.rand(5, 2) * 15. - [5., 0.]
+        mu, sigma = kriging.predict(new_x)
+        sparse_mu, sparse_sigma = sparse.predict(new_x)
+
+        assert_rel_error(self, sparse_mu, mu, 1e-8)
+        assert_rel_error(self, sparse_sigma, sigma, 1e-6)
+        assert_rel_error(self, sparse.vectorized_linearize(new_x),
+                         kriging.vectorized_linearize(new_x), 1e-8)
+
+    def test_large_training_set(self):
+        np.random.seed(0)
+        x = np.random.rand(5000, 2) * 15. - [5., 0.]
+        y = np.array([[branin(case)] for case in x])
+
+        surrogate = SparseKrigingSurrogate(num_neighbors=30, max_fit_samples=200)
+        surrogate.train(x, y)
+
+        new_x = np.random.rand(50, 2) * 15. - [5., 0.]
+        assert_rel_error(self, surrogate.predict(new_x),
+                         np.array([[branin(case)] for case in new_x]), 1e-3)
+
+        jac = surrogate.linearize(new_x[0])
+        fd = np.array([(surrogate.predict(new_x[0] + 1e-6 * step) -
+                        surrogate.predict(new_x[0])) / 1e-6 for step in np.eye(2)])
+        assert_rel_error(self, jac, fd.T[0], 1e-4)
+
+    def test_complex_step(self):
+        np.random.seed(0)
+        x = np.random.rand(200, 2) * 15. - [5., 0.]
+        y = np.array([[branin(case), case[0] * case[1]] for case in x])
+
+        surrogate = SparseKrigingSurrogate(eval_rmse=True, num_neighbors=30)
+        surrogate.train(x, y)
+
+        x0 = np.array([2., 7.])
+        jac = surrogate.linearize(x0)
+        for i, step in enumerate(np.eye(2) * 1e-30j):
+            mu, sigma = surrogate.predict(x0 + step)
+            assert_rel_error(self, mu.imag[0] / 1e-30, jac[:, i], 1e-8)
+            self.assertEqual(surrogate.vectorized_linearize(x0 + step).dtype, complex)
+
+
 if __name__ == "__main__":
     unittest.main()
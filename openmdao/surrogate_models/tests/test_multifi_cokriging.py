@@ -1,6 +1,9 @@
 import unittest
+import numpy as np
 from numpy import array, sin, cos, pi, ones
 from openmdao.api import MultiFiCoKrigingSurrogate
+from openmdao.surrogate_models.multifi_cokriging import l1_cross_distances
+from openmdao.utils.concurrent import fork_context
 from openmdao.utils.assert_utils import assert_rel_error
 
 class CoKrigingSurrogateTest(unittest.TestCase):
@@ -170,6 +173,43 @@ class CoKrigingSurrogateTest(unittest.TestCase):
         else:
             self.fail("ValueError Expected")
 
+    def test_l1_cross_distances(self):
+        np.random.seed(0)
+        x = np.random.rand(6, 3)
+        y = np.random.rand(4, 3)
+
+        expected = [np.abs(x[i] - x[j]) for i in range(6) for j in range(i + 1, 6)]
+        assert_rel_error(self, l1_cross_distances(x), np.array(expected), 1e-15)
+
+        expected = [np.abs(x[i] - y[j]) for i in range(6) for j in range(4)]
+        assert_rel_error(self, l1_cross_distances(x, y), np.array(expected), 1e-15)
+
+    @unittest.skipIf(fork_context is None, "requires a platform that supports os.fork")
+    def test_parallel_levels(self):
+        np.random.seed(0)
+        x_hi = np.random.rand(8, 2)
+        x_mid = np.vstack((np.random.rand(12, 2), x_hi))
+        x_lo = np.vstack((np.random.rand(20, 2), x_mid))
+
+        def f(x):
+            return sin(6. * x[:, 0]) + x[:, 1] ** 2
+
+        x = [x_hi, x_mid, x_lo]
+        y = [f(x_hi), 0.8 * f(x_mid) + x_mid[:, 0], 0.5 * f(x_lo) - x_lo[:, 1]]
+
+        serial = MultiFiCoKrigingSurrogate()
+        serial.train_multifi(x, y)
+        parallel = MultiFiCoKrigingSurrogate(num_procs=3)
+        parallel.train_multifi(x, y)
+
+        for theta, parallel_theta in zip(serial.model.theta, parallel.model.theta):
+            assert_rel_error(self, parallel_theta, theta, 1e-12)
+        self.assertEqual(parallel.model._nfev, serial.model._nfev)
+
+        for new_x in [[2. / 3., 1. / 3.], [0.2, 0.9]]:
+            for actual, expected in zip(parallel.predict(new_x), serial.predict(new_x)):
+                assert_rel_error(self, actual, expected, 1e-12)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -17,6 +17,23 @@ class TestNearestNeighbor(unittest.TestCase):
 
         self.assertEqual(expected_msg, str(cm.exception))
 
+    def test_parallel_query(self):
+        np.random.seed(0)
+        x = np.random.rand(200, 2)
+        y = np.column_stack([np.sin(x.sum(axis=1)), x[:, 0] * x[:, 1]])
+        test_x = np.random.rand(1500, 2)
+
+        for interpolant_type in ['linear', 'weighted', 'rbf']:
+            serial = NearestNeighbor(interpolant_type=interpolant_type)
+            serial.train(x, y)
+            parallel = NearestNeighbor(interpolant_type=interpolant_type, num_workers=2)
+            parallel.train(x, y)
+
+            assert_rel_error(self, parallel.vectorized_predict(test_x),
+                             serial.vectorized_predict(test_x), 1e-12)
+            assert_rel_error(self, parallel.vectorized_linearize(test_x),
+                             serial.vectorized_linearize(test_x), 1e-12)
+
 
 class TestLinearInterpolator1D(unittest.TestCase):
     def setUp(self):
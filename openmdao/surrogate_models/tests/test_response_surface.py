@@ -137,6 +137,34 @@ class TestResponseSurfaceSurrogate(unittest.TestCase):
         jac = surrogate.linearize(array([[0.5, 0.5]]))
         assert_rel_error(self, jac, array([[1, 1], [1, -1]]), 1e-5)
 
+    def test_update(self):
+        x = array([[a, b] for a, b in
+                   itertools.product(linspace(0, 1, 6), repeat=2)])
+        y = array([[branin(case), a * b] for case, (a, b) in zip(x, x)])
+
+        full = ResponseSurface()
+        full.train(x, y)
+
+        # Starting from too few points for a unique fit, add the rest in batches.
+        surrogate = ResponseSurface()
+        surrogate.update(x[:4], y[:4])
+        surrogate.update(x[4:20], y[4:20])
+        surrogate.update(x[20:], y[20:])
+
+        self.assertEqual(surrogate.m, x.shape[0])
+        assert_rel_error(self, surrogate.betas, full.betas, 1e-10)
+
+        new_x = array([[0.3, 0.8], [0.55, 0.1]])
+        assert_rel_error(self, surrogate.vectorized_predict(new_x),
+                         full.vectorized_predict(new_x), 1e-10)
+        assert_rel_error(self, surrogate.vectorized_linearize(new_x),
+                         full.vectorized_linearize(new_x), 1e-10)
+
+        # Retraining discards the earlier points.
+        surrogate.train(x, y)
+        self.assertEqual(surrogate.m, x.shape[0])
+        assert_rel_error(self, surrogate.betas, full.betas, 1e-10)
+
 
 if __name__ == "__main__":
     unittest.main()
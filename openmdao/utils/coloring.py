@@ -5,23 +5,32 @@ from __future__ import division, print_function
 
 import os
 import sys
+import json
+import hashlib
+import tempfile
 import time
 import warnings
 from collections import OrderedDict, defaultdict
-from itertools import combinations
+from itertools import product, chain
+from heapq import heapify, heappush, heappop
 from distutils.version import LooseVersion
 
-from six import iteritems
+from six import iteritems, itervalues
 from six.moves import range
 
 import numpy as np
 from numpy.random import rand
 from scipy.sparse.compressed import get_index_dtype
-from scipy.sparse import coo_matrix
+from scipy.sparse import coo_matrix, csr_matrix, csc_matrix, diags
+
+try:
+    from scipy.sparse.csgraph import maximum_bipartite_matching
+except ImportError:
+    maximum_bipartite_matching = None
 
 from openmdao.jacobians.jacobian import Jacobian
 from openmdao.matrices.matrix import sparse_types
-from openmdao.utils.array_utils import array_viz
+from openmdao.utils.array_utils import array_viz, convert_neg
 from openmdao.utils.mpi import MPI
 
 # If this is True, then IF simul coloring/sparsity is specified, use it.
@@ -113,6 +122,53 @@ class _SubjacRandomizer(object):
         self._orig_set_abs(key, subjac)
 
 
+def _to_sparse_bool(J, fmt='csc'):
+    """
+    Return a boolean scipy sparse matrix of the given format for the sparsity matrix J.
+
+    Parameters
+    ----------
+    J : ndarray or sparse matrix
+        Jacobian sparsity matrix.
+    fmt : str
+        Sparse format, either 'csc' or 'csr'.
+
+    Returns
+    -------
+    csc_matrix or csr_matrix
+        Boolean sparsity matrix with sorted indices and no explicit zeros.
+    """
+    if fmt == 'csc':
+        J = csc_matrix(J, dtype=bool)
+    else:
+        J = csr_matrix(J, dtype=bool)
+    J.eliminate_zeros()
+    J.sort_indices()
+    return J
+
+
+def _drop_diag(mat):
+    """
+    Return a copy of square sparse matrix mat in CSR format without its diagonal entries.
+
+    Parameters
+    ----------
+    mat : sparse matrix
+        Square sparse matrix.
+
+    Returns
+    -------
+    csr_matrix
+        Boolean matrix with no diagonal entries.
+    """
+    mat = mat.tocoo()
+    keep = mat.row != mat.col
+    mat = csr_matrix((np.ones(np.count_nonzero(keep), dtype=bool),
+                      (mat.row[keep], mat.col[keep])), shape=mat.shape)
+    mat.sort_indices()
+    return mat
+
+
 def _order_by_ID(col_matrix):
     """
     Return columns in order of incidence degree (ID).
@@ -121,15 +177,17 @@ def _order_by_ID(col_matrix):
 
     Parameters
     ----------
-    col_matrix : ndarray
-        Boolean array of column dependencies.
+    col_matrix : csr_matrix
+        Boolean sparse array of column dependencies.
 
     Yields
     ------
     int
         Column index.
     """
-    degrees = _count_nonzeros(col_matrix, axis=0)
+    indptr = col_matrix.indptr
+    indices = col_matrix.indices
+    degrees = np.diff(indptr)
     ncols = degrees.size
 
     if ncols == 0:
@@ -138,47 +196,116 @@ def _order_by_ID(col_matrix):
     # use max degree column as a starting point instead of just choosing a random column
     # since all have incidence degree of 0 when we start.
     start = degrees.argmax()
-    yield start
 
-    colored_degrees = np.zeros(degrees.size, dtype=get_index_dtype(maxval=degrees[start]))
-    colored_degrees[col_matrix[start]] += 1
-    colored_degrees[start] = -ncols  # ensure that this col will never have max degree again
+    # heap of (-incidence degree, col).  Stale entries are skipped when popped, so this
+    # picks the same column as an argmax over the current incidence degrees.
+    colored_degrees = np.zeros(ncols, dtype=int)
+    done = np.zeros(ncols, dtype=bool)
+    heap = [(0, c) for c in range(ncols) if c != start]
+    col = start
 
-    for i in range(ncols - 1):
-        col = colored_degrees.argmax()
-        colored_degrees[col_matrix[col]] += 1
-        colored_degrees[col] = -ncols  # ensure that this col will never have max degree again
+    while True:
         yield col
+        done[col] = True
+        nbrs = indices[indptr[col]:indptr[col + 1]]
+        nbrs = nbrs[~done[nbrs]]
+        colored_degrees[nbrs] += 1
+        for c, d in zip(nbrs.tolist(), colored_degrees[nbrs].tolist()):
+            heappush(heap, (-d, c))
+
+        while heap:
+            d, col = heappop(heap)
+            if not done[col] and -d == colored_degrees[col]:
+                break
+        else:
+            return
 
 
-def _J2col_matrix(J):
+def _order_largest_first(col_matrix):
     """
-    Convert boolean jacobian sparsity matrix to a column adjacency matrix.
+    Return columns in order of decreasing degree.
 
     Parameters
     ----------
-    J : ndarray
-        Boolean jacobian sparsity matrix.
+    col_matrix : csr_matrix
+        Boolean sparse array of column dependencies.
 
     Returns
     -------
     ndarray
-        Column adjacency matrix.
+        Column indices.
+    """
+    return np.argsort(-np.diff(col_matrix.indptr), kind='mergesort')
+
+
+def _order_smallest_last(col_matrix):
+    """
+    Return columns in smallest last order.
+
+    The column with the smallest degree is repeatedly removed from the graph and the columns
+    are colored in the reverse order of removal.
+
+    Parameters
+    ----------
+    col_matrix : csr_matrix
+        Boolean sparse array of column dependencies.
+
+    Returns
+    -------
+    list
+        Column indices.
     """
-    nrows, ncols = J.shape
+    indptr = col_matrix.indptr
+    indices = col_matrix.indices
+    degrees = np.diff(indptr)
+    ncols = degrees.size
 
-    col_matrix = np.zeros((ncols, ncols), dtype=bool)
+    removed = np.zeros(ncols, dtype=bool)
+    heap = list(zip(degrees.tolist(), range(ncols)))
+    heapify(heap)
+    order = []
 
-    # mark col_matrix entries as True when nonzero row entries make them dependent
-    for row in range(nrows):
-        nzro = np.nonzero(J[row])[0]
-        for col in nzro:
-            col_matrix[col, nzro] = True
+    while heap:
+        d, col = heappop(heap)
+        if removed[col] or d != degrees[col]:
+            continue
+        removed[col] = True
+        order.append(col)
+        nbrs = indices[indptr[col]:indptr[col + 1]]
+        nbrs = nbrs[~removed[nbrs]]
+        degrees[nbrs] -= 1
+        for c, d in zip(nbrs.tolist(), degrees[nbrs].tolist()):
+            heappush(heap, (d, c))
 
-    # zero out diagonal (column is not adjacent to itself)
-    np.fill_diagonal(col_matrix, False)
+    order.reverse()
+    return order
 
-    return col_matrix
+
+_col_orderings = {
+    'incidence_degree': _order_by_ID,
+    'largest_first': _order_largest_first,
+    'smallest_last': _order_smallest_last,
+}
+
+
+def _J2col_matrix(J):
+    """
+    Convert boolean jacobian sparsity matrix to a column adjacency matrix.
+
+    Two columns are adjacent if they share a nonzero row, i.e. the structure of J^T J.
+
+    Parameters
+    ----------
+    J : ndarray or sparse matrix
+        Boolean jacobian sparsity matrix.
+
+    Returns
+    -------
+    csr_matrix
+        Boolean column adjacency matrix.
+    """
+    J = _to_sparse_bool(J)
+    return _drop_diag(J.T.dot(J))
 
 
 def _Jc2col_matrix_direct(J, Jc):
@@ -192,90 +319,104 @@ def _Jc2col_matrix_direct(J, Jc):
 
     Parameters
     ----------
-    J : ndarray
+    J : ndarray or sparse matrix
         Boolean jacobian sparsity matrix.
-    Jc : ndarray
+    Jc : ndarray or sparse matrix
         Boolean sparsity matrix of a partition of J.
 
     Returns
     -------
-    ndarray
-        Column adjacency matrix.
+    csr_matrix
+        Boolean column adjacency matrix.
     """
     assert J.shape == Jc.shape
 
-    nrows, ncols = J.shape
-
-    col_matrix = np.zeros((ncols, ncols), dtype=bool)
-
-    col_keep = _count_nonzeros(Jc, axis=0) > 0
-
-    # mark col_matrix[col1, col2] as True when Jc[row, col1] is True OR Jc[row, col2] is True
-    for row in range(nrows):
-        nzro = np.nonzero(J[row] & col_keep)[0]
-        for col1, col2 in combinations(nzro, 2):
-            if Jc[row, col1] or Jc[row, col2]:
-                col_matrix[col1, col2] = True
-                col_matrix[col2, col1] = True
+    J = _to_sparse_bool(J)
+    Jc = _to_sparse_bool(Jc)
 
-    # zero out diagonal (column is not adjacent to itself)
-    np.fill_diagonal(col_matrix, False)
+    # only columns having nonzeros in Jc take part
+    col_keep = np.diff(Jc.indptr) > 0
+    J = J.dot(diags(col_keep, dtype=bool, format='csc'))
 
-    return col_matrix
+    # col1 and col2 are adjacent when a row has nonzeros in both of them in J and
+    # Jc[row, col1] is True OR Jc[row, col2] is True
+    JcTJ = Jc.T.dot(J)
+    return _drop_diag(JcTJ + JcTJ.T)
 
 
-def _get_full_disjoint_cols(J):
+def _get_full_disjoint_cols(J, order='incidence_degree'):
     """
     Find sets of disjoint columns in J and their corresponding rows using a col adjacency matrix.
 
     Parameters
     ----------
-    J : ndarray
+    J : ndarray or sparse matrix
         The total jacobian.
+    order : str
+        Column ordering used by the greedy coloring.
 
     Returns
     -------
     list
         List of lists of disjoint columns
     """
-    return _get_full_disjoint_col_matrix_cols(_J2col_matrix(J))
+    return _get_full_disjoint_col_matrix_cols(_J2col_matrix(J), order)
 
 
-def _get_full_disjoint_col_matrix_cols(col_matrix):
+def _get_full_disjoint_col_matrix_cols(col_matrix, order='incidence_degree'):
     """
     Find sets of disjoint columns in a column intersection matrix.
 
+    Each column gets the smallest color not used by any of its neighbors, visiting the
+    columns in the given order.
+
     Parameters
     ----------
-    col_matrix : ndarray
-        Column intersection matrix
+    col_matrix : csr_matrix
+        Boolean sparse column intersection matrix.
+    order : str
+        Column ordering used by the greedy coloring.  One of 'incidence_degree',
+        'largest_first' or 'smallest_last'.
 
     Returns
     -------
     list
         List of lists of disjoint columns
     """
+    try:
+        ordering = _col_orderings[order]
+    except KeyError:
+        raise ValueError("Unknown column ordering '%s'. Valid orderings are %s." %
+                         (order, sorted(_col_orderings)))
+
+    col_matrix = csr_matrix(col_matrix, dtype=bool)
+    indptr = col_matrix.indptr
+    indices = col_matrix.indices
+    ncols = col_matrix.shape[1]
+
     color_groups = []
-    _, ncols = col_matrix.shape
 
     # -1 indicates that a column has not been colored
     colors = np.full(ncols, -1, dtype=get_index_dtype(maxval=ncols))
 
-    for col in _order_by_ID(col_matrix):
-        neighbor_colors = set(colors[col_matrix[col]])
-        for color, grp in enumerate(color_groups):
-            if color not in neighbor_colors:
-                grp.append(col)
-                colors[col] = color
-                break
-        else:
-            colors[col] = len(color_groups)
+    # forbidden[color] == col + 1 means that color is used by a neighbor of col
+    forbidden = np.zeros(ncols + 1, dtype=get_index_dtype(maxval=ncols + 1))
+
+    for col in ordering(col_matrix):
+        nbr_colors = colors[indices[indptr[col]:indptr[col + 1]]]
+        forbidden[nbr_colors[nbr_colors >= 0]] = col + 1
+        ngroups = len(color_groups)
+        color = np.argmax(forbidden[:ngroups + 1] != col + 1)
+        if color == ngroups:
             color_groups.append([col])
+        else:
+            color_groups[color].append(col)
+        colors[col] = color
 
     return color_groups
 
 
-def _color_partition(J, Jpart):
+def _color_partition(J, Jpart, order='incidence_degree'):
     """
     Compute a single directional fwd coloring using partition Jpart.
 
@@ -283,10 +424,12 @@ def _color_partition(J, Jpart):
 
     Parameters
     ----------
-    J : ndarray
-        Dense jacobian sparsity matrix
-    Jpart : ndarray
+    J : ndarray or sparse matrix
+        Jacobian sparsity matrix
+    Jpart : ndarray or sparse matrix
         Partition of the jacobian sparsity matrix.
+    order : str
+        Column ordering used by the greedy coloring.
 
     Returns
     -------
@@ -295,33 +438,30 @@ def _color_partition(J, Jpart):
     list
         List of nonzero rows for each column.
     """
+    Jpart = _to_sparse_bool(Jpart)
     ncols = Jpart.shape[1]
-    col_nonzeros = _count_nonzeros(Jpart, axis=0)
-    row_nonzeros = _count_nonzeros(Jpart, axis=1)
-    col_keep = col_nonzeros > 0
-    row_keep = row_nonzeros > 0
+    col_keep = np.diff(Jpart.indptr) > 0
 
     # use this to map indices back to the full J indices.
     idxmap = np.arange(ncols, dtype=int)[col_keep]
 
     intersection_mat = _Jc2col_matrix_direct(J, Jpart)
-    intersection_mat = intersection_mat[col_keep]
-    intersection_mat = intersection_mat[:, col_keep]
+    intersection_mat = intersection_mat[idxmap][:, idxmap]
 
-    col_groups = _get_full_disjoint_col_matrix_cols(intersection_mat)
+    col_groups = _get_full_disjoint_col_matrix_cols(intersection_mat, order)
 
     for i, group in enumerate(col_groups):
-        col_groups[i] = sorted([idxmap[c] for c in group if col_keep[idxmap[c]]])
+        col_groups[i] = sorted(idxmap[group].tolist())
     col_groups = _split_groups(col_groups)
 
     col2row = [None] * ncols
     for col in idxmap:
-        col2row[col] = [r for r in np.nonzero(Jpart[:, col])[0] if row_keep[r]]
+        col2row[col] = Jpart.indices[Jpart.indptr[col]:Jpart.indptr[col + 1]]
 
     return [col_groups, col2row]
 
 
-def MNCO_bidir(J):
+def MNCO_bidir(J, order='incidence_degree'):
     """
     Compute bidirectional coloring using Minimum Nonzero Count Order (MNCO).
 
@@ -331,8 +471,10 @@ def MNCO_bidir(J):
 
     Parameters
     ----------
-    J : ndarray
-        Dense Jacobian sparsity matrix
+    J : ndarray or sparse matrix
+        Jacobian sparsity matrix
+    order : str
+        Column ordering used by the greedy coloring of each partition.
 
     Returns
     -------
@@ -346,15 +488,33 @@ def MNCO_bidir(J):
                 col_maps is a list of nonzero cols for each row, or None for uncolored rows.
             dict['sparsity'] = a nested dict specifying subjac sparsity for each total derivative.
     """
-    nrows, ncols = J.shape
-
-    M_col_nonzeros = _count_nonzeros(J, axis=0)
-    M_row_nonzeros = _count_nonzeros(J, axis=1)
-
-    M = coo_matrix(J)
-    M_rows = M.row
-    M_cols = M.col
-    M = None  # we don't need sparse matrix data array, so clean up memory
+    Jcsr = _to_sparse_bool(J, 'csr')
+    Jcsc = Jcsr.tocsc()
+    Jcsc.sort_indices()
+    nrows, ncols = Jcsr.shape
+
+    M_col_nonzeros = np.diff(Jcsc.indptr)
+    M_row_nonzeros = np.diff(Jcsr.indptr)
+
+    # rows/cols that have not yet been moved into Jc/Jr
+    row_alive = np.ones(nrows, dtype=bool)
+    col_alive = np.ones(ncols, dtype=bool)
+    nnz_left = Jcsr.nnz
+
+    # heaps of (nonzero count, index).  Stale entries are skipped when popped, so these
+    # select the same row/col as an argmin over the current nonzero counts.
+    row_heap = list(zip(M_row_nonzeros.tolist(), range(nrows)))
+    col_heap = list(zip(M_col_nonzeros.tolist(), range(ncols)))
+    heapify(row_heap)
+    heapify(col_heap)
+
+    def _argmin(heap, counts, alive, none_left):
+        while heap:
+            nnz, i = heap[0]
+            if alive[i] and nnz == counts[i]:
+                return i, nnz
+            heappop(heap)
+        return 0, none_left  # make sure we don't pick this one
 
     Jc_rows = [None] * nrows
     Jr_cols = [None] * ncols
@@ -363,74 +523,72 @@ def MNCO_bidir(J):
 
     # partition J into Jc and Jr
     # We build Jc from bottom up and Jr from right to left.
-    r = M_row_nonzeros.argmin()
-    c = M_col_nonzeros.argmin()
-
-    nnz_r = M_row_nonzeros[r]
-    nnz_c = M_col_nonzeros[c]
+    r, nnz_r = _argmin(row_heap, M_row_nonzeros, row_alive, ncols)
+    c, nnz_c = _argmin(col_heap, M_col_nonzeros, col_alive, nrows)
 
     Jc_nz_max = 0   # max row nonzeros in Jc
     Jr_nz_max = 0   # max col nonzeros in Jr
 
-    while M_rows.size + M_cols.size > 0:
+    while nnz_left > 0:
         if Jr_nz_max + max(Jc_nz_max, nnz_r) < (Jc_nz_max + max(Jr_nz_max, nnz_c)):
-            Jc_rows[r] = M_cols[M_rows == r]
+            cols = Jcsr.indices[Jcsr.indptr[r]:Jcsr.indptr[r + 1]]
+            Jc_rows[r] = cols = cols[col_alive[cols]]
             Jc_nz_max = max(nnz_r, Jc_nz_max)
 
-            keep = M_rows != r
-            M_rows = M_rows[keep]
-            M_cols = M_cols[keep]
+            row_alive[r] = False
+            nnz_left -= cols.size
+            M_col_nonzeros[cols] -= 1
+            for i, nnz in zip(cols.tolist(), M_col_nonzeros[cols].tolist()):
+                heappush(col_heap, (nnz, i))
 
-            M_row_nonzeros[r] = ncols  # make sure we don't pick this one again
-            M_col_nonzeros[Jc_rows[r]] -= 1
-
-            r = M_row_nonzeros.argmin()
-            nnz_r = M_row_nonzeros[r]
+            r, nnz_r = _argmin(row_heap, M_row_nonzeros, row_alive, ncols)
 
             row_i += 1
         else:
-            Jr_cols[c] = M_rows[M_cols == c]
+            rows = Jcsc.indices[Jcsc.indptr[c]:Jcsc.indptr[c + 1]]
+            Jr_cols[c] = rows = rows[row_alive[rows]]
             Jr_nz_max = max(nnz_c, Jr_nz_max)
 
-            keep = M_cols != c
-            M_rows = M_rows[keep]
-            M_cols = M_cols[keep]
-
-            M_col_nonzeros[c] = nrows  # make sure we don't pick this one again
-            M_row_nonzeros[Jr_cols[c]] -= 1
+            col_alive[c] = False
+            nnz_left -= rows.size
+            M_row_nonzeros[rows] -= 1
+            for i, nnz in zip(rows.tolist(), M_row_nonzeros[rows].tolist()):
+                heappush(row_heap, (nnz, i))
 
-            c = M_col_nonzeros.argmin()
-            nnz_c = M_col_nonzeros[c]
+            c, nnz_c = _argmin(col_heap, M_col_nonzeros, col_alive, nrows)
 
             col_i += 1
 
     coloring = {}
 
     nnz_Jc = nnz_Jr = 0
-    jac = np.zeros(J.shape, dtype=bool)
 
     if row_i > 0:
-        Jc = jac
         # build Jc and do fwd coloring on it
-        for i, cols in enumerate(Jc_rows):
-            if cols is not None:
-                Jc[i][cols] = True
-                nnz_Jc += len(cols)
+        rows = [np.full(cols.size, i, dtype=int) for i, cols in enumerate(Jc_rows)
+                if cols is not None]
+        cols = [cols for cols in Jc_rows if cols is not None]
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        nnz_Jc = rows.size
+        Jc = coo_matrix((np.ones(nnz_Jc, dtype=bool), (rows, cols)), shape=Jcsr.shape)
 
-        coloring['fwd'] = _color_partition(J, Jc)
-        jac[:] = False
+        coloring['fwd'] = _color_partition(Jcsc, Jc, order)
 
     if col_i > 0:
-        Jr = jac
         # build Jr and do rev coloring
-        for i, rows in enumerate(Jr_cols):
-            if rows is not None:
-                Jr[rows, i] = True
-                nnz_Jr += len(rows)
-
-        coloring['rev'] = _color_partition(J.T, Jr.T)
-
-    if np.count_nonzero(J) != nnz_Jc + nnz_Jr:
+        cols = [np.full(rows.size, i, dtype=int) for i, rows in enumerate(Jr_cols)
+                if rows is not None]
+        rows = [rows for rows in Jr_cols if rows is not None]
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        nnz_Jr = rows.size
+        JrT = coo_matrix((np.ones(nnz_Jr, dtype=bool), (cols, rows)),
+                         shape=(ncols, nrows))
+
+        coloring['rev'] = _color_partition(Jcsr.T, JrT, order)
+
+    if Jcsr.nnz != nnz_Jc + nnz_Jr:
         raise RuntimeError("Nonzero mismatch for J vs. Jc and Jr")
 
     # _check_coloring(J, coloring)
@@ -483,7 +641,25 @@ def _tol_sweep(arr, tol=1e-15, orders=5):
     return good_tol, len(sorted_items[0][1]), n_tested, sorted_items[0][0]
 
 
-def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=False):
+def _perturb_design_vars(driver, desvar_vals):
+    """
+    Set the design variables to a random point near the given values, within their bounds.
+
+    Parameters
+    ----------
+    driver : <Driver>
+        Driver that owns the design variables.
+    desvar_vals : dict
+        Driver scaled design variable values keyed by name.
+    """
+    for name, val in iteritems(desvar_vals):
+        meta = driver._designvars[name]
+        step = .1 * np.maximum(np.abs(val), 1.) * (rand(*np.shape(val)) - .5)
+        driver.set_design_var(name, np.clip(val + step, meta['lower'], meta['upper']))
+
+
+def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=False,
+                  structural=False):
     """
     Return a boolean version of the total jacobian.
 
@@ -492,7 +668,12 @@ def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=F
     then converting to a boolean array, specifying all entries below a tolerance as False and all
     others as True.  Prior to calling _compute_totals, all of the partial jacobians in the
     model are modified so that when any of their subjacobians are assigned a value, that
-    value is populated with positive random numbers in the range [1.0, 2.0).
+    value is populated with positive random numbers in the range [1.0, 2.0).  If the model
+    approximates its totals, the approximated values are used instead.
+
+    If structural is True, the jacobian is instead computed from the declared partial sparsity
+    without any linear solves, falling back to the numerical computation if the model structure
+    doesn't allow it.
 
     Parameters
     ----------
@@ -510,6 +691,8 @@ def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=F
         If True, run setup before calling compute_totals.
     run_model : bool
         If True, run run_model before calling compute_totals.
+    structural : bool
+        If True, compute the jacobian structure from the declared partial sparsity.
 
     Returns
     -------
@@ -526,12 +709,32 @@ def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=F
     if run_model:
         prob.run_model()
 
+    if structural:
+        if prob._setup_status < 2:
+            prob.final_setup()
+        boolJ = _get_structural_bool_jac(prob)
+        if boolJ is not None:
+            return boolJ
+        print("\nStructural sparsity is not available for this model, so it will be "
+              "computed numerically.")
+
+    # when the model approximates its totals, the partials aren't used, and randomizing the
+    # approximated totals would hide their sparsity. Instead, the repeats sample the totals at
+    # random points around the current design, so that entries that happen to be zero at one
+    # point aren't mistaken for structural zeros.
+    randomize = not prob.model._owns_approx_jac
+    if not randomize:
+        desvar_vals = {name: np.copy(val)
+                       for name, val in iteritems(prob.driver.get_design_var_values())}
+        saved_vecs = [(vec, vec._data.copy()) for vec in
+                      (prob.model._inputs, prob.model._outputs, prob.model._residuals)]
+
     seen = set()
     for system in prob.model.system_iter(recurse=True, include_self=True):
         jac = system._assembled_jac
         if jac is None:
             jac = system._jacobian
-        if jac is not None and jac not in seen:
+        if randomize and jac is not None and jac not in seen:
             # replace jacobian set_abs with one that replaces all subjacs with random numbers
             jac._set_abs = _SubjacRandomizer(jac, tol)
             seen.add(jac)
@@ -548,6 +751,9 @@ def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=F
     start_time = time.time()
     fullJ = None
     for i in range(repeats):
+        if i > 0 and not randomize:
+            _perturb_design_vars(prob.driver, desvar_vals)
+            prob.model.run_solve_nonlinear()
         J = prob.driver._compute_totals(return_format='array', of=of, wrt=wrt)
         if fullJ is None:
             fullJ = np.abs(J)
@@ -555,6 +761,11 @@ def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=F
             fullJ += np.abs(J)
     elapsed = time.time() - start_time
 
+    if not randomize:
+        # restore the model to the current design
+        for vec, data in saved_vecs:
+            vec._data[:] = data
+
     # normalize the full J by dividing by the max value
     fullJ /= np.max(fullJ)
 
@@ -572,7 +783,7 @@ def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=F
         jac = system._assembled_jac
         if jac is None:
             jac = system._jacobian
-        if jac is not None and jac not in seen:
+        if randomize and jac is not None and jac not in seen:
             randomizer = jac._set_abs
             jac._set_abs = randomizer._orig_set_abs
             seen.add(jac)
@@ -586,6 +797,186 @@ def _get_bool_jac(prob, repeats=3, tol=1e-15, orders=5, setup=False, run_model=F
     return boolJ
 
 
+def _flat_src_indices(meta_in, meta_out):
+    """
+    Return the flat source indices of a connected input, or None if it has no src_indices.
+
+    Parameters
+    ----------
+    meta_in : dict
+        Metadata of the input.
+    meta_out : dict
+        Metadata of the connected output.
+
+    Returns
+    -------
+    ndarray or None
+        Flat indices into the connected output.
+    """
+    src_indices = meta_in['src_indices']
+    if src_indices is None:
+        return None
+
+    shape_in = meta_in['shape']
+    shape_out = meta_out['shape']
+    src_indices = np.array(src_indices, dtype=int)
+    if src_indices.ndim == 1 or len(shape_out) == 1 or shape_in == src_indices.shape:
+        return convert_neg(src_indices.ravel(), meta_out['global_size'])
+
+    entries = [list(range(x)) for x in shape_in]
+    cols = np.vstack(src_indices[i] for i in product(*entries))
+    dimidxs = [convert_neg(cols[:, i], shape_out[i]) for i in range(cols.shape[1])]
+    return np.ravel_multi_index(dimidxs, shape_out)
+
+
+def _get_structural_bool_jac(prob):
+    """
+    Return a boolean version of the total jacobian computed from declared partial sparsity.
+
+    The declared rows/cols of every partial jacobian are mapped through the connections to
+    build the boolean structure of the model's linear system, dR/du, over all outputs.  The
+    structure of the total jacobian is then found, without any linear solves, by repeatedly
+    multiplying the boolean structure with the design variable seeds until no new nonzeros
+    appear.  If some residuals don't depend on their own output (as with many implicit
+    components), the rows are first permuted using a maximum bipartite matching so that the
+    diagonal is structurally nonzero.
+
+    Parameters
+    ----------
+    prob : Problem
+        The Problem being analyzed.
+
+    Returns
+    -------
+    ndarray or None
+        The boolean total jacobian, or None if the structure can't be determined this way,
+        e.g., if the model contains matrix free components or approximated groups or if
+        running under MPI.
+    """
+    # avoid circular import
+    from openmdao.core.component import Component
+    from openmdao.core.explicitcomponent import ExplicitComponent
+
+    model = prob.model
+    driver = prob.driver
+
+    if MPI or model.matrix_free:
+        return None
+
+    start_time = time.time()
+
+    for system in model.system_iter(recurse=True, include_self=True):
+        if system._owns_approx_jac and not isinstance(system, Component):
+            return None
+
+    abs2meta = model._var_allprocs_abs2meta
+    loc_abs2meta = model._var_abs2meta
+    in2out = model._conn_global_abs_in2out
+
+    # global offsets of all outputs
+    offsets = {}
+    n = 0
+    for name in model._var_allprocs_abs_names['output']:
+        if abs2meta[name]['distributed']:
+            return None
+        offsets[name] = n
+        n += abs2meta[name]['size']
+
+    rows = []
+    cols = []
+    src_cache = {}
+
+    for comp in model.system_iter(recurse=True, typ=Component):
+        if isinstance(comp, ExplicitComponent):
+            # the residual of an explicit output always depends on the output itself
+            for name in comp._var_abs_names['output']:
+                diag = np.arange(offsets[name], offsets[name] + abs2meta[name]['size'])
+                rows.append(diag)
+                cols.append(diag)
+
+        for (of, wrt), meta in iteritems(comp._subjacs_info):
+            if wrt in offsets:
+                src_offset = offsets[wrt]
+                src_idxs = None
+            elif wrt in in2out:
+                src = in2out[wrt]
+                src_offset = offsets[src]
+                if wrt not in src_cache:
+                    src_cache[wrt] = _flat_src_indices(loc_abs2meta[wrt], loc_abs2meta[src])
+                src_idxs = src_cache[wrt]
+            else:  # unconnected input
+                continue
+
+            if meta['rows'] is None:
+                r, c = np.indices(meta['shape'], dtype=int)
+                r = r.ravel()
+                c = c.ravel()
+            else:
+                r = meta['rows']
+                c = meta['cols']
+
+            if src_idxs is not None:
+                c = src_idxs[c]
+
+            rows.append(r + offsets[of])
+            cols.append(c + src_offset)
+
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    A = coo_matrix((np.ones(rows.size), (rows, cols)), shape=(n, n)).tocsr()
+    A.sum_duplicates()
+    A.data[:] = 1.0
+
+    if np.all(A.diagonal()):
+        col2res = np.arange(n, dtype=int)
+    else:
+        if maximum_bipartite_matching is None:
+            return None
+        # col2res[j] is the residual matched to output j
+        col2res = maximum_bipartite_matching(A, perm_type='row')
+        if np.any(col2res < 0):  # structurally singular
+            return None
+        A = A[col2res]
+
+    res2col = np.empty(n, dtype=int)
+    res2col[col2res] = np.arange(n, dtype=int)
+
+    wrt = list(driver._designvars)
+    of = driver._get_ordered_nl_responses()
+
+    if not of or not wrt:
+        raise RuntimeError("Sparsity structure cannot be computed without declaration of design "
+                           "variables and responses.")
+
+    def _voi_idxs(names, meta):
+        idxs = []
+        for name in names:
+            inds = meta[name]['indices']
+            if inds is None:
+                inds = np.arange(abs2meta[name]['size'], dtype=int)
+            idxs.append(offsets[name] + convert_neg(np.array(inds, dtype=int),
+                                                    abs2meta[name]['size']))
+        return np.concatenate(idxs)
+
+    seeds = res2col[_voi_idxs(wrt, driver._designvars)]
+    nseeds = seeds.size
+    S = csc_matrix((np.ones(nseeds), (seeds, np.arange(nseeds))), shape=(n, nseeds))
+
+    # propagate the seeds until nothing new is reached
+    nnz = -1
+    while S.nnz != nnz:
+        nnz = S.nnz
+        S = A.dot(S)
+        S.data[:] = 1.0
+
+    boolJ = S.tocsr()[_voi_idxs(of, driver._responses)].toarray().astype(bool)
+
+    print("\nStructural sparsity computed in %f seconds." % (time.time() - start_time))
+    print("Total jacobian shape:", boolJ.shape, "\n")
+
+    return boolJ
+
+
 def _sparsity_from_jac(J, of, wrt, driver):
     """
     Given a boolean total jacobian and a driver, compute subjac sparsity.
@@ -723,11 +1114,11 @@ def _write_coloring(modes, color_info, stream):
         stream.write("],\n[\n")
         last_idx = len(nonzero_entries) - 1
         for i, nonzeros in enumerate(nonzero_entries):
-            if isinstance(nonzeros, np.ndarray):
-                # convert to list to make json serializable
-                stream.write("   %s" % list(nonzeros))
-            else:  # a full slice
+            if nonzeros is None or isinstance(nonzeros, slice):  # a full slice
                 stream.write("   %s" % none)
+            else:
+                # convert to list of ints to make json serializable
+                stream.write("   %s" % [int(j) for j in nonzeros])
 
             if i < last_idx:
                 stream.write(",")
@@ -774,7 +1165,7 @@ def _json2coloring(coloring):
 
 
 def get_sparsity(problem, mode='fwd', repeats=1, tol=1.e-15, show_jac=False,
-                 setup=False, run_model=False, stream=sys.stdout):
+                 setup=False, run_model=False, stream=sys.stdout, structural=False):
     """
     Compute derivative sparsity for the given problem.
 
@@ -796,6 +1187,9 @@ def get_sparsity(problem, mode='fwd', repeats=1, tol=1.e-15, show_jac=False,
         If True, run setup before calling compute_totals.
     run_model : bool
         If True, run run_model before calling compute_totals.
+    structural : bool
+        If True, compute the sparsity from the declared partial sparsity instead of from
+        randomized total jacobians, if possible.
 
     Returns
     -------
@@ -805,7 +1199,7 @@ def get_sparsity(problem, mode='fwd', repeats=1, tol=1.e-15, show_jac=False,
     driver = problem.driver
 
     J = _get_bool_jac(problem, repeats=repeats, tol=tol, setup=setup,
-                      run_model=run_model)
+                      run_model=run_model, structural=structural)
 
     of = driver._get_ordered_nl_responses()
     wrt = list(driver._designvars)
@@ -937,16 +1331,19 @@ def _split_groups(groups):
     return clists
 
 
-def _compute_coloring(J, mode):
+def _compute_coloring(J, mode, order='incidence_degree'):
     """
     Compute a good coloring in a specified dominant direction.
 
     Parameters
     ----------
-    J : ndarray
+    J : ndarray or sparse matrix
         The boolean total jacobian.
     mode : str
         The direction for solving for total derivatives.  If 'auto', use bidirectional coloring.
+    order : str
+        Column ordering used by the greedy coloring.  One of 'incidence_degree',
+        'largest_first' or 'smallest_last'.
 
     Returns
     -------
@@ -960,29 +1357,27 @@ def _compute_coloring(J, mode):
                 col_maps is a list of nonzero cols for each row, or None for uncolored rows.
             dict['sparsity'] = a nested dict specifying subjac sparsity for each total derivative.
     """
-    bidirectional = mode == 'auto'
-    rev = mode == 'rev'
-    nrows, ncols = J.shape
+    if mode == 'auto':
+        return MNCO_bidir(J, order)
 
-    if bidirectional:
-        return MNCO_bidir(J)
+    J = _to_sparse_bool(J)
+    if mode == 'rev':
+        J = _to_sparse_bool(J.T)
 
-    if rev:
-        J = J.T
-    col_groups = _split_groups(_get_full_disjoint_cols(J))
+    col_groups = _split_groups(_get_full_disjoint_cols(J, order))
 
     full_slice = slice(None)
     col2rows = [full_slice] * J.shape[1]  # will contain list of nonzero rows for each column
     for lst in col_groups:
         for col in lst:
-            col2rows[col] = np.nonzero(J[:, col])[0]
+            col2rows[col] = J.indices[J.indptr[col]:J.indptr[col + 1]]
 
     return {mode: [col_groups, col2rows]}
 
 
 def get_simul_meta(problem, mode=None, repeats=1, tol=1.e-15, show_jac=False,
                    include_sparsity=True, setup=False, run_model=False, bool_jac=None,
-                   stream=sys.stdout):
+                   stream=sys.stdout, structural=False, order='incidence_degree'):
     """
     Compute simultaneous derivative colorings for the given problem.
 
@@ -1005,10 +1400,16 @@ def get_simul_meta(problem, mode=None, repeats=1, tol=1.e-15, show_jac=False,
         If True, run setup before calling compute_totals.
     run_model : bool
         If True, run run_model before calling compute_totals.
-    bool_jac : ndarray
+    bool_jac : ndarray or sparse matrix
         If problem is not supplied, a previously computed boolean jacobian can be used.
     stream : file-like or None
         Stream where output coloring info will be written.
+    structural : bool
+        If True, compute the total jacobian sparsity from the declared partial sparsity
+        instead of from randomized total jacobians, if possible.
+    order : str
+        Column ordering used by the greedy coloring.  One of 'incidence_degree',
+        'largest_first' or 'smallest_last'.
 
     Returns
     -------
@@ -1034,7 +1435,7 @@ def get_simul_meta(problem, mode=None, repeats=1, tol=1.e-15, show_jac=False,
                                (mode, problem._mode))
         start_time = time.time()
         J = _get_bool_jac(problem, repeats=repeats, tol=tol, setup=setup,
-                          run_model=run_model)
+                          run_model=run_model, structural=structural)
         time_sparsity = time.time() - start_time
 
         if include_sparsity or (show_jac and stream is not None):
@@ -1055,7 +1456,7 @@ def get_simul_meta(problem, mode=None, repeats=1, tol=1.e-15, show_jac=False,
         raise RuntimeError("You must supply either problem or bool_jac to get_simul_meta().")
 
     start_time = time.time()
-    coloring = _compute_coloring(J, mode)
+    coloring = _compute_coloring(J, mode, order)
 
     coloring['time_coloring'] = time.time() - start_time
     coloring['time_sparsity'] = time_sparsity
@@ -1114,10 +1515,277 @@ def simul_coloring_summary(color_info, stream=sys.stdout):
                      (tot_colors, tot_size, pct))
 
 
+def _structure_hash(driver, kind, mode, include_sparsity=False, structural=False):
+    """
+    Return a hash of the parts of the model that determine total jacobian sparsity.
+
+    The hash covers the design variables, responses, output sizes, connections (including
+    src_indices), component types, declared partial sparsity and ExecComp expressions. It
+    doesn't cover code that determines which entries of a dense subjac are nonzero, such as a
+    user's compute_partials, so numerically computed data loaded from the cache is checked
+    against a freshly computed total jacobian before it is used.
+
+    Parameters
+    ----------
+    driver : <Driver>
+        The driver performing the optimization.
+    kind : str
+        Kind of cached data, e.g., 'coloring' or 'sparsity'.
+    mode : str
+        Derivative direction.
+    include_sparsity : bool
+        True if the cached coloring includes the total jacobian sparsity.
+    structural : bool
+        True if the sparsity is computed from declared partial sparsity.
+
+    Returns
+    -------
+    str
+        Hex digest of the model structure.
+    """
+    # avoid circular import
+    from openmdao.core.component import Component
+
+    model = driver._problem.model
+    abs2meta = model._var_allprocs_abs2meta
+    loc_abs2meta = model._var_abs2meta
+
+    h = hashlib.sha1()
+
+    def _update(*args):
+        for arg in args:
+            if isinstance(arg, np.ndarray):
+                h.update(str((arg.dtype.str, arg.shape)).encode('utf-8'))
+                h.update(np.ascontiguousarray(arg).tobytes())
+            else:
+                h.update(str(arg).encode('utf-8'))
+            h.update(b'|')
+
+    def _idxs(idxs):
+        return None if idxs is None else np.asarray(idxs, dtype=int)
+
+    _update(kind, mode, include_sparsity, structural)
+
+    for name, meta in iteritems(driver._designvars):
+        _update('dv', name, meta['size'], _idxs(meta['indices']))
+
+    for name in driver._get_ordered_nl_responses():
+        meta = driver._responses[name]
+        _update('resp', name, meta['size'], _idxs(meta['indices']))
+
+    for name in model._var_allprocs_abs_names['output']:
+        _update('out', name, abs2meta[name]['size'], abs2meta[name]['distributed'])
+
+    for tgt, src in sorted(iteritems(model._conn_global_abs_in2out)):
+        meta = loc_abs2meta.get(tgt, {})
+        _update('conn', tgt, src, abs2meta[tgt]['size'], _idxs(meta.get('src_indices')),
+                meta.get('flat_src_indices'))
+
+    for comp in model.system_iter(recurse=True, typ=Component):
+        _update('comp', comp.pathname, type(comp).__name__, comp.matrix_free)
+        # ExecComp partials are declared dense, but their values depend on the expressions.
+        _update('exprs', getattr(comp, '_exprs', None))
+        for key in sorted(comp._subjacs_info):
+            meta = comp._subjacs_info[key]
+            _update('subjac', key, meta['shape'], _idxs(meta['rows']), _idxs(meta['cols']))
+
+    return h.hexdigest()
+
+
+def _cache_file(driver, kind, mode, include_sparsity=False, structural=False):
+    """
+    Return the cache file name for the given driver, or None if caching is not active.
+
+    Parameters
+    ----------
+    driver : <Driver>
+        The driver performing the optimization.
+    kind : str
+        Kind of cached data, e.g., 'coloring' or 'sparsity'.
+    mode : str
+        Derivative direction.
+    include_sparsity : bool
+        True if the cached coloring includes the total jacobian sparsity.
+    structural : bool
+        True if the sparsity is computed from declared partial sparsity.
+
+    Returns
+    -------
+    str or None
+        Full path of the cache file.
+    """
+    cache_dir = driver.options['dynamic_derivs_cache_dir']
+    if not cache_dir:
+        return None
+
+    try:
+        os.makedirs(cache_dir)
+    except OSError:
+        if not os.path.isdir(cache_dir):
+            raise
+
+    key = _structure_hash(driver, kind, mode, include_sparsity, structural)
+    return os.path.join(cache_dir, '%s_%s.json' % (kind, key))
+
+
+def _load_cache_file(cache_file):
+    """
+    Return the data stored in the given cache file, or None if it can't be loaded.
+
+    Parameters
+    ----------
+    cache_file : str or None
+        Full path of the cache file.
+
+    Returns
+    -------
+    dict, list or None
+        The cached data.
+    """
+    if cache_file is None or not os.path.isfile(cache_file):
+        return None
+
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except Exception:
+        # A damaged cache file just means we recompute and overwrite it.
+        return None
+
+
+def _write_cache_file(cache_file, write_func, *args):
+    """
+    Write a cache file so that concurrent runs never see a partial file.
+
+    Parameters
+    ----------
+    cache_file : str
+        Full path of the cache file.
+    write_func : function
+        Function that writes the data to the stream passed as its last arg.
+    *args : list
+        Leading args passed to write_func.
+    """
+    fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(cache_file), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        write_func(*(args + (f,)))
+    try:
+        os.rename(tmpname, cache_file)
+    except OSError:
+        # Another process stored the file first.
+        os.remove(tmpname)
+
+
+def _tot_jac_shape(driver):
+    """
+    Return the shape of the driver's total jacobian.
+
+    Parameters
+    ----------
+    driver : <Driver>
+        The driver performing the optimization.
+
+    Returns
+    -------
+    tuple of int
+        Number of response rows and design variable columns.
+    """
+    nrows = sum(driver._responses[name]['size'] for name in driver._get_ordered_nl_responses())
+    ncols = sum(meta['size'] for meta in itervalues(driver._designvars))
+    return (int(nrows), int(ncols))
+
+
+def _coloring_nonzeros(coloring, shape):
+    """
+    Return the total jacobian entries that are computed by the given coloring.
+
+    Parameters
+    ----------
+    coloring : dict
+        Metadata required for coloring.
+    shape : tuple of int
+        Shape of the total jacobian.
+
+    Returns
+    -------
+    ndarray
+        Boolean array that is True for each computed entry.
+    """
+    nonzeros = np.zeros(shape, dtype=bool)
+    for mode in ('fwd', 'rev'):
+        if mode not in coloring:
+            continue
+        col_lists, nz_lists = coloring[mode][:2]
+        for i in chain.from_iterable(col_lists):
+            nzs = nz_lists[i]
+            if nzs is None:
+                nzs = slice(None)
+            if mode == 'fwd':
+                nonzeros[nzs, i] = True
+            else:
+                nonzeros[i, nzs] = True
+    return nonzeros
+
+
+def _sparsity_nonzeros(sparsity, driver):
+    """
+    Return the total jacobian entries that are nonzero in the given sparsity.
+
+    Parameters
+    ----------
+    sparsity : dict
+        Nested dict of form sparsity[response][desvar] = (rows, cols, shape).
+    driver : <Driver>
+        The driver performing the optimization.
+
+    Returns
+    -------
+    ndarray
+        Boolean array that is True for each nonzero entry.
+    """
+    nonzeros = np.zeros(_tot_jac_shape(driver), dtype=bool)
+    row_start = 0
+    for res in driver._get_ordered_nl_responses():
+        col_start = 0
+        for dv, meta in iteritems(driver._designvars):
+            subjac = sparsity.get(res, {}).get(dv)
+            if subjac is not None:
+                rows, cols, _ = subjac
+                nonzeros[row_start + np.asarray(rows, dtype=int),
+                         col_start + np.asarray(cols, dtype=int)] = True
+            col_start += meta['size']
+        row_start += driver._responses[res]['size']
+    return nonzeros
+
+
+def _matches_tot_jac(problem, nonzeros):
+    """
+    Check cached nonzeros against a freshly computed total jacobian.
+
+    Parameters
+    ----------
+    problem : <Problem>
+        The Problem being analyzed.
+    nonzeros : ndarray
+        Boolean array of the total jacobian entries covered by the cached data.
+
+    Returns
+    -------
+    bool
+        True if every nonzero of the fresh total jacobian is covered.
+    """
+    J = _get_bool_jac(problem, repeats=1, setup=False, run_model=False)
+    problem.driver._total_jac = None
+    return J.shape == nonzeros.shape and not np.any(J & ~nonzeros)
+
+
 def dynamic_sparsity(driver):
     """
     Compute deriv sparsity during runtime.
 
+    If the driver's 'dynamic_derivs_cache_dir' option is set, the sparsity is loaded from
+    that directory when the model structure hasn't changed since it was last computed.
+
     Parameters
     ----------
     driver : <Driver>
@@ -1126,10 +1794,25 @@ def dynamic_sparsity(driver):
     problem = driver._problem
     driver._total_jac = None
     repeats = driver.options['dynamic_derivs_repeats']
-
-    # save the sparsity.json file for later inspection
-    with open("sparsity.json", "w") as f:
-        sparsity = get_sparsity(problem, mode=problem._mode, repeats=repeats, stream=f)
+    structural = driver.options['dynamic_sparsity_method'] == 'structural'
+
+    cache_file = _cache_file(driver, 'sparsity', problem._mode, structural=structural)
+    sparsity = _load_cache_file(cache_file)
+    if sparsity is not None:
+        print("\nLoaded cached total jacobian sparsity from '%s'." % cache_file)
+        if not structural and not _matches_tot_jac(problem,
+                                                   _sparsity_nonzeros(sparsity, driver)):
+            print("\nCached total jacobian sparsity doesn't match the current total jacobian, "
+                  "so it will be recomputed.")
+            sparsity = None
+
+    if sparsity is None:
+        # save the sparsity.json file for later inspection
+        with open("sparsity.json", "w") as f:
+            sparsity = get_sparsity(problem, mode=problem._mode, repeats=repeats, stream=f,
+                                    structural=structural)
+        if cache_file is not None:
+            _write_cache_file(cache_file, _write_sparsity, sparsity)
 
     driver.set_total_jac_sparsity(sparsity)
     driver._setup_tot_jac_sparsity()
@@ -1139,6 +1822,9 @@ def dynamic_simul_coloring(driver, do_sparsity=False, show_jac=False):
     """
     Compute simultaneous deriv coloring during runtime.
 
+    If the driver's 'dynamic_derivs_cache_dir' option is set, the coloring is loaded from
+    that directory when the model structure hasn't changed since it was last computed.
+
     Parameters
     ----------
     driver : <Driver>
@@ -1154,13 +1840,32 @@ def dynamic_simul_coloring(driver, do_sparsity=False, show_jac=False):
 
     problem = driver._problem
     driver._total_jac = None
+    structural = driver.options['dynamic_sparsity_method'] == 'structural'
+
+    cache_file = _cache_file(driver, 'coloring', problem._orig_mode, do_sparsity, structural)
+    coloring = _load_cache_file(cache_file)
+    if coloring is not None:
+        print("\nLoaded cached simultaneous derivative coloring from '%s'." % cache_file)
+        nonzeros = _coloring_nonzeros(coloring, _tot_jac_shape(driver))
+        if not structural and not _matches_tot_jac(problem, nonzeros):
+            print("\nCached simultaneous derivative coloring doesn't match the current total "
+                  "jacobian, so it will be recomputed.")
+            coloring = None
+        else:
+            coloring = _json2coloring(coloring)
+
+    if coloring is None:
+        # save the coloring.json file for later inspection
+        with open("coloring.json", "w") as f:
+            coloring = get_simul_meta(problem,
+                                      repeats=driver.options['dynamic_derivs_repeats'],
+                                      tol=1.e-15, include_sparsity=do_sparsity,
+                                      setup=False, run_model=False, show_jac=show_jac, stream=f,
+                                      structural=structural)
+        if cache_file is not None:
+            _write_cache_file(cache_file, _write_coloring,
+                              [m for m in ('fwd', 'rev') if m in coloring], coloring)
 
-    # save the coloring.json file for later inspection
-    with open("coloring.json", "w") as f:
-        coloring = get_simul_meta(problem,
-                                  repeats=driver.options['dynamic_derivs_repeats'],
-                                  tol=1.e-15, include_sparsity=do_sparsity,
-                                  setup=False, run_model=False, show_jac=show_jac, stream=f)
     driver.set_simul_deriv_color(coloring)
     driver._setup_simul_coloring()
     if do_sparsity:
@@ -1187,6 +1892,12 @@ def _simul_coloring_setup_parser(parser):
                         "compute the coloring.")
     parser.add_argument('--no-sparsity', action='store_true', dest='no_sparsity',
                         help="Exclude the sparsity structure from the coloring data structure.")
+    parser.add_argument('-s', '--structural', action='store_true', dest='structural',
+                        help="Compute the total jacobian sparsity from the declared partial "
+                        "sparsity instead of from randomized total jacobians.")
+    parser.add_argument('--order', action='store', dest='order', default='incidence_degree',
+                        choices=sorted(_col_orderings),
+                        help="Column ordering used by the greedy coloring.")
     parser.add_argument('-p', '--profile', action='store_true', dest='profile',
                         help="Do profiling on the coloring process.")
 
@@ -1226,7 +1937,8 @@ def _simul_coloring_cmd(options):
                                         show_jac=options.show_jac,
                                         include_sparsity=not options.no_sparsity,
                                         setup=True, run_model=True,
-                                        stream=outfile)
+                                        stream=outfile, structural=options.structural,
+                                        order=options.order)
 
         if sys.stdout.isatty():
             simul_coloring_summary(color_info, stream=sys.stdout)
@@ -1253,6 +1965,9 @@ def _sparsity_setup_parser(parser):
     parser.add_argument('-j', '--jac', action='store_true', dest='show_jac',
                         help="Display a visualization of the final total jacobian used to "
                         "compute the sparsity.")
+    parser.add_argument('-s', '--structural', action='store_true', dest='structural',
+                        help="Compute the total jacobian sparsity from the declared partial "
+                        "sparsity instead of from randomized total jacobians.")
 
 
 def _sparsity_cmd(options):
@@ -1281,7 +1996,8 @@ def _sparsity_cmd(options):
             outfile = open(options.outfile, 'w')
         Problem._post_setup_func = None  # avoid recursive loop
         get_sparsity(prob, repeats=options.num_jacs, tol=options.tolerance, mode=prob._mode,
-                     show_jac=options.show_jac, setup=True, run_model=True, stream=outfile)
+                     show_jac=options.show_jac, setup=True, run_model=True, stream=outfile,
+                     structural=options.structural)
         exit()
     return _sparsity
 
@@ -1,7 +1,8 @@
 """
-Utilities for submitting function evaluations under MPI.
+Utilities for submitting function evaluations under MPI or in forked processes.
 """
 import os
+import multiprocessing
 import traceback
 from itertools import chain, islice
 
@@ -9,6 +10,14 @@ from openmdao.utils.mpi import debug
 
 trace = os.environ.get('OPENMDAO_TRACE')
 
+# multiprocessing context that forks its worker processes, or None if the platform can't fork.
+try:
+    fork_context = multiprocessing.get_context('fork')
+except AttributeError:  # python 2 always forks on platforms that support it
+    fork_context = multiprocessing if hasattr(os, 'fork') else None
+except ValueError:  # no fork on this platform
+    fork_context = None
+
 
 def concurrent_eval_lb(func, cases, comm, broadcast=False):
     """
@@ -9,6 +9,9 @@ PIPE = subprocess.PIPE
 STDOUT = subprocess.STDOUT
 DEV_NULL = 'nul:' if sys.platform == 'win32' else '/dev/null'
 
+# Popen.wait() accepts a timeout on Python 3.3+.
+_WAIT_HAS_TIMEOUT = hasattr(subprocess, 'TimeoutExpired')
+
 
 class CalledProcessError(subprocess.CalledProcessError):
     """
@@ -191,14 +194,16 @@ class ShellProc(subprocess.Popen):
 
     def wait(self, poll_delay=0., timeout=0.):
         """
-        Poll for command completion or timeout.
+        Wait for command completion or timeout.
 
-        Closes any files implicitly opened.
+        Blocks on the child process directly, so completion is detected as soon as it
+        happens. Closes any files implicitly opened.
 
         Parameters
         ----------
         poll_delay : float (seconds)
-            Time to delay between polling for command completion.
+            Time to delay between polling for command completion. Only used where
+            :meth:`subprocess.Popen.wait` does not support a timeout (Python 2).
             A value of zero uses an internal default.
         timeout : float (seconds)
             Maximum time to wait for command completion.
@@ -213,24 +218,29 @@ class ShellProc(subprocess.Popen):
         """
         return_code = None
         try:
-            if poll_delay <= 0:
-                poll_delay = max(0.1, timeout / 100.)
-                poll_delay = min(10., poll_delay)
-            npolls = int(timeout / poll_delay) + 1
-
-            time.sleep(poll_delay)
-            return_code = self.poll()
-            while return_code is None:
-                npolls -= 1
-                if (timeout > 0) and (npolls < 0):
+            if timeout <= 0:
+                return_code = subprocess.Popen.wait(self)
+            elif _WAIT_HAS_TIMEOUT:
+                try:
+                    return_code = subprocess.Popen.wait(self, timeout=timeout)
+                except subprocess.TimeoutExpired:
                     self.terminate()
-                    break
-                time.sleep(poll_delay)
+            else:
+                if poll_delay <= 0:
+                    poll_delay = min(0.1, timeout / 100.)
+                end = time.time() + timeout
                 return_code = self.poll()
+                while return_code is None:
+                    remaining = end - time.time()
+                    if remaining <= 0:
+                        self.terminate()
+                        break
+                    time.sleep(min(poll_delay, remaining))
+                    return_code = self.poll()
         finally:
             self.close_files()
 
-        # self.returncode set by self.poll().
+        # self.returncode set by Popen.wait() or self.poll().
         if return_code is not None:
             self.errormsg = self.error_message(return_code)
         else:
@@ -354,3 +364,60 @@ def check_call(args, stdin=None, stdout=None, stderr=None, env=None,
     return_code, error_msg = process.wait(poll_delay, timeout)
     if return_code:
         raise CalledProcessError(return_code, args, error_msg)
+
+
+def write_message(stream, data, code=0):
+    """
+    Write a framed message to a binary stream.
+
+    A message is a header line holding an integer code and the payload length in bytes,
+    followed by the payload itself.
+
+    Parameters
+    ----------
+    stream : file
+        Binary stream to write to, for example the stdin pipe of a :class:`ShellProc`.
+    data : bytes or str
+        Message payload. A str is encoded as UTF-8.
+    code : int
+        Integer code sent in the message header.
+    """
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    stream.write(('%d %d\n' % (code, len(data))).encode('ascii'))
+    stream.write(data)
+    stream.flush()
+
+
+def read_message(stream):
+    """
+    Read a framed message, as written by :func:`write_message`, from a binary stream.
+
+    Parameters
+    ----------
+    stream : file
+        Binary stream to read from, for example the stdout pipe of a :class:`ShellProc`.
+
+    Returns
+    -------
+    int
+        Integer code from the message header.
+    bytes
+        Message payload.
+    """
+    header = stream.readline()
+    if not header:
+        raise EOFError('End of stream while waiting for a message.')
+    try:
+        code, size = [int(field) for field in header.split()]
+    except ValueError:
+        raise ValueError('Invalid message header: %r' % header)
+
+    chunks = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            raise EOFError('End of stream while reading a message.')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return code, b''.join(chunks)
@@ -7,6 +7,7 @@ import shutil
 import signal
 import sys
 import tempfile
+import time
 
 from openmdao.utils.shell_proc import call, check_call, CalledProcessError, ShellProc
 
@@ -91,6 +92,25 @@ class TestCase(unittest.TestCase):
         else:
             self.assertEqual(msg, ': SIGTERM')
 
+    @unittest.skipIf(sys.platform == 'win32', 'Requires a POSIX shell.')
+    def test_wait(self):
+        # completion is detected without waiting out a polling interval.
+        start = time.time()
+        proc = ShellProc('exit 3', stdout='stdout', stderr='stderr')
+        return_code, error_msg = proc.wait(poll_delay=5., timeout=10.)
+        self.assertEqual(return_code, 3)
+        self.assertEqual(error_msg, proc.error_message(3))
+        self.assertLess(time.time() - start, 4.)
+
+        # timeouts are still enforced.
+        start = time.time()
+        proc = ShellProc('sleep 30', stdout='stdout', stderr='stderr')
+        return_code, error_msg = proc.wait(timeout=0.5)
+        self.assertEqual(return_code, None)
+        self.assertEqual(error_msg, 'Timed out')
+        self.assertLess(time.time() - start, 10.)
+        proc.wait()
+
 
 if __name__ == '__main__':
     unittest.main()